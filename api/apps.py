@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connexion des signaux (invalidation du cache des adhésions)
+        from api import signals  # noqa: F401
+        # Vérifications de déploiement (manage.py check --deploy)
+        from api import checks  # noqa: F401
@@ -0,0 +1,38 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication sans lecture de l'utilisateur pour les requêtes en lecture.
+
+    N'est pas une classe par défaut: seules les vues qui l'utilisent via
+    authentication_classes en profitent, et seulement si JWT_STATELESS_READS=True.
+
+    Pour GET/HEAD/OPTIONS, request.user est un TokenClaimsUser construit à partir
+    des claims d'identité du token (email, nom): la ligne n'est lue que si la vue
+    touche un autre champ. is_active, is_staff et is_superuser ne sont jamais pris
+    dans le token: ils sont chargés depuis la base, et un compte désactivé est
+    rejeté à ce moment-là. Les écritures chargent l'utilisateur comme JWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        self.stateless = (
+            getattr(settings, 'JWT_STATELESS_READS', False) and request.method in SAFE_METHODS
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.stateless:
+            return super().get_user(validated_token)
+
+        from api.models import TokenClaimsUser  # Import local pour éviter la circularité
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return TokenClaimsUser.from_claims(user_id, validated_token)
@@ -0,0 +1,76 @@
+from collections import namedtuple
+
+from django.db.models import F
+from django.utils import timezone
+
+from api.metrics import BALANCE_UPDATE_LATENCY, timed
+
+
+# Variation de solde produite par une transaction sur le compte (group_id ou user_id)
+BalanceChange = namedtuple('BalanceChange', ['transaction_id', 'user_id', 'group_id', 'amount'])
+
+
+def signed_amount(transaction_type, amount):
+    """Retourne l'effet d'une transaction sur un solde (revenu positif, dépense négative)"""
+    return amount if transaction_type == 'income' else -amount
+
+
+def balance_account(group_id, user_id):
+    """Retourne le compte impacté par une transaction: le groupe s'il existe, sinon l'utilisateur"""
+    return ('group', group_id) if group_id else ('user', user_id)
+
+
+@timed(BALANCE_UPDATE_LATENCY)
+def apply_balance_changes(changes):
+    """
+    Enregistre les variations dans le grand livre puis met à jour les soldes.
+
+    À appeler dans le même bloc transaction.atomic que l'écriture des transactions
+    pour que les écritures et les compteurs restent cohérents.
+    """
+    from api.models import LedgerEntry  # Import local pour éviter la circularité
+
+    changes = [change for change in changes if change.amount]
+    if not changes:
+        return
+
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(
+            transaction_id=change.transaction_id,
+            user_id=change.user_id,
+            group_id=change.group_id,
+            amount=change.amount
+        ) for change in changes
+    ])
+
+    deltas = {}
+    for change in changes:
+        account = balance_account(change.group_id, change.user_id)
+        deltas[account] = deltas.get(account, 0) + change.amount
+    apply_balance_deltas(deltas)
+
+
+def apply_balance_deltas(deltas):
+    """
+    Applique des variations de solde agrégées par compte.
+
+    `deltas` associe un compte (voir `balance_account`) à une variation signée.
+    Chaque compte reçoit un unique UPDATE ... SET solde = solde + delta, sans lecture
+    préalable: deux écritures concurrentes sur le même groupe ne peuvent plus s'écraser.
+    Les comptes sont traités dans un ordre stable pour éviter les interblocages.
+    """
+    from api.models import Group, User  # Import local pour éviter la circularité
+
+    for (kind, pk), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        if kind == 'group':
+            Group.objects.filter(pk=pk).update(
+                amount=F('amount') + delta,
+                updated_at=timezone.now()
+            )
+        else:
+            User.objects.filter(pk=pk).update(
+                solde=F('solde') + delta,
+                updated_at=timezone.now()
+            )
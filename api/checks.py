@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+# Durée (secondes) au-delà de laquelle un cache d'autorisation propre au processus est signalé
+LOCAL_AUTHORIZATION_CACHE_MAX_TIMEOUT = 10
+
+
+def is_process_local(alias):
+    """Le cache de cet alias est-il propre à chaque processus (invalidation non partagée) ?"""
+    return settings.CACHES.get(alias, {}).get('BACKEND') in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_authorization_caches(app_configs, **kwargs):
+    """
+    Un cache qui porte des décisions d'autorisation (ou des versions servies en 304,
+    ou l'épinglage des lectures au primaire) doit être partagé entre les workers, ou
+    n'en garder les entrées que quelques secondes: une invalidation faite par un
+    processus n'atteint pas le cache en mémoire des autres.
+    """
+    from api.dashboard import DASHBOARD_CACHE_ALIAS  # Import local pour éviter la circularité
+    from api.membership import MEMBERSHIP_CACHE_ALIAS  # Import local pour éviter la circularité
+    from api.routers import REPLICA_PIN_CACHE_ALIAS  # Import local pour éviter la circularité
+
+    warnings = []
+    timeout = settings.CACHES.get(MEMBERSHIP_CACHE_ALIAS, {}).get('TIMEOUT', 300)
+    if is_process_local(MEMBERSHIP_CACHE_ALIAS) and (timeout is None or timeout > LOCAL_AUTHORIZATION_CACHE_MAX_TIMEOUT):
+        warnings.append(Warning(
+            f'The "{MEMBERSHIP_CACHE_ALIAS}" cache is process-local with a {timeout} s timeout: '
+            'a removed or demoted member keeps group access on other workers until it expires.',
+            hint='Use a shared backend (MEMBERSHIP_CACHE_BACKEND) or a timeout of a few seconds.',
+            id='api.W001',
+        ))
+
+    timeout = getattr(settings, 'DASHBOARD_VERSION_TIMEOUT', 5)
+    if is_process_local(DASHBOARD_CACHE_ALIAS) and (timeout is None or timeout > LOCAL_AUTHORIZATION_CACHE_MAX_TIMEOUT):
+        warnings.append(Warning(
+            f'The "{DASHBOARD_CACHE_ALIAS}" cache is process-local with {timeout} s dashboard versions: '
+            'other workers keep serving the previous dashboard (and 304 for its ETag) until they expire.',
+            hint='Use a shared backend (DASHBOARD_CACHE_BACKEND) or a DASHBOARD_VERSION_TIMEOUT of a few seconds.',
+            id='api.W002',
+        ))
+
+    if getattr(settings, 'DATABASE_REPLICA_ALIAS', None) and is_process_local(REPLICA_PIN_CACHE_ALIAS):
+        warnings.append(Warning(
+            f'The "{REPLICA_PIN_CACHE_ALIAS}" cache is process-local: after a write, reads served by '
+            'another worker go to the replica and may miss the write.',
+            hint='Use a shared backend (REPLICA_PIN_CACHE_BACKEND).',
+            id='api.W003',
+        ))
+    return warnings
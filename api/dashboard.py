@@ -0,0 +1,90 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+
+
+# Alias du cache (CACHES) qui conserve les tableaux de bord et leurs versions
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+
+
+def dashboard_cache():
+    return caches[DASHBOARD_CACHE_ALIAS]
+
+
+def version_timeout():
+    """
+    Durée de vie d'une version (DASHBOARD_VERSION_TIMEOUT), par défaut celle des contenus:
+    une version expirée est recréée, ce qui change l'ETag et force un recalcul.
+    """
+    default = settings.CACHES.get(DASHBOARD_CACHE_ALIAS, {}).get('TIMEOUT', 300)
+    return getattr(settings, 'DASHBOARD_VERSION_TIMEOUT', default)
+
+
+def version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def payload_key(user_id, version):
+    return f'dashboard:{user_id}:{version}'
+
+
+def dashboard_version(user_id):
+    """
+    Retourne la version courante du tableau de bord d'un utilisateur (lue dans le cache,
+    sans requête SQL). Une version absente (démarrage, éviction, expiration) est créée.
+    """
+    cache = dashboard_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        # add() ne remplace pas une version posée entre-temps par une écriture concurrente
+        if not cache.add(version_key(user_id), version, timeout=version_timeout()):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+def dashboard_etag(user_id, version):
+    return f'"dashboard-{user_id}-{version}"'
+
+
+def cached_dashboard(user_id, version):
+    """Retourne le tableau de bord mis en cache pour cette version, ou None"""
+    return dashboard_cache().get(payload_key(user_id, version))
+
+
+def cache_dashboard(user_id, version, payload):
+    dashboard_cache().set(payload_key(user_id, version), payload)
+
+
+def bump_dashboard_versions(user_ids):
+    """
+    Change la version du tableau de bord des utilisateurs concernés par une écriture.
+
+    Les anciennes versions ne sont plus lues et expirent d'elles-mêmes. La version est
+    changée tout de suite puis à nouveau après le commit, pour qu'un tableau de bord
+    calculé avant le commit ne soit jamais servi sous la version finale.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    def bump():
+        version = time.time_ns()
+        dashboard_cache().set_many(
+            {version_key(user_id): version for user_id in user_ids}, timeout=version_timeout()
+        )
+
+    bump()
+    db_transaction.on_commit(bump)
+
+
+def group_member_ids(group_ids):
+    """Retourne les identifiants des membres des groupes donnés (cache des adhésions)"""
+    from api.membership import group_members  # Import local pour éviter la circularité
+
+    member_ids = set()
+    for user_ids in group_members(group_ids).values():
+        member_ids |= user_ids
+    return member_ids
@@ -1,16 +1,64 @@
-import bcrypt
+import threading
 
-def hashPassword(password):
-    #convert password in bytes
-    bytes = password.encode('utf-8')
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    BCryptPasswordHasher, BCryptSHA256PasswordHasher, check_password, make_password
+)
+
+
+_hashing_slots = None
+_hashing_slots_lock = threading.Lock()
+
+
+def hashing_slots():
+    """
+    Sémaphore qui limite le nombre de calculs bcrypt simultanés par processus
+    (PASSWORD_HASHING_CONCURRENCY).
+
+    Ce n'est qu'une limite de concurrence: le thread de la requête calcule lui-même
+    le hachage et reste occupé pendant toute sa durée (plus l'attente d'une place).
+    Elle évite qu'une rafale de connexions/inscriptions n'occupe tous les cœurs,
+    sans augmenter le débit de connexions ni libérer les workers WSGI.
+    """
+    global _hashing_slots
+    if _hashing_slots is None:
+        with _hashing_slots_lock:
+            if _hashing_slots is None:
+                _hashing_slots = threading.BoundedSemaphore(
+                    getattr(settings, 'PASSWORD_HASHING_CONCURRENCY', 4)
+                )
+    return _hashing_slots
+
+
+class BoundedBCryptMixin:
+    """Coût (PASSWORD_BCRYPT_ROUNDS) lu dans les settings et nombre de calculs simultanés limité"""
 
-    #generate the salt, special key to hash the password
-    salt = bcrypt.gensalt()
+    @property
+    def rounds(self):
+        return getattr(settings, 'PASSWORD_BCRYPT_ROUNDS', 12)
+
+    def encode(self, password, salt):
+        # verify() et harden_runtime() passent aussi par encode()
+        with hashing_slots():
+            return super().encode(password, salt)
+
+
+class BCryptSHA256Hasher(BoundedBCryptMixin, BCryptSHA256PasswordHasher):
+    """
+    Hasher par défaut. Un hachage dont le coût diffère de PASSWORD_BCRYPT_ROUNDS
+    est recalculé à la connexion suivante (must_update).
+    """
+
+
+class BCryptHasher(BoundedBCryptMixin, BCryptPasswordHasher):
+    """Hachages bcrypt bruts créés par l'ancien hashPassword (préfixés bcrypt$ par la migration 0007)"""
+
+
+def hashPassword(password):
+    """Hache un mot de passe avec le hasher par défaut (même chemin que set_password)"""
+    return make_password(password)
 
-    strPass = str(bcrypt.hashpw(bytes, salt))[2:-1]
-    return strPass
 
 def checkPassword(password, hashedPassword):
-    bytes = password.encode('utf-8')
-    # hashedPassword[2:-1]
-    return bcrypt.checkpw(bytes, hashedPassword.encode('utf-8'))
\ No newline at end of file
+    """Vérifie un mot de passe contre un hachage produit par hashPassword"""
+    return check_password(password, hashedPassword)
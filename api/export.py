@@ -0,0 +1,84 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+
+
+# Colonnes exportées: champs de la transaction puis champs des objets liés
+TRANSACTION_EXPORT_FIELDS = [
+    'id', 'date', 'type', 'amount', 'description', 'category_id', 'group_id', 'user_id',
+]
+TRANSACTION_EXPORT_RELATED = {
+    'category_name': F('category__name'),
+    'group_name': F('group__name'),
+    'user_email': F('user__email'),
+}
+TRANSACTION_EXPORT_COLUMNS = TRANSACTION_EXPORT_FIELDS + list(TRANSACTION_EXPORT_RELATED)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Nombre de lignes lues à chaque aller-retour du curseur serveur
+EXPORT_CHUNK_SIZE = 2000
+
+# Premiers caractères qui font évaluer une cellule comme formule par un tableur
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """Pseudo-fichier qui retourne la ligne écrite au lieu de la stocker (pour csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Parcourt les transactions sous forme de dictionnaires (values()) via un curseur
+    serveur: la mémoire utilisée ne dépend pas du nombre de lignes exportées.
+    """
+    # Les select_related ne servent à rien ici: values() fait ses propres jointures
+    queryset = queryset.select_related(None).values(*TRANSACTION_EXPORT_FIELDS, **TRANSACTION_EXPORT_RELATED)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def csv_cell(value):
+    """
+    Neutralise les textes qu'un tableur interpréterait comme une formule
+    (injection CSV): ils sont préfixés d'une apostrophe. Les nombres et dates
+    sont laissés tels quels.
+    """
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    """Génère l'en-tête puis une ligne CSV par transaction"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(TRANSACTION_EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow([csv_cell(row[column]) for column in TRANSACTION_EXPORT_COLUMNS])
+
+
+def iter_ndjson(rows):
+    """Génère un objet JSON par ligne"""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def streaming_export(queryset, export_format, filename):
+    """
+    Retourne une StreamingHttpResponse qui exporte les transactions du queryset
+    en CSV ou NDJSON; les premiers octets partent dès le premier lot lu.
+    """
+    rows = export_rows(queryset)
+    content = iter_csv(rows) if export_format == 'csv' else iter_ndjson(rows)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connections
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit (requêtes/s) avec une connexion par requête puis avec la "
+        "configuration courante (connexions persistantes ou pool)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help="Nombre de requêtes simulées par mode (défaut: 500)"
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help="Nombre de threads (workers) simulés (défaut: 4)"
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help="Alias de base de données (défaut: default)"
+        )
+
+    def simulate_request(self, alias):
+        """Cycle d'une requête Django: signaux request_started/finished autour d'une requête SQL"""
+        close_old_connections()
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        finally:
+            close_old_connections()
+
+    def run(self, alias, requests, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as workers:
+            start = time.perf_counter()
+            list(workers.map(lambda _: self.simulate_request(alias), range(requests)))
+            elapsed = time.perf_counter() - start
+        connections.close_all()
+        return requests / elapsed
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        settings_dict = connections.settings[alias]
+        configured = {
+            'CONN_MAX_AGE': settings_dict.get('CONN_MAX_AGE', 0),
+            'pool': bool(settings_dict.get('OPTIONS', {}).get('pool')),
+        }
+        requests, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(
+            f"{settings_dict['ENGINE']} ({alias}), {requests} request(s), concurrency {concurrency}"
+        )
+
+        modes = []
+        if configured['pool']:
+            # Le pool est créé avec la connexion: il ne se désactive pas à chaud
+            modes.append(('pool (configured)', None))
+        else:
+            # Sans connexions persistantes configurées, compare avec 10 minutes
+            persistent = configured['CONN_MAX_AGE'] if configured['CONN_MAX_AGE'] != 0 else 600
+            modes.append(('new connection per request', 0))
+            modes.append((f'persistent (CONN_MAX_AGE={persistent})', persistent))
+
+        try:
+            for name, conn_max_age in modes:
+                if conn_max_age is not None:
+                    settings_dict['CONN_MAX_AGE'] = conn_max_age
+                connections.close_all()
+                self.stdout.write(f'{name}: {self.run(alias, requests, concurrency):.0f} requests/s')
+        finally:
+            settings_dict['CONN_MAX_AGE'] = configured['CONN_MAX_AGE']
@@ -0,0 +1,71 @@
+import logging
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from logs import ColoredFormatter, JSONFormatter
+from logs.logging_config import SQL_KEYWORDS, replace_sql_keywords
+
+
+def legacy_replace_sql_keywords(sql):
+    """Ancienne coloration (un re.sub par mot-clé), conservée comme référence"""
+    for keyword in SQL_KEYWORDS:
+        sql = re.sub(r'\b' + keyword + r'\b', r'\033[38;2;253;182;0m' + keyword + r'\033[0m', sql, flags=re.IGNORECASE)
+    return sql
+
+
+SAMPLE_SQL = (
+    'SELECT "api_transaction"."id", "api_transaction"."amount", "api_category"."name" '
+    'FROM "api_transaction" INNER JOIN "api_category" ON ("api_transaction"."category_id" = "api_category"."id") '
+    'WHERE ("api_transaction"."user_id" = %s AND "api_transaction"."group_id" IS NULL) '
+    'ORDER BY "api_transaction"."date" DESC LIMIT 20 OFFSET 40'
+)
+
+
+def sql_record():
+    """Record semblable à ceux de django.db.backends"""
+    record = logging.LogRecord(
+        'django.db.backends', logging.DEBUG, __file__, 0,
+        '(%.3f) %s; args=%s; alias=%s', (0.001, SAMPLE_SQL, (1,), 'default'), None
+    )
+    record.duration = 0.001
+    record.sql = SAMPLE_SQL
+    record.params = (1,)
+    record.alias = 'default'
+    return record
+
+
+class Command(BaseCommand):
+    help = "Mesure le coût par record des formatters de logs (coloré, JSON) sur une requête SQL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=20000,
+            help="Nombre de records formatés par formatter (défaut: 20000)"
+        )
+
+    def measure(self, format_record, records):
+        record = sql_record()
+        start = time.perf_counter()
+        for _ in range(records):
+            format_record(record)
+        return (time.perf_counter() - start) / records * 1e6
+
+    def handle(self, *args, **options):
+        records = options['records']
+        fmt, datefmt = '[%(asctime)s] %(levelname)s: \t%(message)s', '%H:%M:%S'
+        candidates = {
+            'plain': logging.Formatter(fmt, datefmt).format,
+            'color': ColoredFormatter(fmt, datefmt).format,
+            'json': JSONFormatter().format,
+            # Coloration seule, ancienne et nouvelle
+            'sql highlight (legacy)': lambda record: legacy_replace_sql_keywords(record.sql),
+            'sql highlight (single regex)': lambda record: replace_sql_keywords(record.sql),
+        }
+
+        self.stdout.write(f'{records} record(s) per formatter')
+        for name, format_record in candidates.items():
+            self.stdout.write(f'{name}: {self.measure(format_record, records):.2f} µs/record')
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le coût d'une vérification de mot de passe (ms et vérifications/s) selon le coût "
+        "bcrypt. Seul check_password est mesuré, pas une requête de connexion"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            nargs='+',
+            default=[10, 11, 12],
+            help="Coûts bcrypt à comparer (défaut: 10 11 12)"
+        )
+        parser.add_argument(
+            '--checks',
+            type=int,
+            default=20,
+            help="Nombre de vérifications par coût (défaut: 20)"
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help="Nombre de threads qui vérifient en même temps (défaut: 8)"
+        )
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        concurrency = options['concurrency']
+        password = 'benchmark-password'
+
+        self.stdout.write(f'{checks} check(s), {concurrency} thread(s)')
+        for rounds in options['rounds']:
+            with override_settings(PASSWORD_BCRYPT_ROUNDS=rounds):
+                encoded = make_password(password)
+                with ThreadPoolExecutor(max_workers=concurrency) as clients:
+                    start = time.perf_counter()
+                    results = list(clients.map(lambda _: check_password(password, encoded), range(checks)))
+                    elapsed = time.perf_counter() - start
+
+            if not all(results):
+                self.stderr.write(self.style.ERROR(f'rounds={rounds}: verification failed'))
+                continue
+            self.stdout.write(
+                f'rounds={rounds}: {elapsed / checks * 1000:.1f} ms/check, '
+                f'{checks / elapsed:.1f} checks/s'
+            )
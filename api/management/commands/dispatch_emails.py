@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en attente de la file d'envoi (une fois, ou en boucle avec --loop)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help="Nombre d'emails envoyés par connexion SMTP (défaut: EMAIL_OUTBOX_BATCH_SIZE)"
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Tourner en continu (worker) au lieu d'un seul passage"
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help="Pause en secondes lorsque la file est vide (défaut: EMAIL_OUTBOX_POLL_INTERVAL)"
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.EMAIL_OUTBOX_POLL_INTERVAL
+
+        while True:
+            sent, failed = self.drain(options['batch_size'])
+            if not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'{sent} email(s) sent, {failed} failure(s)'))
+                return
+            if sent or failed:
+                self.stdout.write(f'{sent} email(s) sent, {failed} failure(s)')
+            time.sleep(interval)
+
+    def drain(self, batch_size):
+        """Envoie des lots jusqu'à ce qu'il n'y ait plus d'email échu"""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = OutboxEmail.objects.dispatch(batch_size=batch_size)
+            total_sent += sent
+            total_failed += failed
+            if not sent and not failed:
+                return total_sent, total_failed
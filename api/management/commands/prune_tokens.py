@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.token_blacklist import TOKEN_PRUNE_BATCH_SIZE, prune_expired_tokens, token_table_stats
+
+
+class Command(BaseCommand):
+    help = "Supprime par lots les refresh tokens expirés et leurs révocations (à planifier, ex. cron quotidien)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TOKEN_PRUNE_BATCH_SIZE,
+            help=f"Nombre de tokens supprimés par requête (défaut: {TOKEN_PRUNE_BATCH_SIZE})"
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_tokens(batch_size=options['batch_size'])
+        tables = token_table_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"{deleted} expired token(s) pruned; {tables['outstanding']} outstanding, "
+            f"{tables['blacklisted']} blacklisted remaining"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.models import OutboxEmail, PasswordResetCode
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les codes de réinitialisation expirés ou déjà utilisés et les emails traités "
+        "depuis EMAIL_OUTBOX_RETENTION_DAYS (à planifier, ex. cron horaire)"
+    )
+
+    def handle(self, *args, **options):
+        deleted = PasswordResetCode.objects.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} reset code(s) purged'))
+        deleted = OutboxEmail.objects.purge_sent()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} outbox email(s) purged'))
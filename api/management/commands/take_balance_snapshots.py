@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import BalanceSnapshot
+
+
+class Command(BaseCommand):
+    help = "Prend un instantané des soldes de chaque groupe et utilisateur ayant de nouvelles écritures"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lag-minutes',
+            type=int,
+            default=None,
+            help="Ignorer les écritures plus récentes que ce délai (défaut: LEDGER_SNAPSHOT_LAG)"
+        )
+
+    def handle(self, *args, **options):
+        cutoff = None
+        if options['lag_minutes'] is not None:
+            cutoff = timezone.now() - timezone.timedelta(minutes=options['lag_minutes'])
+
+        snapshots = BalanceSnapshot.objects.take_all(cutoff=cutoff)
+        self.stdout.write(self.style.SUCCESS(f'{len(snapshots)} snapshot(s) created'))
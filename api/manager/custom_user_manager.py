@@ -1,5 +1,4 @@
 from django.contrib.auth.base_user import BaseUserManager
-from api.encryption import hashPassword
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password, **extra_fields):
@@ -7,7 +6,7 @@ class CustomUserManager(BaseUserManager):
             raise ValueError("Email is required")
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.password = hashPassword(password)
+        user.set_password(password)
         user.save()
         return user
     
@@ -1,5 +1,6 @@
 from django.db import models
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, Avg, Min, Max, Exists, OuterRef, Subquery, Value, F
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -34,6 +35,51 @@ class GroupManager(models.Manager):
             annotated_active_member_count=Count('members', filter=Q(members__user__is_active=True), distinct=True)
         )
     
+    def with_user_context(self, user):
+        """
+        Retourne les groupes annotés pour l'utilisateur courant: adhésion (Exists),
+        rôle, nombre de membres/admins et solde calculé (Subquery).
+        Les serializers lisent ces annotations au lieu d'interroger chaque groupe.
+        """
+        from api.models import Member  # Import local pour éviter la circularité
+
+        memberships = Member.objects.filter(group=OuterRef('pk'), user=user)
+
+        return self.annotate(
+            annotated_is_member=Exists(memberships),
+            annotated_role=Subquery(memberships.values('role')[:1]),
+            **self._group_stats_annotations()
+        )
+    
+    def for_user(self, user):
+        """
+        Retourne les groupes dont l'utilisateur est membre, annotés avec son rôle,
+        son montant personnel et sa date d'adhésion lus par la même jointure.
+        """
+        return self.filter(members__user=user).annotate(
+            annotated_is_member=Value(True),
+            annotated_role=F('members__role'),
+            annotated_amount_perso=F('members__amount_perso'),
+            annotated_date_join=F('members__date_join'),
+            **self._group_stats_annotations()
+        )
+    
+    def _group_stats_annotations(self):
+        """Annotations communes: nombre de membres/admins et solde (instantané + écritures postérieures)"""
+        from api.models import Member, LedgerEntry  # Import local pour éviter la circularité
+
+        group_members = Member.objects.filter(group=OuterRef('pk')).order_by().values('group')
+
+        return {
+            'annotated_member_count': Coalesce(
+                Subquery(group_members.annotate(total=Count('id')).values('total')), Value(0)
+            ),
+            'annotated_admin_count': Coalesce(
+                Subquery(group_members.filter(role='admin').annotate(total=Count('id')).values('total')), Value(0)
+            ),
+            'annotated_balance': LedgerEntry.objects.group_balance_expression('pk'),
+        }
+    
     def with_financial_summary(self):
         """Retourne les groupes avec résumé financier"""
         return self.annotate(
@@ -83,8 +129,7 @@ class MemberManager(models.Manager):
     def promote_to_admin(self, user, group):
         """Promouvoir un membre au rôle d'admin"""
         member = self.get(user=user, group=group)
-        member.role = 'admin'
-        member.save()
+        self._set_role(member, 'admin')
         return member
     
     def demote_to_member(self, user, group):
@@ -95,10 +140,18 @@ class MemberManager(models.Manager):
         if admin_count <= 1 and member.role == 'admin':
             raise ValueError("Cannot demote the last admin of the group")
         
-        member.role = 'member'
-        member.save()
+        self._set_role(member, 'member')
         return member
     
+    def _set_role(self, member, role):
+        """
+        Méthode privée: met à jour le seul rôle. post_save est émis (save avec
+        update_fields): carte des adhésions, tableau de bord et updated_at du groupe
+        sont invalidés comme pour toute modification d'adhésion.
+        """
+        member.role = role
+        member.save(update_fields=['role', 'updated_at'])
+    
     def group_admins(self, group):
         """Retourne les admins d'un groupe"""
         return self.filter(group=group, role='admin')
@@ -116,14 +169,56 @@ class MemberManager(models.Manager):
         return self.filter(user=user)
     
     def with_contributions(self):
-        """Retourne les membres avec leurs contributions financières"""
-        return self.annotate(
-            total_contributions=Sum('user__transactions__amount', 
-                                  filter=Q(user__transactions__group=models.F('group')))
+        """
+        Retourne les membres avec leurs contributions financières et le solde du groupe.
+        Deux sous-requêtes corrélées plutôt qu'une jointure + GROUP BY, qui multipliait
+        les lignes par le nombre de transactions de chaque utilisateur.
+        """
+        from api.models import Transaction, LedgerEntry  # Import local pour éviter la circularité
+
+        member_transactions = Transaction.objects.filter(
+            user=OuterRef('user'), group=OuterRef('group')
+        ).order_by().values('user')
+
+        return self.select_related('user', 'group').annotate(
+            total_contributions=Subquery(
+                member_transactions.annotate(total=Sum('amount')).values('total'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+            annotated_group_balance=LedgerEntry.objects.group_balance_expression('group')
         )
 
 
-class TransactionManager(models.Manager):
+class TransactionQuerySet(models.QuerySet):
+    """QuerySet pour les transactions financières"""
+
+    def aggregate_bundle(self):
+        """
+        Calcule en une seule requête les totaux, compteurs, dates extrêmes et
+        moyenne des transactions (agrégats conditionnels avec filter=Q(...))
+        """
+        income = Q(type='income')
+        expense = Q(type='expense')
+
+        bundle = self.aggregate(
+            total_income=Sum('amount', filter=income),
+            total_expenses=Sum('amount', filter=expense),
+            total_amount=Sum('amount'),
+            transaction_count=Count('id'),
+            income_count=Count('id', filter=income),
+            expense_count=Count('id', filter=expense),
+            average_transaction=Avg('amount'),
+            period_start=Min('date'),
+            period_end=Max('date'),
+        )
+
+        for key in ['total_income', 'total_expenses', 'total_amount', 'average_transaction']:
+            bundle[key] = bundle[key] or 0
+        bundle['balance'] = bundle['total_income'] - bundle['total_expenses']
+        return bundle
+
+
+class TransactionManager(models.Manager.from_queryset(TransactionQuerySet)):
     """Manager pour les transactions financières"""
     
     def user_transactions(self, user):
@@ -159,21 +254,47 @@ class TransactionManager(models.Manager):
         """Retourne les transactions avec preuve"""
         return self.exclude(preuve__isnull=True).exclude(preuve='')
     
+    def bulk_import(self, transactions, batch_size=500):
+        """
+        Insère des transactions en bulk_create (sans passer par Transaction.save)
+        puis inscrit leurs écritures au grand livre et met à jour les agrégats mensuels.
+        Les soldes reçoivent une seule variation cumulée par groupe/utilisateur.
+        """
+        from django.db import transaction as db_transaction
+        from api.balance import BalanceChange, apply_balance_changes, signed_amount
+        from api.dashboard import bump_dashboard_versions, group_member_ids
+        from api.models import MonthlyRollup  # Import local pour éviter la circularité
+
+        with db_transaction.atomic():
+            created = self.bulk_create(transactions, batch_size=batch_size)
+            apply_balance_changes([
+                BalanceChange(item.pk, item.user_id, item.group_id, signed_amount(item.type, item.amount))
+                for item in created
+            ])
+            MonthlyRollup.objects.apply_changes([
+                MonthlyRollup.objects.change_for(
+                    item.user_id, item.group_id, item.category_id, item.date, item.type, item.amount
+                ) for item in created
+            ])
+            bump_dashboard_versions(
+                {item.user_id for item in created} | group_member_ids({item.group_id for item in created})
+            )
+
+        return created
+    
     def calculate_balance(self, user=None, group=None):
-        """Calcule le solde (revenus - dépenses)"""
-        queryset = self
-        
-        if user:
-            queryset = queryset.filter(user=user)
-        if group:
-            queryset = queryset.filter(group=group)
-        
-        income = queryset.filter(type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
-        expenses = queryset.filter(type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
-        
-        return income - expenses
+        """
+        Calcule le solde (revenus - dépenses) à partir du grand livre: instantané du
+        compte (groupe, utilisateur dans un groupe, ou utilisateur tous groupes
+        confondus) + écritures postérieures.
+        """
+        from api.models import LedgerEntry  # Import local pour éviter la circularité
+
+        if user is None and group is None:
+            # Toutes les écritures: pas un compte, donc pas d'instantané
+            return LedgerEntry.objects.aggregate(total=Sum('amount'))['total'] or 0
+
+        return LedgerEntry.objects.balance(user=user, group=group, all_groups=group is None)
 
 
 class CategoryManager(models.Manager):
@@ -202,6 +323,15 @@ class CategoryManager(models.Manager):
             total_amount=Sum('transactions__amount')
         )
     
+    def type_totals(self, user):
+        """Retourne le montant total des transactions par type de catégorie d'un utilisateur"""
+        from api.models import Transaction  # Import local pour éviter la circularité
+
+        totals = Transaction.objects.filter(category__user=user).values('category__type').annotate(
+            total=Sum('amount')
+        ).order_by()
+        return {item['category__type']: item['total'] or 0 for item in totals}
+    
     def most_used(self, limit=10):
         """Retourne les catégories les plus utilisées"""
         return self.with_transaction_counts().order_by('-transaction_count')[:limit]
@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Sum, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def _account(user=None, group=None, all_groups=False):
+    """
+    Type et filtre des écritures d'un compte:
+    - `group`: le solde d'un groupe (toutes ses écritures)
+    - `member` (user et group): les écritures d'un utilisateur dans un groupe
+    - `user` (user et all_groups): toutes les écritures d'un utilisateur, groupes compris
+    - `personal` (user): le solde personnel d'un utilisateur (hors groupe)
+    """
+    if group is not None and user is not None:
+        return 'member', {'user': user, 'group': group}
+    if group is not None:
+        return 'group', {'group': group}
+    if all_groups:
+        return 'user', {'user': user}
+    return 'personal', {'user': user, 'group__isnull': True}
+
+
+class LedgerEntryManager(models.Manager):
+    """Manager pour les écritures du grand livre"""
+
+    def for_account(self, user=None, group=None, all_groups=False):
+        """Retourne les écritures d'un compte (voir _account)"""
+        return self.filter(**_account(user=user, group=group, all_groups=all_groups)[1])
+
+    def balance(self, user=None, group=None, as_of=None, all_groups=False):
+        """
+        Calcule le solde d'un compte, actuel ou à une date donnée:
+        dernier instantané + somme des écritures postérieures.
+        """
+        from api.models import BalanceSnapshot  # Import local pour éviter la circularité
+
+        snapshot = BalanceSnapshot.objects.latest_for(user=user, group=group, as_of=as_of, all_groups=all_groups)
+        entries = self.for_account(user=user, group=group, all_groups=all_groups)
+
+        if snapshot:
+            entries = entries.filter(id__gt=snapshot.last_entry_id)
+        if as_of:
+            entries = entries.filter(created_at__lte=as_of)
+
+        delta = entries.aggregate(total=Sum('amount'))['total'] or 0
+        return (snapshot.balance if snapshot else 0) + delta
+
+    def group_balance_expression(self, group_ref):
+        """
+        Expression du solde d'un groupe pour annoter un queryset (même calcul que
+        `balance`): dernier instantané + écritures postérieures, via deux sous-requêtes.
+        `group_ref` désigne l'identifiant du groupe dans la requête externe (ex. 'pk').
+        """
+        from api.models import BalanceSnapshot  # Import local pour éviter la circularité
+
+        amount_field = models.DecimalField(max_digits=12, decimal_places=2)
+
+        def latest_snapshot(ref):
+            return BalanceSnapshot.objects.filter(account='group', group=ref).order_by('-taken_at', '-last_entry_id')
+
+        # Les écritures sont comparées au dernier instantané de leur propre groupe
+        entries = self.filter(
+            group=OuterRef(group_ref),
+            id__gt=Coalesce(Subquery(latest_snapshot(OuterRef('group')).values('last_entry_id')[:1]), Value(0))
+        ).order_by().values('group')
+
+        return Coalesce(
+            Subquery(latest_snapshot(OuterRef(group_ref)).values('balance')[:1]),
+            Value(0),
+            output_field=amount_field
+        ) + Coalesce(
+            Subquery(entries.annotate(total=Sum('amount')).values('total')),
+            Value(0),
+            output_field=amount_field
+        )
+
+
+class BalanceSnapshotManager(models.Manager):
+    """Manager pour les instantanés de solde"""
+
+    def latest_for(self, user=None, group=None, as_of=None, all_groups=False):
+        """Retourne le dernier instantané d'un compte (antérieur à `as_of` si fourni)"""
+        account, filters = _account(user=user, group=group, all_groups=all_groups)
+        snapshots = self.filter(account=account, **filters)
+        if as_of:
+            snapshots = snapshots.filter(taken_at__lte=as_of)
+        return snapshots.order_by('-taken_at', '-last_entry_id').first()
+
+    def take(self, user=None, group=None, cutoff=None, all_groups=False):
+        """
+        Prend un instantané incrémental d'un compte à partir du précédent.
+
+        Seules les écritures antérieures à `cutoff` sont figées, afin de ne pas
+        sauter une écriture dont la transaction n'est pas encore validée.
+        Retourne None s'il n'y a rien de nouveau à figer.
+        """
+        from api.models import LedgerEntry  # Import local pour éviter la circularité
+
+        cutoff = cutoff or self.default_cutoff()
+        account, _ = _account(user=user, group=group, all_groups=all_groups)
+        previous = self.latest_for(user=user, group=group, all_groups=all_groups)
+        entries = LedgerEntry.objects.for_account(
+            user=user, group=group, all_groups=all_groups
+        ).filter(created_at__lte=cutoff)
+        if previous:
+            entries = entries.filter(id__gt=previous.last_entry_id)
+
+        totals = entries.aggregate(total=Sum('amount'), last_id=Max('id'))
+        if totals['last_id'] is None:
+            return None
+
+        return self.create(
+            account=account,
+            user=None if account == 'group' else user,
+            group=group if account in ('group', 'member') else None,
+            balance=(previous.balance if previous else 0) + totals['total'],
+            last_entry_id=totals['last_id'],
+            taken_at=cutoff
+        )
+
+    def take_all(self, cutoff=None):
+        """Prend un instantané de chaque compte ayant de nouvelles écritures"""
+        from api.models import LedgerEntry, Group, User  # Import local pour éviter la circularité
+
+        cutoff = cutoff or self.default_cutoff()
+        snapshots = []
+
+        # Seules les écritures apparues depuis le passage précédent sont parcourues
+        recent_entries = LedgerEntry.objects.filter(created_at__lte=cutoff)
+        last_run = self.aggregate(last=Max('taken_at'))['last']
+        if last_run:
+            recent_entries = recent_entries.filter(created_at__gt=last_run)
+
+        # Comptes touchés: groupes, utilisateurs (personnel et total) et membres de groupe
+        recent_entries = recent_entries.order_by()
+        member_pairs = list(recent_entries.filter(
+            group__isnull=False
+        ).values_list('user_id', 'group_id').distinct())
+        groups = Group.objects.in_bulk({group_id for _, group_id in member_pairs})
+        users = User.objects.in_bulk(list(recent_entries.values_list('user_id', flat=True).distinct()))
+
+        accounts = [{'group': group} for group in groups.values()]
+        accounts += [
+            {'user': users[user_id], 'group': groups[group_id]} for user_id, group_id in member_pairs
+        ]
+        for user in users.values():
+            accounts += [{'user': user}, {'user': user, 'all_groups': True}]
+
+        for account in accounts:
+            snapshot = self.take(cutoff=cutoff, **account)
+            if snapshot:
+                snapshots.append(snapshot)
+
+        return snapshots
+
+    def default_cutoff(self):
+        """Date limite par défaut: maintenant moins le délai de stabilisation"""
+        lag = getattr(settings, 'LEDGER_SNAPSHOT_LAG', timezone.timedelta(minutes=5))
+        return timezone.now() - lag
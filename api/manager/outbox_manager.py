@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import models, transaction as db_transaction
+from django.utils import timezone
+
+
+class OutboxEmailManager(models.Manager):
+    """Manager pour la file d'envoi des emails"""
+
+    def enqueue(self, subject, body, to, from_email=None):
+        """Ajoute un email à la file (une insertion, aucun accès SMTP)"""
+        return self.create(
+            subject=subject,
+            body=body,
+            to=list(to),
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        )
+
+    def due(self, now=None):
+        """Emails en attente dont la prochaine tentative est échue"""
+        return self.filter(status='pending', next_attempt_at__lte=now or timezone.now())
+
+    def retry_delay(self, attempts):
+        """Délai avant la tentative suivante: exponentiel, plafonné à EMAIL_OUTBOX_MAX_RETRY_DELAY"""
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+        return timezone.timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+    def claim(self, batch_size):
+        """
+        Réserve un lot d'emails échus et valide la réservation aussitôt.
+
+        Les lignes sont verrouillées (skip_locked) le temps d'une courte transaction
+        qui repousse leur prochaine tentative de EMAIL_OUTBOX_CLAIM_TIMEOUT secondes:
+        les autres dispatchers ne les voient plus échues. Si le dispatcher s'arrête
+        pendant l'envoi, les emails redeviennent échus à la fin de ce délai.
+        """
+        lease = timezone.now() + timezone.timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+        with db_transaction.atomic():
+            emails = list(
+                self.due().select_for_update(skip_locked=True).order_by('next_attempt_at', 'id')[:batch_size]
+            )
+            if emails:
+                self.filter(pk__in=[email.pk for email in emails]).update(next_attempt_at=lease)
+
+        for email in emails:
+            email.next_attempt_at = lease
+        return emails
+
+    def dispatch(self, batch_size=None, connection=None):
+        """
+        Envoie un lot d'emails échus sur une seule connexion SMTP.
+
+        Le lot est réservé (claim) puis envoyé hors transaction: un serveur SMTP lent
+        ne garde ni verrou ni transaction ouverte. Les résultats sont enregistrés en
+        une requête à la fin du lot. Un échec reporte l'email (backoff exponentiel)
+        jusqu'à EMAIL_OUTBOX_MAX_ATTEMPTS, puis le marque `failed`. Le corps d'un email
+        envoyé ou abandonné est effacé: il peut contenir un code de réinitialisation.
+        Retourne (envoyés, échecs).
+        """
+        batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        sent = failed = 0
+
+        emails = self.claim(batch_size)
+        if not emails:
+            return sent, failed
+
+        connection = connection or get_connection(fail_silently=False)
+        try:
+            # Ouverte une fois pour tout le lot (sinon chaque envoi ouvre sa connexion)
+            connection.open()
+        except Exception as exc:
+            for email in emails:
+                self._record_failure(email, exc)
+            failed = len(emails)
+        else:
+            try:
+                for email in emails:
+                    message = EmailMessage(
+                        email.subject, email.body, email.from_email, email.to, connection=connection
+                    )
+                    try:
+                        message.send()
+                    except Exception as exc:
+                        failed += 1
+                        self._record_failure(email, exc)
+                    else:
+                        sent += 1
+                        email.attempts += 1
+                        email.status = 'sent'
+                        email.sent_at = timezone.now()
+                        email.last_error = ''
+                        email.body = ''
+            finally:
+                connection.close()
+
+        self.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body'])
+        return sent, failed
+
+    def _record_failure(self, email, exc):
+        """Reporte l'email après un échec, ou l'abandonne après EMAIL_OUTBOX_MAX_ATTEMPTS"""
+        email.attempts += 1
+        email.last_error = f'{type(exc).__name__}: {exc}'
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = 'failed'
+            email.body = ''
+        else:
+            email.next_attempt_at = timezone.now() + self.retry_delay(email.attempts)
+
+    def purge_sent(self, older_than=None):
+        """Supprime les emails envoyés ou abandonnés avant `older_than` (défaut: EMAIL_OUTBOX_RETENTION)"""
+        older_than = older_than or timezone.now() - settings.EMAIL_OUTBOX_RETENTION
+        deleted, _ = self.filter(
+            models.Q(status='sent', sent_at__lt=older_than) | models.Q(status='failed', created_at__lt=older_than)
+        ).delete()
+        return deleted
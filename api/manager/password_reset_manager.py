@@ -0,0 +1,61 @@
+import secrets
+import string
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+# Alphabet des codes: lettres majuscules et chiffres (36^6 combinaisons)
+RESET_CODE_ALPHABET = string.ascii_uppercase + string.digits
+RESET_CODE_LENGTH = 6
+
+
+def generate_reset_code():
+    """Génère un code aléatoire (secrets) sans aucune requête"""
+    return ''.join(secrets.choice(RESET_CODE_ALPHABET) for _ in range(RESET_CODE_LENGTH))
+
+
+class PasswordResetCodeManager(models.Manager):
+    """
+    Manager pour les codes de réinitialisation.
+
+    Un utilisateur a au plus un code (contrainte unique sur `user`) et un code
+    n'est jamais cherché sans son utilisateur: deux utilisateurs peuvent tirer le
+    même code sans collision, la génération n'a donc pas besoin de vérifier
+    l'unicité en base.
+    """
+
+    def issue(self, user, ttl=None):
+        """Crée ou remplace le code de l'utilisateur (une seule écriture)"""
+        now = timezone.now()
+        reset_code, _ = self.update_or_create(
+            user=user,
+            defaults={
+                'code': generate_reset_code(),
+                'created_at': now,
+                'expires_at': now + (ttl or settings.PASSWORD_RESET_CODE_TTL),
+                'is_used': False,
+            }
+        )
+        return reset_code
+
+    def valid(self, now=None):
+        """Codes non utilisés et non expirés"""
+        return self.filter(is_used=False, expires_at__gt=now or timezone.now())
+
+    def find_valid(self, user, code):
+        """Retourne le code valide de l'utilisateur s'il correspond, sinon None"""
+        if not code:
+            return None
+        return self.valid().filter(user=user, code=code.upper()).first()
+
+    def consume(self, user):
+        """Supprime le code de l'utilisateur une fois le mot de passe changé"""
+        self.filter(user=user).delete()
+
+    def purge_expired(self, now=None):
+        """Supprime les codes expirés ou déjà utilisés. Retourne le nombre de lignes supprimées"""
+        now = now or timezone.now()
+        deleted, _ = self.filter(models.Q(expires_at__lte=now) | models.Q(is_used=True)).delete()
+        return deleted
@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+# Variation d'un agrégat mensuel (montant et nombre de transactions)
+RollupChange = namedtuple('RollupChange', ['user_id', 'group_id', 'category_id', 'month', 'type', 'amount', 'count'])
+
+
+class MonthlyRollupManager(models.Manager):
+    """Manager pour les agrégats mensuels de transactions"""
+
+    def month_of(self, date):
+        """Retourne le premier jour du mois d'une date (dans le fuseau courant)"""
+        date = models.DateTimeField().to_python(date)
+        if timezone.is_aware(date):
+            date = timezone.localtime(date)
+        return date.date().replace(day=1)
+
+    def change_for(self, user_id, group_id, category_id, date, transaction_type, amount, count=1):
+        """Construit la variation d'agrégat produite par une transaction"""
+        return RollupChange(
+            user_id, group_id, category_id, self.month_of(date), transaction_type, amount, count
+        )
+
+    def apply_changes(self, changes):
+        """
+        Applique des variations cumulées par clé (utilisateur, groupe, catégorie, mois, type).
+
+        Chaque clé reçoit un UPDATE ... SET total = total + delta; la ligne n'est créée
+        que si elle n'existe pas encore. Les lectures sommant toujours les lignes,
+        un doublon créé par deux écrivains concurrents reste sans effet sur les totaux.
+        """
+        totals = {}
+        for change in changes:
+            key = change[:5]
+            amount, count = totals.get(key, (0, 0))
+            totals[key] = (amount + change.amount, count + change.count)
+
+        for (user_id, group_id, category_id, month, transaction_type), (amount, count) in sorted(
+            totals.items(), key=lambda item: str(item[0])
+        ):
+            if not amount and not count:
+                continue
+            key = {
+                'user_id': user_id,
+                'group_id': group_id,
+                'category_id': category_id,
+                'month': month,
+                'type': transaction_type,
+            }
+            updated = self.filter(**key).update(
+                total_amount=F('total_amount') + amount,
+                transaction_count=F('transaction_count') + count
+            )
+            if not updated:
+                self.create(total_amount=amount, transaction_count=count, **key)
+
+    def user_rollups(self, user):
+        """Retourne les agrégats des transactions d'un utilisateur"""
+        return self.filter(user=user)
+
+    def group_rollups(self, group):
+        """Retourne les agrégats des transactions d'un groupe"""
+        return self.filter(group=group)
@@ -0,0 +1,179 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+
+
+# Attribut de l'utilisateur qui mémorise sa carte {group_id: role} le temps de la requête
+MEMBERSHIP_ATTR = '_membership_roles'
+
+# Alias du cache (CACHES) qui conserve les cartes d'une requête à l'autre
+MEMBERSHIP_CACHE_ALIAS = 'membership'
+
+
+class CacheStats:
+    """Compteurs d'un cache (propres au processus, sans aller-retour réseau)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def incr(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+stats = CacheStats()
+
+
+def membership_cache():
+    return caches[MEMBERSHIP_CACHE_ALIAS]
+
+
+def membership_cache_key(user_id):
+    return f'roles:{user_id}'
+
+
+def group_members_cache_key(group_id):
+    return f'members:{group_id}'
+
+
+def membership_cache_enabled():
+    """Le cache partagé est désactivé si l'alias n'existe pas ou si son TIMEOUT vaut 0"""
+    config = settings.CACHES.get(MEMBERSHIP_CACHE_ALIAS)
+    return bool(config) and config.get('TIMEOUT', 300) != 0
+
+
+def load_membership_roles(user_id):
+    """Lit la carte {group_id: role} d'un utilisateur, depuis le cache partagé si possible"""
+    from api.models import Member  # Import local pour éviter la circularité
+
+    if not membership_cache_enabled():
+        return dict(Member.objects.filter(user_id=user_id).values_list('group_id', 'role'))
+
+    cache = membership_cache()
+    roles = cache.get(membership_cache_key(user_id))
+    if roles is not None:
+        stats.incr('hits')
+        return roles
+
+    stats.incr('misses')
+    roles = dict(Member.objects.filter(user_id=user_id).values_list('group_id', 'role'))
+    cache.set(membership_cache_key(user_id), roles)
+    return roles
+
+
+def membership_roles(user):
+    """
+    Retourne la carte {group_id: role} des adhésions de l'utilisateur.
+
+    La carte est lue dans le cache partagé (ou en une requête) puis mémorisée sur
+    l'instance: les permissions, les vues et Group.is_user_member/is_user_admin
+    d'une même requête (qui partagent request.user) ne la relisent plus.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return {}
+    roles = user.__dict__.get(MEMBERSHIP_ATTR)
+    if roles is None:
+        roles = load_membership_roles(user.pk)
+        user.__dict__[MEMBERSHIP_ATTR] = roles
+    return roles
+
+
+def group_role(user, group_id):
+    """Retourne le rôle de l'utilisateur dans le groupe, ou None s'il n'en est pas membre"""
+    if group_id is None:
+        return None
+    return membership_roles(user).get(group_id)
+
+
+def group_members(group_ids):
+    """
+    Retourne {group_id: {user_id, ...}} pour les groupes donnés, depuis le cache des
+    adhésions si possible: les groupes absents du cache sont lus en une requête.
+    Utilisé à chaque écriture de transaction de groupe (tableaux de bord des membres).
+    """
+    from api.models import Member  # Import local pour éviter la circularité
+
+    group_ids = {group_id for group_id in group_ids if group_id is not None}
+    if not group_ids:
+        return {}
+
+    members = {}
+    if membership_cache_enabled():
+        cached = membership_cache().get_many([group_members_cache_key(group_id) for group_id in group_ids])
+        for group_id in group_ids:
+            user_ids = cached.get(group_members_cache_key(group_id))
+            if user_ids is not None:
+                members[group_id] = user_ids
+        if members:
+            stats.incr('hits')
+
+    missing = group_ids - set(members)
+    if missing:
+        loaded = {group_id: set() for group_id in missing}
+        for group_id, user_id in Member.objects.filter(group_id__in=missing).values_list('group_id', 'user_id'):
+            loaded[group_id].add(user_id)
+        if membership_cache_enabled():
+            stats.incr('misses')
+            membership_cache().set_many(
+                {group_members_cache_key(group_id): user_ids for group_id, user_ids in loaded.items()}
+            )
+        members.update(loaded)
+    return members
+
+
+def forget_memberships(user_id, user=None):
+    """
+    Oublie la carte d'un utilisateur après modification de l'une de ses adhésions.
+
+    L'entrée est supprimée tout de suite puis à nouveau après le commit: une lecture
+    concurrente faite avant le commit ne peut pas laisser une carte périmée en cache.
+    """
+    if user is not None:
+        user.__dict__.pop(MEMBERSHIP_ATTR, None)
+    if not membership_cache_enabled():
+        return
+
+    stats.incr('invalidations')
+    key = membership_cache_key(user_id)
+    membership_cache().delete(key)
+    db_transaction.on_commit(lambda: membership_cache().delete(key))
+
+
+def forget_group_members(group_id):
+    """Oublie la liste des membres d'un groupe (tout de suite puis après le commit)"""
+    if not membership_cache_enabled():
+        return
+
+    key = group_members_cache_key(group_id)
+    membership_cache().delete(key)
+    db_transaction.on_commit(lambda: membership_cache().delete(key))
+
+
+def membership_cache_stats():
+    """Retourne les compteurs et la configuration du cache des adhésions"""
+    config = settings.CACHES.get(MEMBERSHIP_CACHE_ALIAS, {})
+    return {
+        'enabled': membership_cache_enabled(),
+        'backend': config.get('BACKEND'),
+        'timeout': config.get('TIMEOUT', 300),
+        **stats.as_dict(),
+    }
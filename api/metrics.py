@@ -0,0 +1,155 @@
+import bisect
+import functools
+import threading
+import time
+
+
+# Bornes (secondes) des histogrammes de durée
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Bornes du nombre de requêtes SQL par requête HTTP
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+def format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(labelnames, values)
+    )
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """Métrique en mémoire du processus, protégée par un verrou (écritures O(1))"""
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def label_values(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            values = dict(self._values)
+        for key in sorted(values):
+            lines.extend(self.render_sample(key, values[key]))
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render_sample(self, key, value):
+        return [f'{self.name}{format_labels(self.labelnames, key)} {value}']
+
+
+class Histogram(Metric):
+    """Histogramme cumulatif au format Prometheus (_bucket, _sum, _count)"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Comptes par intervalle (+Inf en dernier), somme des observations
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render_sample(self, key, state):
+        counts, total = state
+        labelnames = self.labelnames + ('le',)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{format_labels(labelnames, key + (bound,))} {cumulative}')
+        lines.append(f'{self.name}_sum{format_labels(self.labelnames, key)} {total}')
+        lines.append(f'{self.name}_count{format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds', 'Durée des requêtes HTTP par route', ('route', 'method')
+)
+REQUESTS = Counter(
+    'api_requests_total', 'Requêtes HTTP par route et statut', ('route', 'method', 'status')
+)
+REQUEST_QUERIES = Histogram(
+    'api_request_db_queries', 'Requêtes SQL exécutées par requête HTTP', ('route',), buckets=QUERY_COUNT_BUCKETS
+)
+BALANCE_UPDATE_LATENCY = Histogram(
+    'api_balance_update_duration_seconds', 'Durée des mises à jour de solde (grand livre + soldes)'
+)
+
+REGISTRY = [REQUEST_LATENCY, REQUESTS, REQUEST_QUERIES, BALANCE_UPDATE_LATENCY]
+
+
+def timed(histogram):
+    """Décorateur: observe la durée de chaque appel dans `histogram`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def render_cache_metrics():
+    """Compteurs des caches applicatifs (lus au moment de l'export)"""
+    from api import membership, token_blacklist  # Import local pour éviter la circularité
+
+    caches = {'membership': membership.stats, 'token_blacklist': token_blacklist.stats}
+    lines = [
+        '# HELP api_cache_requests_total Lectures des caches applicatifs par résultat',
+        '# TYPE api_cache_requests_total counter',
+    ]
+    ratios = []
+    for cache, stats in caches.items():
+        values = stats.as_dict()
+        for result in ('hits', 'misses'):
+            lines.append(f'api_cache_requests_total{{cache="{cache}",result="{result}"}} {values[result]}')
+        if values['hit_ratio'] is not None:
+            ratios.append(f'api_cache_hit_ratio{{cache="{cache}"}} {values["hit_ratio"]}')
+    lines += [
+        '# HELP api_cache_hit_ratio Part des lectures servies par le cache',
+        '# TYPE api_cache_hit_ratio gauge',
+        *ratios,
+    ]
+    return lines
+
+
+def render():
+    """Toutes les métriques au format texte Prometheus (version 0.0.4)"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(render_cache_metrics())
+    return '\n'.join(lines) + '\n'
+
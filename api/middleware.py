@@ -0,0 +1,182 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api.metrics import REQUEST_LATENCY, REQUEST_QUERIES, REQUESTS
+from api.routers import pin_to_primary
+
+
+logger = logging.getLogger('api.sql')
+
+# Listes de paramètres de longueur variable: IN (%s, %s, ...) -> IN (%s...)
+PLACEHOLDER_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Forme normalisée d'une requête: les paramètres sont déjà séparés par Django"""
+    return WHITESPACE_RE.sub(' ', PLACEHOLDER_LIST_RE.sub('(%s...)', sql)).strip()
+
+
+def view_label(view_func, method):
+    """Nom lisible de la vue: `GroupViewSet.my_groups`, `PasswordResetView.post`, `user_dashboard`"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+    if getattr(view_func, '__name__', cls.__name__) != cls.__name__:
+        # @api_view: la classe générée porte le nom de la fonction
+        return view_func.__name__
+    return f'{cls.__name__}.{method.lower()}'
+
+
+class QueryProfile:
+    """Requêtes exécutées pendant une requête HTTP (nombre, durée, empreintes)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.fingerprints[fingerprint(sql)] += 1
+            if elapsed * 1000 >= settings.SQL_PROFILING_SLOW_QUERY_MS:
+                self.slow.append((elapsed, sql))
+
+    def duplicates(self, threshold):
+        """Empreintes répétées au moins `threshold` fois (motif N+1 probable)"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+class SQLProfilingMiddleware:
+    """
+    Profil SQL par requête, activé par SQL_PROFILING (sans DEBUG=True).
+
+    Chaque requête SQL passe par un execute_wrapper qui mesure sa durée et
+    compte son empreinte. La réponse reçoit un en-tête Server-Timing (nombre de
+    requêtes, temps base de données); les requêtes lentes et les empreintes
+    répétées (N+1) sont journalisées avec le nom de la vue.
+
+    Les requêtes exécutées pendant l'itération d'une réponse en streaming
+    (exports) ne sont pas comptées.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = QueryProfile()
+        request.sql_profile = profile
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+
+        self.report(request, response, profile)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.sql_profile_view = view_label(view_func, request.method)
+
+    def report(self, request, response, profile):
+        duration_ms = profile.duration * 1000
+        timing = f'db;dur={duration_ms:.1f};desc="{profile.count} queries"'
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+
+        view = getattr(request, 'sql_profile_view', request.path)
+        extra = {'view': view, 'path': request.path, 'queries': profile.count, 'db_ms': round(duration_ms, 1)}
+        logger.debug('%s: %d queries, %.1f ms', view, profile.count, duration_ms, extra=extra)
+
+        for sql, count in profile.duplicates(settings.SQL_PROFILING_DUPLICATE_THRESHOLD):
+            logger.warning(
+                'N+1 suspected in %s: %d x %s', view, count, sql,
+                extra={**extra, 'fingerprint': sql, 'repeats': count}
+            )
+        for elapsed, sql in profile.slow:
+            logger.warning(
+                'Slow query in %s (%.1f ms): %s', view, elapsed * 1000, sql,
+                extra={**extra, 'slow_sql': sql, 'sql_ms': round(elapsed * 1000, 1)}
+            )
+
+
+class MetricsMiddleware:
+    """
+    Alimente les métriques exposées sur /metrics: durée et statut par route (nom
+    d'URL du routeur, ex. `group-list`) et nombre de requêtes SQL par requête.
+    Les requêtes sans route résolue sont regroupées sous `unmatched` pour borner
+    le nombre de séries. Désactivé avec METRICS_ENABLED=False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        REQUEST_LATENCY.observe(elapsed, route=route, method=request.method)
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        REQUEST_QUERIES.observe(queries, route=route)
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Après une écriture réussie d'un utilisateur authentifié (POST, PUT, PATCH,
+    DELETE), ses lectures @replica_read restent sur le primaire quelques secondes.
+    Sans réplica configuré, le middleware est retiré de la chaîne.
+
+    request.user est celui authentifié par DRF (JWT compris): DRF le recopie sur
+    la requête Django.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'DATABASE_REPLICA_ALIAS', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (
+            request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+            and response.status_code < 400
+            and getattr(user, 'is_authenticated', False)
+        ):
+            pin_to_primary(user.pk)
+        return response
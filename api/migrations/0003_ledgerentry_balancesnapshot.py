@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    """Inscrit chaque transaction existante au grand livre"""
+    Transaction = apps.get_model('api', 'Transaction')
+    LedgerEntry = apps.get_model('api', 'LedgerEntry')
+
+    entries = []
+    transactions = Transaction.objects.order_by('created_at', 'id').values(
+        'id', 'user_id', 'group_id', 'type', 'amount', 'created_at'
+    )
+    for transaction in transactions.iterator(chunk_size=2000):
+        amount = transaction['amount'] if transaction['type'] == 'income' else -transaction['amount']
+        entries.append(LedgerEntry(
+            transaction_id=transaction['id'],
+            user_id=transaction['user_id'],
+            group_id=transaction['group_id'],
+            amount=amount,
+            created_at=transaction['created_at']
+        ))
+        if len(entries) >= 2000:
+            LedgerEntry.objects.bulk_create(entries)
+            entries = []
+    LedgerEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_passwordresetcode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Balance')),
+                ('last_entry_id', models.BigIntegerField(verbose_name='Last Ledger Entry')),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Taken At')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='api.group', verbose_name='Group')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Balance Snapshot',
+                'verbose_name_plural': 'Balance Snapshots',
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['group', 'taken_at'], name='snapshot_group_taken_idx'), models.Index(fields=['user', 'taken_at'], name='snapshot_user_taken_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Amount')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Recorded At')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='api.group', verbose_name='Group')),
+                ('transaction', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='api.transaction', verbose_name='Transaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['group', 'id'], name='ledger_group_id_idx'), models.Index(fields=['user', 'group', 'id'], name='ledger_user_group_id_idx'), models.Index(fields=['created_at'], name='ledger_created_at_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
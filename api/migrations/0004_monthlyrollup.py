@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    """Construit les agrégats mensuels à partir des transactions existantes"""
+    Transaction = apps.get_model('api', 'Transaction')
+    MonthlyRollup = apps.get_model('api', 'MonthlyRollup')
+
+    totals = Transaction.objects.annotate(
+        month=TruncMonth('date', output_field=models.DateField())
+    ).values('user_id', 'group_id', 'category_id', 'month', 'type').annotate(
+        total_amount=Sum('amount'),
+        transaction_count=Count('id')
+    ).order_by()
+
+    MonthlyRollup.objects.bulk_create(
+        (MonthlyRollup(**row) for row in totals.iterator(chunk_size=2000)),
+        batch_size=2000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_ledgerentry_balancesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Month')),
+                ('type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=20, verbose_name='Type')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total Amount')),
+                ('transaction_count', models.IntegerField(default=0, verbose_name='Transaction Count')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monthly_rollups', to='api.category', verbose_name='Category')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='api.group', verbose_name='Group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Monthly Rollup',
+                'verbose_name_plural': 'Monthly Rollups',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['user', 'month'], name='rollup_user_month_idx'), models.Index(fields=['group', 'month'], name='rollup_group_month_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+
+def prefix_legacy_bcrypt(apps, schema_editor):
+    """
+    L'ancien hashPassword stockait le hachage bcrypt brut ("$2b$12$..."), que
+    check_password ne sait pas identifier. Le préfixe "bcrypt$" le rattache au
+    BCryptHasher; il sera recalculé avec le hasher par défaut à la connexion suivante.
+    """
+    User = apps.get_model('api', 'User')
+    User.objects.filter(password__startswith='$2').update(
+        password=Concat(Value('bcrypt$'), 'password')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_member_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(prefix_legacy_bcrypt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:42
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def keep_latest_code_per_user(apps, schema_editor):
+    """Ne garde que le code le plus récent de chaque utilisateur avant la contrainte unique"""
+    PasswordResetCode = apps.get_model('api', 'PasswordResetCode')
+    latest_ids = PasswordResetCode.objects.values('user').annotate(latest=Max('id')).values('latest')
+    PasswordResetCode.objects.exclude(id__in=list(latest_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='passwordresetcode',
+            name='code',
+            field=models.CharField(max_length=6),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetcode',
+            index=models.Index(fields=['code', 'is_used', 'expires_at'], name='reset_code_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetcode',
+            index=models.Index(fields=['expires_at'], name='reset_code_expires_idx'),
+        ),
+        migrations.RunPython(keep_latest_code_per_user, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='passwordresetcode',
+            constraint=models.UniqueConstraint(fields=('user',), name='reset_code_one_per_user'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:36
+
+from django.db import migrations, models
+
+
+def mark_group_snapshots(apps, schema_editor):
+    """Les instantanés existants avec un groupe sont ceux du compte du groupe"""
+    BalanceSnapshot = apps.get_model('api', 'BalanceSnapshot')
+    BalanceSnapshot.objects.filter(group__isnull=False).update(account='group')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_tokenclaimsuser'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='balancesnapshot',
+            name='account',
+            field=models.CharField(choices=[('group', 'Group'), ('member', 'Member in group'), ('user', 'User, all groups'), ('personal', 'Personal')], default='personal', max_length=10, verbose_name='Account'),
+        ),
+        migrations.RunPython(mark_group_snapshots, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['user', 'id'], name='ledger_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_balancesnapshot_account'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='passwordresetcode',
+            name='reset_code_lookup_idx',
+        ),
+    ]
@@ -1,6 +1,9 @@
-from .user import User
+from .user import User, TokenClaimsUser
 from .group import Group
 from .member import Member
 from .transaction import Transaction
 from .category import Category
 from .password_reset import PasswordResetCode
+from .ledger import LedgerEntry, BalanceSnapshot
+from .rollup import MonthlyRollup
+from .outbox import OutboxEmail
@@ -24,6 +24,10 @@ class Category(models.Model):
         verbose_name = _("Category")
         verbose_name_plural = _("Categories")
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['user', 'type'], name='category_user_type_idx'),
+            models.Index(fields=['group', 'type'], name='category_group_type_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name} ({self.get_type_display()})'
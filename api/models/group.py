@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from api.manager.group_manager import GroupManager
+from api.membership import group_role
 
 class Group(models.Model):
     name = models.CharField(max_length=200, verbose_name=_("Group Name"))
@@ -31,17 +32,14 @@ class Group(models.Model):
         return self.members.filter(role='admin').count()
     
     def is_user_member(self, user):
-        """Vérifie si un utilisateur est membre du groupe"""
-        return self.members.filter(user=user).exists()
+        """Vérifie si un utilisateur est membre du groupe (carte des adhésions de la requête)"""
+        return group_role(user, self.pk) is not None
     
     def is_user_admin(self, user):
-        """Vérifie si un utilisateur est admin du groupe"""
-        return self.members.filter(user=user, role='admin').exists()
+        """Vérifie si un utilisateur est admin du groupe (carte des adhésions de la requête)"""
+        return group_role(user, self.pk) == 'admin'
     
-    def calculate_total_balance(self):
-        """Calcule le solde total du groupe"""
-        income = self.transactions.filter(type='income').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        expenses = self.transactions.filter(type='expense').aggregate(
-            total=models.Sum('amount'))['total'] or 0
-        return income - expenses
+    def calculate_total_balance(self, as_of=None):
+        """Calcule le solde total du groupe (dernier instantané + écritures postérieures)"""
+        from api.models import LedgerEntry  # Import local pour éviter la circularité
+        return LedgerEntry.objects.balance(group=self, as_of=as_of)
@@ -0,0 +1,83 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from .user import User
+from .group import Group
+from api.manager.ledger_manager import LedgerEntryManager, BalanceSnapshotManager
+
+
+class LedgerEntry(models.Model):
+    """
+    Écriture immuable du grand livre: chaque variation de solde produite par une
+    transaction (création, modification, suppression) ajoute une ligne signée.
+    Une écriture avec un groupe concerne le solde du groupe, sinon le solde personnel
+    de l'utilisateur.
+    """
+    # Pas de contrainte en base: l'écriture survit à la suppression de sa transaction
+    transaction = models.ForeignKey('api.Transaction', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='ledger_entries', verbose_name=_("Transaction"))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ledger_entries', verbose_name=_("User"))
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='ledger_entries', null=True, blank=True, verbose_name=_("Group"))
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_("Amount"))
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name=_("Recorded At"))
+
+    # Manager personnalisé
+    objects = LedgerEntryManager()
+
+    class Meta:
+        verbose_name = _("Ledger Entry")
+        verbose_name_plural = _("Ledger Entries")
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['group', 'id'], name='ledger_group_id_idx'),
+            models.Index(fields=['user', 'group', 'id'], name='ledger_user_group_id_idx'),
+            # Écritures d'un utilisateur tous groupes confondus (compte `user`)
+            models.Index(fields=['user', 'id'], name='ledger_user_id_idx'),
+            models.Index(fields=['created_at'], name='ledger_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.amount} XOF ({self.created_at:%Y-%m-%d %H:%M})'
+
+    def save(self, *args, **kwargs):
+        """Les écritures sont en ajout seul"""
+        if not self._state.adding:
+            raise ValueError("Ledger entries are immutable")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries are immutable")
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Solde figé d'un compte couvrant toutes ses écritures jusqu'à `last_entry_id` inclus.
+    `account` indique lesquelles (voir ledger_manager._account).
+    """
+    ACCOUNT_CHOICES = [
+        ('group', _('Group')),
+        ('member', _('Member in group')),
+        ('user', _('User, all groups')),
+        ('personal', _('Personal')),
+    ]
+
+    account = models.CharField(max_length=10, choices=ACCOUNT_CHOICES, default='personal', verbose_name=_("Account"))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='balance_snapshots', null=True, blank=True, verbose_name=_("User"))
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='balance_snapshots', null=True, blank=True, verbose_name=_("Group"))
+    balance = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_("Balance"))
+    last_entry_id = models.BigIntegerField(verbose_name=_("Last Ledger Entry"))
+    taken_at = models.DateTimeField(default=timezone.now, verbose_name=_("Taken At"))
+
+    # Manager personnalisé
+    objects = BalanceSnapshotManager()
+
+    class Meta:
+        verbose_name = _("Balance Snapshot")
+        verbose_name_plural = _("Balance Snapshots")
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['group', 'taken_at'], name='snapshot_group_taken_idx'),
+            models.Index(fields=['user', 'taken_at'], name='snapshot_user_taken_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.balance} XOF @ {self.taken_at:%Y-%m-%d %H:%M}'
@@ -17,6 +17,7 @@ class Member(models.Model):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='member', verbose_name=_("Role"))
     amount_perso = models.DecimalField(max_digits=12, decimal_places=2, default=0.00, verbose_name=_("Personal Amount"))
     date_join = models.DateTimeField(auto_now_add=True, verbose_name=_("Join Date"))
+    updated_at = models.DateTimeField(auto_now=True)
 
     # Manager personnalisé
     objects = MemberManager()
@@ -26,6 +27,9 @@ class Member(models.Model):
         verbose_name_plural = _("Members")
         unique_together = ['user', 'group']
         ordering = ['-date_join']
+        indexes = [
+            models.Index(fields=['group', 'role'], name='member_group_role_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name} - {self.group.name} ({self.role})'
@@ -42,5 +46,4 @@ class Member(models.Model):
     
     def calculate_contributions(self):
         """Calcule les contributions totales du membre au groupe"""
-        return self.user.transactions.filter(group=self.group).aggregate(
-            total=models.Sum('amount'))['total'] or 0
+        return self.user.transactions.filter(group=self.group).aggregate_bundle()['total_amount']
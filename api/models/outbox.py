@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from api.manager.outbox_manager import OutboxEmailManager
+
+
+class OutboxEmail(models.Model):
+    """
+    Email en attente d'envoi. Les vues n'envoient plus rien elles-mêmes: elles
+    ajoutent une ligne ici (dans leur transaction) et la commande dispatch_emails
+    l'envoie en arrière-plan, par lots et avec reprise en cas d'échec.
+    """
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('sent', _('Sent')),
+        ('failed', _('Failed')),
+    ]
+
+    subject = models.CharField(max_length=255, verbose_name=_("Subject"))
+    body = models.TextField(verbose_name=_("Body"))
+    from_email = models.CharField(max_length=255, verbose_name=_("From"))
+    to = models.JSONField(default=list, verbose_name=_("Recipients"))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name=_("Status"))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Attempts"))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_("Next Attempt At"))
+    last_error = models.TextField(blank=True, default='', verbose_name=_("Last Error"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Sent At"))
+
+    # Manager personnalisé
+    objects = OutboxEmailManager()
+
+    class Meta:
+        verbose_name = _("Outbox Email")
+        verbose_name_plural = _("Outbox Emails")
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.to)} ({self.status})'
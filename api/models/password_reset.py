@@ -1,8 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-import random
-import string
+from api.manager.password_reset_manager import PasswordResetCodeManager, generate_reset_code
 
 
 class PasswordResetCode(models.Model):
@@ -14,30 +13,34 @@ class PasswordResetCode(models.Model):
         on_delete=models.CASCADE,
         related_name='password_reset_codes'
     )
-    code = models.CharField(max_length=6, unique=True)
+    code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
-    
+
+    # Manager personnalisé
+    objects = PasswordResetCodeManager()
+
     class Meta:
         verbose_name = "Code de réinitialisation"
         verbose_name_plural = "Codes de réinitialisation"
-        
+        constraints = [
+            # Un seul code par utilisateur: le code est toujours cherché avec son utilisateur,
+            # l'index de la contrainte sert donc toutes les recherches (find_valid, consume, issue)
+            models.UniqueConstraint(fields=['user'], name='reset_code_one_per_user'),
+        ]
+        indexes = [
+            # Purge des codes expirés
+            models.Index(fields=['expires_at'], name='reset_code_expires_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.code:
-            self.code = self.generate_code()
+            self.code = generate_reset_code()
         if not self.expires_at:
-            # Le code expire après 15 minutes
-            self.expires_at = timezone.now() + timezone.timedelta(minutes=15)
+            self.expires_at = timezone.now() + settings.PASSWORD_RESET_CODE_TTL
         super().save(*args, **kwargs)
-    
-    def generate_code(self):
-        """Génère un code à 6 caracteres unique"""
-        while True:
-            code = ''.join(random.choices(string.digits, k=6))
-            if not PasswordResetCode.objects.filter(code=code, is_used=False).exists():
-                return code
-    
+
     def is_expired(self):
         """Vérifie si le code a expiré"""
         return timezone.now() > self.expires_at
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from .user import User
+from .group import Group
+from .category import Category
+from api.manager.rollup_manager import MonthlyRollupManager
+
+
+class MonthlyRollup(models.Model):
+    """
+    Agrégat mensuel des transactions par utilisateur, groupe, catégorie et type,
+    tenu à jour à chaque écriture de transaction.
+    """
+    TYPE_CHOICES = [
+        ('income', _('Income')),
+        ('expense', _('Expense')),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_rollups', verbose_name=_("User"))
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='monthly_rollups', null=True, blank=True, verbose_name=_("Group"))
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, related_name='monthly_rollups', null=True, blank=True, verbose_name=_("Category"))
+    month = models.DateField(verbose_name=_("Month"))
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES, verbose_name=_("Type"))
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name=_("Total Amount"))
+    transaction_count = models.IntegerField(default=0, verbose_name=_("Transaction Count"))
+
+    # Manager personnalisé
+    objects = MonthlyRollupManager()
+
+    class Meta:
+        verbose_name = _("Monthly Rollup")
+        verbose_name_plural = _("Monthly Rollups")
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['user', 'month'], name='rollup_user_month_idx'),
+            models.Index(fields=['group', 'month'], name='rollup_group_month_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.month:%Y-%m} - {self.total_amount} XOF ({self.get_type_display()})'
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.utils.translation import gettext_lazy as _
 from .user import User
 from .group import Group
 from .category import Category
+from .rollup import MonthlyRollup
 from api.manager.group_manager import TransactionManager
+from api.balance import BalanceChange, apply_balance_changes, signed_amount
+from api.dashboard import bump_dashboard_versions, group_member_ids
 
 class Transaction(models.Model):
     TYPE_CHOICES = [
@@ -29,88 +32,123 @@ class Transaction(models.Model):
         verbose_name = _("Transaction")
         verbose_name_plural = _("Transactions")
         ordering = ['-date']
+        indexes = [
+            # (date, id) suit aussi l'ordre de la pagination par curseur
+            models.Index(fields=['user', 'date', 'id'], name='txn_user_date_idx'),
+            models.Index(fields=['group', 'date', 'id'], name='txn_group_date_idx'),
+            models.Index(fields=['user', 'type'], name='txn_user_type_idx'),
+            models.Index(fields=['group', 'type'], name='txn_group_type_idx'),
+            # Transactions personnelles (hors groupe)
+            models.Index(
+                fields=['user', 'date', 'id'],
+                name='txn_personal_date_idx',
+                condition=models.Q(group__isnull=True)
+            ),
+        ]
 
     def __str__(self):
         return f'{self.amount} XOF - {self.description} ({self.get_type_display()})'
     
     def save(self, *args, **kwargs):
         """Override save pour mettre à jour le solde du groupe ou de l'utilisateur"""
-        # Vérifier si c'est une mise à jour d'une transaction existante
-        is_update = self.pk is not None
-        old_transaction = None
-        
-        if is_update:
-            # Récupérer l'ancienne transaction pour pouvoir annuler son effet
-            old_transaction = Transaction.objects.get(pk=self.pk)
-        
-        # Sauvegarder la transaction
-        super().save(*args, **kwargs)
-        
-        # Mettre à jour le solde approprié (groupe ou utilisateur)
-        self._update_balance(old_transaction)
-    
+        with db_transaction.atomic():
+            old_transaction = None
+
+            if self.pk is not None:
+                # Verrouiller l'ancienne ligne et ne lire que les colonnes utiles au solde
+                old_transaction = Transaction.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values('amount', 'type', 'date', 'group_id', 'user_id', 'category_id').first()
+
+            # Sauvegarder la transaction
+            super().save(*args, **kwargs)
+
+            # Mettre à jour le solde approprié (groupe ou utilisateur) et les agrégats mensuels
+            self._update_balance(old_transaction)
+            self._update_rollups(old_transaction)
+            self._bump_dashboards(old_transaction)
+
     def delete(self, *args, **kwargs):
         """Override delete pour mettre à jour le solde du groupe ou de l'utilisateur"""
-        group = self.group
-        user = self.user
-        amount = self.amount
-        transaction_type = self.type
-        
-        # Supprimer la transaction
-        super().delete(*args, **kwargs)
-        
-        # Mettre à jour le solde en annulant l'effet de cette transaction
-        if group:
-            # Transaction de groupe - mettre à jour le solde du groupe
-            if transaction_type == 'income':
-                group.amount -= amount
-            else:  # expense
-                group.amount += amount
-            group.save()
-        else:
-            # Transaction personnelle - mettre à jour le solde de l'utilisateur
-            if transaction_type == 'income':
-                user.solde -= amount
-            else:  # expense
-                user.solde += amount
-            user.save()
-    
+        with db_transaction.atomic():
+            # Comme save(), contrepasser la ligne verrouillée et non l'instance (peut-être
+            # périmée). La clé primaire est perdue après suppression
+            pk = self.pk
+            current = Transaction.objects.select_for_update().filter(
+                pk=pk
+            ).values('amount', 'type', 'date', 'group_id', 'user_id', 'category_id').first()
+
+            # Supprimer la transaction puis annuler son effet sur le solde et les agrégats
+            result = super().delete(*args, **kwargs)
+            if current is None:
+                # Déjà supprimée (et contrepassée) par une requête concurrente
+                return result
+
+            # Écriture de contrepassation
+            apply_balance_changes([BalanceChange(
+                pk, current['user_id'], current['group_id'], -signed_amount(current['type'], current['amount'])
+            )])
+            MonthlyRollup.objects.apply_changes([MonthlyRollup.objects.change_for(
+                current['user_id'], current['group_id'], current['category_id'],
+                current['date'], current['type'], -current['amount'], count=-1
+            )])
+            self._bump_dashboards(current)
+
+        return result
+
     def _update_balance(self, old_transaction=None):
-        """Méthode privée pour mettre à jour le solde du groupe ou de l'utilisateur"""
-        
+        """
+        Méthode privée pour mettre à jour le solde du groupe ou de l'utilisateur.
+
+        `old_transaction` contient les valeurs de la ligne avant modification
+        (amount, type, group_id, user_id). L'ancienne version est contrepassée et
+        la nouvelle inscrite au grand livre; les soldes reçoivent un UPDATE par compte.
+        """
+        new_change = BalanceChange(
+            self.pk, self.user_id, self.group_id, signed_amount(self.type, self.amount)
+        )
+        changes = [new_change]
+
         # Si c'est une mise à jour, annuler l'effet de l'ancienne transaction
         if old_transaction:
-            if old_transaction.group:
-                # Ancienne transaction était pour un groupe
-                group = old_transaction.group
-                if old_transaction.type == 'income':
-                    group.amount -= old_transaction.amount
-                else:  # expense
-                    group.amount += old_transaction.amount
-                group.save()
-            else:
-                # Ancienne transaction était personnelle
-                user = old_transaction.user
-                if old_transaction.type == 'income':
-                    user.solde -= old_transaction.amount
-                else:  # expense
-                    user.solde += old_transaction.amount
-                user.save()
-        
-        # Appliquer l'effet de la nouvelle transaction
-        if self.group:
-            # Transaction de groupe - mettre à jour le solde du groupe
-            group = self.group
-            if self.type == 'income':
-                group.amount += self.amount
-            else:  # expense
-                group.amount -= self.amount
-            group.save()
-        else:
-            # Transaction personnelle - mettre à jour le solde de l'utilisateur
-            user = self.user
-            if self.type == 'income':
-                user.solde += self.amount
-            else:  # expense
-                user.solde -= self.amount
-            user.save()
+            old_change = BalanceChange(
+                self.pk,
+                old_transaction['user_id'],
+                old_transaction['group_id'],
+                signed_amount(old_transaction['type'], old_transaction['amount'])
+            )
+            if old_change == new_change:
+                # Rien ne change pour les soldes (ex: description modifiée)
+                return
+            changes.insert(0, old_change._replace(amount=-old_change.amount))
+
+        apply_balance_changes(changes)
+
+    def _update_rollups(self, old_transaction=None):
+        """Méthode privée pour tenir à jour les agrégats mensuels (MonthlyRollup)"""
+        changes = [MonthlyRollup.objects.change_for(
+            self.user_id, self.group_id, self.category_id, self.date, self.type, self.amount
+        )]
+
+        # Si c'est une mise à jour, retirer l'ancienne transaction de son agrégat
+        if old_transaction:
+            changes.append(MonthlyRollup.objects.change_for(
+                old_transaction['user_id'],
+                old_transaction['group_id'],
+                old_transaction['category_id'],
+                old_transaction['date'],
+                old_transaction['type'],
+                -old_transaction['amount'],
+                count=-1
+            ))
+
+        MonthlyRollup.objects.apply_changes(changes)
+
+    def _bump_dashboards(self, old_transaction=None):
+        """Méthode privée pour invalider les tableaux de bord de l'auteur et des membres du groupe"""
+        user_ids = {self.user_id}
+        group_ids = {self.group_id}
+        if old_transaction:
+            user_ids.add(old_transaction['user_id'])
+            group_ids.add(old_transaction['group_id'])
+        bump_dashboard_versions(user_ids | group_member_ids(group_ids))
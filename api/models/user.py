@@ -12,6 +12,7 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=150)
     last_name = models.CharField(max_length=150)
     solde = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # Fix for reverse accessor conflicts
     groups = models.ManyToManyField(
@@ -37,4 +38,42 @@ class User(AbstractUser):
     objects = CustomUserManager()
 
     def __str__(self):
-        return f'{self.email} - {self.first_name} {self.last_name}'
\ No newline at end of file
+        return f'{self.email} - {self.first_name} {self.last_name}'
+
+class TokenClaimsUser(User):
+    """
+    Utilisateur reconstruit à partir des claims d'un token JWT, sans requête.
+
+    Seuls les champs d'identité présents dans le token sont chargés; les autres,
+    dont is_active/is_staff/is_superuser, sont différés et lus depuis la base.
+    Le premier accès à un champ différé charge tous les champs manquants en une
+    seule requête (au lieu d'une requête par champ).
+    """
+
+    # Champs de l'utilisateur repris tels quels dans le token (voir CustomTokenObtainPairSerializer).
+    # Jamais de droits ici: un token émis avant une rétrogradation resterait valide.
+    CLAIM_FIELDS = ('email', 'first_name', 'last_name')
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        loaded = {'id': cls._meta.pk.to_python(user_id)}
+        loaded.update({field: claims[field] for field in cls.CLAIM_FIELDS if field in claims})
+        return cls.from_db(None, list(loaded), list(loaded.values()))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        from rest_framework.exceptions import AuthenticationFailed  # Import local: les modèles ne dépendent pas de DRF
+
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        try:
+            super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        except User.DoesNotExist:
+            # Token encore valide pour un utilisateur supprimé
+            raise AuthenticationFailed("User not found", code='user_not_found')
+        if 'is_active' not in self.get_deferred_fields() and not self.is_active:
+            # Compte désactivé depuis l'émission du token
+            raise AuthenticationFailed("User is inactive", code='user_inactive')
@@ -1,5 +1,11 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+import json
 import math
 
 
@@ -71,3 +77,164 @@ class SmallResultsSetPagination(PageNumberPagination):
             'previous': self.get_previous_link(),
             'results': data
         })
+
+
+class DateIdCursorPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur le couple (date, id).
+
+    Chaque page filtre sur la dernière clé vue au lieu d'un OFFSET et aucun COUNT(*)
+    n'est exécuté par défaut: la page 500 coûte autant que la première.
+    Le total peut être demandé avec `with_count=true` (exact) ou
+    `with_count=estimate` (estimation du planificateur PostgreSQL).
+
+    Le mode curseur est activé par le client avec le paramètre `cursor` (vide pour
+    la première page). Sans lui, ou si le tri porte sur un autre champ que la date,
+    la pagination par numéro de page (CustomPageNumberPagination) est utilisée:
+    les clients existants gardent le même format de réponse.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+    fallback_class = CustomPageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+
+        ordering = request.query_params.get('ordering')
+        if self.fallback_class and not self.cursor_requested(request):
+            # Curseur non demandé, ou tri sur un autre champ que la date
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        # Tri ascendant uniquement si explicitement demandé (?ordering=date)
+        self.ascending = ordering == 'date'
+        self.count = self.get_count(queryset, request)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+        # Une page « précédente » se lit dans le sens inverse puis est retournée
+        forward = self.ascending != reverse
+
+        if forward:
+            queryset = queryset.order_by('date', 'id')
+        else:
+            queryset = queryset.order_by('-date', '-id')
+
+        if cursor:
+            if forward:
+                position = Q(date__gt=cursor['date']) | Q(date=cursor['date'], id__gt=cursor['id'])
+            else:
+                position = Q(date__lt=cursor['date']) | Q(date=cursor['date'], id__lt=cursor['id'])
+            queryset = queryset.filter(position)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def cursor_requested(self, request):
+        """Le client a choisi le mode curseur (`?cursor=`) avec un tri compatible"""
+        return (
+            self.cursor_query_param in request.query_params
+            and request.query_params.get('ordering') in [None, '', 'date', '-date']
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_count(self, queryset, request):
+        """Retourne le total demandé: exact, estimé ou None (par défaut)"""
+        mode = request.query_params.get(self.count_query_param, '').lower()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        if mode in ['1', 'true']:
+            return queryset.count()
+        return None
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            cursor = {
+                'date': parse_datetime(data['d']),
+                'id': int(data['i']),
+                'reverse': bool(data.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound('Invalid cursor')
+        if cursor['date'] is None:
+            raise NotFound('Invalid cursor')
+        return cursor
+
+    def encode_cursor(self, item, reverse=False):
+        data = {'d': item.date.isoformat(), 'i': item.pk}
+        if reverse:
+            data['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        """Retourne le dictionnaire de pagination (utilisable dans une réponse composée)"""
+        if self.fallback:
+            return dict(self.fallback.get_paginated_response(data).data)
+        paginated = {
+            'page_size': self.page_size,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        }
+        if self.count is not None:
+            paginated['count'] = self.count
+        return paginated
+
+    def get_paginated_response(self, data):
+        if self.fallback:
+            return self.fallback.get_paginated_response(data)
+        return Response(self.get_paginated_data(data))
+
+
+def estimate_count(queryset):
+    """
+    Estime le nombre de lignes d'un queryset à partir du plan PostgreSQL
+    (sans parcourir la table). Les autres bases utilisent un COUNT exact.
+    """
+    from django.db import connections
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
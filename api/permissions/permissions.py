@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from api.membership import group_role
+
 
 class IsOwnerOrAdmin(permissions.BasePermission):
     """
@@ -39,11 +41,11 @@ class IsGroupMemberOrAdmin(permissions.BasePermission):
         
         # Pour les objets liés à un groupe, vérifier si l'utilisateur est membre
         if hasattr(obj, 'group'):
-            return obj.group.members.filter(user=request.user).exists()
+            return group_role(request.user, obj.group_id) is not None
         
         # Si l'objet est un groupe, vérifier si l'utilisateur est membre
         if hasattr(obj, 'members'):
-            return obj.members.filter(user=request.user).exists()
+            return group_role(request.user, obj.pk) is not None
             
         return False
 
@@ -62,11 +64,11 @@ class IsGroupAdminOrAdmin(permissions.BasePermission):
         
         # Pour les objets liés à un groupe, vérifier si l'utilisateur est admin du groupe
         if hasattr(obj, 'group'):
-            return obj.group.members.filter(user=request.user, role='admin').exists()
+            return group_role(request.user, obj.group_id) == 'admin'
         
         # Si l'objet est un groupe, vérifier si l'utilisateur est admin
         if hasattr(obj, 'members'):
-            return obj.members.filter(user=request.user, role='admin').exists()
+            return group_role(request.user, obj.pk) == 'admin'
             
         return False
 
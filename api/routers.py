@@ -0,0 +1,89 @@
+import functools
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Alias utilisé pour les lectures du bloc courant (None: routage par défaut, primaire)
+_read_alias = ContextVar('read_alias', default=None)
+
+# Alias du cache (CACHES) des utilisateurs épinglés au primaire. Il doit être partagé
+# entre les workers: l'écriture et la lecture suivante ne passent pas forcément par le
+# même processus
+REPLICA_PIN_CACHE_ALIAS = 'replica_pins'
+
+
+def pin_cache():
+    return caches[REPLICA_PIN_CACHE_ALIAS]
+
+
+def pin_key(user_id):
+    return f'replica:pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """
+    Après une écriture de l'utilisateur, ses lectures analytiques restent sur le
+    primaire pendant DB_REPLICA_STICKY_SECONDS (le réplica peut être en retard).
+    """
+    pin_cache().set(pin_key(user_id), True, timeout=settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return bool(pin_cache().get(pin_key(user_id)))
+
+
+def replica_alias_for(user):
+    """Alias du réplica à utiliser pour cet utilisateur, ou None (primaire)"""
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+    if not alias:
+        return None
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        # Dans une transaction ouverte, les lectures doivent voir ses propres écritures
+        return None
+    if getattr(user, 'is_authenticated', False) and is_pinned_to_primary(user.pk):
+        return None
+    return alias
+
+
+def replica_read(view_method):
+    """
+    Décorateur d'action en lecture seule: ses requêtes SQL sont envoyées au réplica
+    (DATABASE_REPLICA_ALIAS), sauf si l'utilisateur vient d'écrire.
+
+    Les permissions et l'authentification, évaluées avant l'action, restent sur le primaire.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        alias = replica_alias_for(request.user)
+        if alias is None:
+            return view_method(self, request, *args, **kwargs)
+        token = _read_alias.set(alias)
+        try:
+            return view_method(self, request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Envoie les lectures au réplica uniquement dans une action marquée @replica_read.
+    Tout le reste (écritures, migrations, lectures ordinaires) va au primaire.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Le réplica est une copie du primaire: les objets des deux alias sont compatibles
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le réplica reçoit le schéma par réplication
+        return db != getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
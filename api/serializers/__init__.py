@@ -1,6 +1,6 @@
 from .login import *
 from .user import UserSerializer, UserProfileSerializer
-from .group import GroupSerializer, GroupCreateSerializer, GroupDetailSerializer
+from .group import GroupSerializer, UserGroupSerializer, GroupCreateSerializer, GroupDetailSerializer
 from .member import MemberSerializer, MemberCreateSerializer, MemberContributionSerializer, MemberUpdateSerializer
 from .transaction import TransactionSerializer, TransactionCreateSerializer, TransactionListSerializer, TransactionStatsSerializer
 from .category import CategorySerializer, CategoryCreateSerializer, CategoryListSerializer, CategoryStatsSerializer
\ No newline at end of file
@@ -85,17 +85,22 @@ class CategoryStatsSerializer(serializers.ModelSerializer):
         """Calcule le pourcentage du montant total"""
         total_amount = getattr(obj, 'total_amount', 0) or 0
         
-        # Obtenir le total de toutes les catégories du même type
-        user = obj.user
-        same_type_total = Category.objects.filter(
-            user=user, 
-            type=obj.type
-        ).annotate(
-            transaction_count=models.Count('transactions'),
-            total_amount=models.Sum('transactions__amount')
-        ).aggregate(
-            total=models.Sum('total_amount')
-        )['total'] or 0
+        # Totaux par type précalculés par la vue (une seule requête pour la liste)
+        type_totals = self.context.get('type_totals')
+        if type_totals is not None:
+            same_type_total = type_totals.get(obj.type, 0)
+        else:
+            # Obtenir le total de toutes les catégories du même type
+            user = obj.user
+            same_type_total = Category.objects.filter(
+                user=user, 
+                type=obj.type
+            ).annotate(
+                transaction_count=models.Count('transactions'),
+                total_amount=models.Sum('transactions__amount')
+            ).aggregate(
+                total=models.Sum('total_amount')
+            )['total'] or 0
         
         if same_type_total > 0:
             return round((float(total_amount) / float(same_type_total)) * 100, 2)
@@ -104,5 +109,8 @@ class CategoryStatsSerializer(serializers.ModelSerializer):
     def get_recent_transactions(self, obj):
         """Retourne les 3 dernières transactions de cette catégorie"""
         from api.serializers.transaction import TransactionListSerializer
-        recent = obj.transactions.all()[:3]
+        # Liste préchargée par la vue si disponible
+        recent = getattr(obj, 'recent_transaction_list', None)
+        if recent is None:
+            recent = obj.transactions.all()[:3]
         return TransactionListSerializer(recent, many=True, context=self.context).data
@@ -3,8 +3,8 @@ from api.models import Group, Member
 
 
 class GroupSerializer(serializers.ModelSerializer):
-    member_count = serializers.IntegerField(read_only=True)
-    admin_count = serializers.IntegerField(read_only=True)
+    member_count = serializers.SerializerMethodField()
+    admin_count = serializers.SerializerMethodField()
     is_member = serializers.SerializerMethodField()
     is_admin = serializers.SerializerMethodField()
     calculated_balance = serializers.SerializerMethodField()
@@ -17,8 +17,32 @@ class GroupSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'amount']
     
+    def update(self, instance, validated_data):
+        # Champs modifiés seulement: un save() complet réécrirait un montant lu avant
+        # une transaction concurrente (amount est tenu par UPDATE amount = amount + delta)
+        for key, value in validated_data.items():
+            setattr(instance, key, value)
+        instance.save(update_fields=list(validated_data) + ['updated_at'])
+        return instance
+
+    # Les valeurs annotées par GroupManager.with_user_context() évitent une requête par groupe
+    
+    def get_member_count(self, obj):
+        """Retourne le nombre de membres"""
+        if hasattr(obj, 'annotated_member_count'):
+            return obj.annotated_member_count
+        return obj.member_count
+    
+    def get_admin_count(self, obj):
+        """Retourne le nombre d'admins"""
+        if hasattr(obj, 'annotated_admin_count'):
+            return obj.annotated_admin_count
+        return obj.admin_count
+    
     def get_is_member(self, obj):
         """Vérifie si l'utilisateur actuel est membre du groupe"""
+        if hasattr(obj, 'annotated_is_member'):
+            return obj.annotated_is_member
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.is_user_member(request.user)
@@ -26,6 +50,8 @@ class GroupSerializer(serializers.ModelSerializer):
     
     def get_is_admin(self, obj):
         """Vérifie si l'utilisateur actuel est admin du groupe"""
+        if hasattr(obj, 'annotated_role'):
+            return obj.annotated_role == 'admin'
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.is_user_admin(request.user)
@@ -33,9 +59,21 @@ class GroupSerializer(serializers.ModelSerializer):
     
     def get_calculated_balance(self, obj):
         """Retourne le solde calculé du groupe"""
+        if hasattr(obj, 'annotated_balance'):
+            return obj.annotated_balance
         return obj.calculate_total_balance()
 
 
+class UserGroupSerializer(GroupSerializer):
+    """Serializer d'un groupe vu par l'un de ses membres (GroupManager.for_user)"""
+    my_role = serializers.CharField(source='annotated_role', read_only=True)
+    my_amount_perso = serializers.DecimalField(source='annotated_amount_perso', max_digits=12, decimal_places=2, read_only=True)
+    joined_date = serializers.DateTimeField(source='annotated_date_join', read_only=True)
+    
+    class Meta(GroupSerializer.Meta):
+        fields = GroupSerializer.Meta.fields + ['my_role', 'my_amount_perso', 'joined_date']
+
+
 class GroupCreateSerializer(serializers.ModelSerializer):
     """Serializer pour la création de groupes"""
     
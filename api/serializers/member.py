@@ -70,7 +70,9 @@ class MemberContributionSerializer(serializers.ModelSerializer):
     def get_contribution_percentage(self, obj):
         """Calcule le pourcentage de contribution du membre"""
         total_contributions = getattr(obj, 'total_contributions', 0) or 0
-        group_total = obj.group.calculate_total_balance()
+        group_total = getattr(obj, 'annotated_group_balance', None)
+        if group_total is None:
+            group_total = obj.group.calculate_total_balance()
         
         if group_total > 0:
             return round((float(total_contributions) / float(group_total)) * 100, 2)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from api.models import Transaction, Category, Group
+from django.db.models import Q
 from django.utils import timezone
 
 
@@ -79,6 +80,118 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class TransactionImportRowSerializer(serializers.Serializer):
+    """
+    Serializer d'une ligne d'import en masse.
+    Catégorie et groupe sont de simples identifiants: ils sont vérifiés par lot
+    dans TransactionImportBatch pour ne pas interroger la base à chaque ligne.
+    """
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
+    date = serializers.DateTimeField()
+    description = serializers.CharField()
+    type = serializers.ChoiceField(choices=Transaction.TYPE_CHOICES)
+    category = serializers.IntegerField(required=False, allow_null=True)
+    group = serializers.IntegerField(required=False, allow_null=True)
+
+    def to_internal_value(self, data):
+        # Les cellules CSV vides valent "aucune catégorie / aucun groupe"
+        data = {key: value for key, value in data.items() if value not in ['', None]}
+        return super().to_internal_value(data)
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be positive")
+        return value
+
+    def validate_date(self, value):
+        if value > timezone.now():
+            raise serializers.ValidationError("Transaction date cannot be in the future")
+        return value
+
+
+class TransactionImportBatch:
+    """
+    Valide un lot de lignes d'import et construit les transactions à insérer.
+
+    Chaque ligne est d'abord validée seule (sans requête), puis les catégories et
+    groupes référencés sont chargés en deux requêtes pour tout le lot.
+    Les lignes invalides sont écartées et décrites dans `errors` (numéro de ligne à partir de 1).
+    """
+
+    def __init__(self, rows, user):
+        self.rows = rows
+        self.user = user
+        self.transactions = []
+        self.errors = []
+
+    def is_valid(self):
+        parsed = []
+        for index, row in enumerate(self.rows, start=1):
+            if not isinstance(row, dict):
+                self.errors.append({'row': index, 'errors': {'non_field_errors': ['Invalid row format']}})
+                continue
+            serializer = TransactionImportRowSerializer(data=row)
+            if serializer.is_valid():
+                parsed.append((index, serializer.validated_data))
+            else:
+                self.errors.append({'row': index, 'errors': serializer.errors})
+
+        categories = self._accessible_categories({data.get('category') for _, data in parsed} - {None})
+        groups = self._accessible_groups({data.get('group') for _, data in parsed} - {None})
+
+        for index, data in parsed:
+            errors = self._check_references(data, categories, groups)
+            if errors:
+                self.errors.append({'row': index, 'errors': errors})
+                continue
+            self.transactions.append(Transaction(
+                amount=data['amount'],
+                date=data['date'],
+                description=data['description'],
+                type=data['type'],
+                category_id=data.get('category'),
+                group_id=data.get('group'),
+                user=self.user
+            ))
+
+        self.errors.sort(key=lambda error: error['row'])
+        return not self.errors
+
+    def _accessible_categories(self, ids):
+        """Retourne {id: type} des catégories de l'utilisateur ou de ses groupes"""
+        if not ids:
+            return {}
+        queryset = Category.objects.filter(pk__in=ids)
+        if not self.user.is_superuser:
+            queryset = queryset.filter(Q(user=self.user) | Q(group__members__user=self.user))
+        return dict(queryset.values_list('pk', 'type').distinct())
+
+    def _accessible_groups(self, ids):
+        """Retourne les identifiants des groupes dont l'utilisateur est membre"""
+        if not ids:
+            return set()
+        queryset = Group.objects.filter(pk__in=ids)
+        if not self.user.is_superuser:
+            queryset = queryset.filter(members__user=self.user)
+        return set(queryset.values_list('pk', flat=True))
+
+    def _check_references(self, data, categories, groups):
+        """Validation croisée d'une ligne avec les références chargées par lot"""
+        errors = {}
+        category_id = data.get('category')
+        if category_id is not None:
+            if category_id not in categories:
+                errors['category'] = ['Category not found']
+            elif categories[category_id] != data['type']:
+                errors['category'] = [
+                    f"Category type ({categories[category_id]}) must match transaction type ({data['type']})"
+                ]
+        group_id = data.get('group')
+        if group_id is not None and group_id not in groups:
+            errors['group'] = ['You are not a member of this group']
+        return errors
+
+
 class TransactionListSerializer(serializers.ModelSerializer):
     """Serializer simplifié pour lister les transactions"""
     user_name = serializers.SerializerMethodField()
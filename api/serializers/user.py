@@ -51,6 +51,8 @@ class UserSerializer(serializers.ModelSerializer):
             'password': {'write_only': True},
             'date_joined': {'read_only': True},
             'last_login': {'read_only': True},
+            # Tenu par les transactions (UPDATE solde = solde + delta), jamais écrit ici
+            'solde': {'read_only': True},
         }
     
     def validate(self, data):
@@ -78,13 +80,17 @@ class UserSerializer(serializers.ModelSerializer):
         validated_data.pop('password_confirmation', None)
         password = validated_data.pop('password', None)
         
+        update_fields = list(validated_data)
         if password:
             instance.password = hashPassword(password)
+            update_fields.append('password')
             
         for key, value in validated_data.items():
             setattr(instance, key, value)
             
-        instance.save()
+        # Champs modifiés seulement: un save() complet réécrirait un solde lu avant
+        # une transaction concurrente
+        instance.save(update_fields=update_fields + ['updated_at'])
         return instance
     
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -99,7 +105,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         """Update user profile (only name fields allowed)"""
         for key, value in validated_data.items():
             setattr(instance, key, value)
-        instance.save()
+        instance.save(update_fields=list(validated_data) + ['updated_at'])
         return instance
 
 
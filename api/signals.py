@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from api.dashboard import bump_dashboard_versions, group_member_ids
+from api.membership import forget_group_members, forget_memberships
+from api.models import Group, Member, User
+
+
+@receiver(post_save, sender=Member, dispatch_uid='member_saved_forget_memberships')
+@receiver(post_delete, sender=Member, dispatch_uid='member_deleted_forget_memberships')
+def forget_member_roles(sender, instance, **kwargs):
+    """Invalide la carte des adhésions de l'utilisateur et la liste des membres du groupe"""
+    user = instance.user if Member.user.is_cached(instance) else None
+    forget_memberships(instance.user_id, user)
+    forget_group_members(instance.group_id)
+
+
+@receiver(post_save, sender=Member, dispatch_uid='member_saved_bump_dashboard')
+@receiver(post_delete, sender=Member, dispatch_uid='member_deleted_bump_dashboard')
+def bump_member_dashboard(sender, instance, **kwargs):
+    """Les groupes affichés dans le tableau de bord de l'utilisateur ont changé"""
+    bump_dashboard_versions([instance.user_id])
+
+
+@receiver(post_save, sender=Member, dispatch_uid='member_saved_touch_group')
+@receiver(post_delete, sender=Member, dispatch_uid='member_deleted_touch_group')
+def touch_member_group(sender, instance, **kwargs):
+    """Nombre de membres et rôles du groupe modifiés: nouvel updated_at pour les GET conditionnels"""
+    Group.objects.filter(pk=instance.group_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Group, dispatch_uid='group_saved_bump_dashboards')
+def bump_group_dashboards(sender, instance, created, **kwargs):
+    """Nom ou montant du groupe modifié: tableaux de bord de ses membres"""
+    if not created:
+        bump_dashboard_versions(group_member_ids([instance.pk]))
+
+
+@receiver(post_save, sender=User, dispatch_uid='user_saved_bump_dashboard')
+def bump_user_dashboard(sender, instance, **kwargs):
+    """Profil ou solde de l'utilisateur modifié"""
+    bump_dashboard_versions([instance.pk])
@@ -1,3 +1,1818 @@
-from django.test import TestCase
+import csv
+import json
+import logging
+import logging.handlers
+import os
+import random
+import time
+from io import StringIO
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import connection
+from django.contrib.auth import authenticate
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from api import metrics as api_metrics
+from api.checks import check_authorization_caches
+from api.membership import MEMBERSHIP_ATTR, membership_roles, stats as membership_stats
+from api.middleware import ReplicaStickinessMiddleware
+from api.routers import (
+    REPLICA_PIN_CACHE_ALIAS, ReplicaRouter, is_pinned_to_primary, pin_key, pin_to_primary, replica_read
+)
+from api.token_blacklist import is_blacklisted, prune_expired_tokens, remember_blacklisted, token_table_stats
+from api.serializers.group import GroupSerializer
+from api.views.transaction import TransactionViewSet
+from api.models import (
+    User, Group, Member, Category, Transaction, MonthlyRollup, LedgerEntry, BalanceSnapshot, OutboxEmail,
+    PasswordResetCode, TokenClaimsUser
+)
+
+
+def explain(sql, params=None):
+    """Retourne le plan d'exécution d'une requête SQL sous forme de texte"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Sur une petite table le planificateur préfère un parcours séquentiel
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                cursor.execute('EXPLAIN ' + sql, params)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+
+class CacheIsolatedTestCase(TestCase):
+    """
+    Vide les caches avant chaque classe et chaque test: les identifiants étant réutilisés
+    après rollback, une carte d'adhésions restée en cache d'un test précédent serait fausse.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        for cache in caches.all():
+            cache.clear()
+        super().setUpClass()
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+
+class BalanceUpdateTests(CacheIsolatedTestCase):
+    """Soldes tenus par des UPDATE ... SET solde = solde + delta à chaque écriture"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('balance@test.com', 'password', first_name='Bal', last_name='Ance')
+        cls.group = Group.objects.create_group('Maison', creator=cls.user)
+        cls.other_group = Group.objects.create_group('Voyage', creator=cls.user)
+
+    def create(self, amount, transaction_type='income', group=None):
+        return Transaction.objects.create(
+            amount=Decimal(amount), date=timezone.now(), description='Balance',
+            type=transaction_type, user=self.user, group=group
+        )
+
+    def balances(self):
+        self.user.refresh_from_db(fields=['solde'])
+        self.group.refresh_from_db(fields=['amount'])
+        self.other_group.refresh_from_db(fields=['amount'])
+        return self.user.solde, self.group.amount, self.other_group.amount
+
+    def test_create_and_delete(self):
+        income = self.create('100.00')
+        self.create('30.00', 'expense')
+        self.create('50.00', group=self.group)
+        self.assertEqual(self.balances(), (Decimal('70.00'), Decimal('50.00'), Decimal('0.00')))
+
+        income.delete()
+        self.assertEqual(self.balances(), (Decimal('-30.00'), Decimal('50.00'), Decimal('0.00')))
+
+    def test_amount_change(self):
+        transaction = self.create('100.00')
+        transaction.amount = Decimal('40.00')
+        transaction.save()
+        self.assertEqual(self.balances()[0], Decimal('40.00'))
+
+    def test_type_flip(self):
+        transaction = self.create('100.00', group=self.group)
+        transaction.type = 'expense'
+        transaction.save()
+        self.assertEqual(self.balances(), (Decimal('0.00'), Decimal('-100.00'), Decimal('0.00')))
+
+    def test_move_between_groups_and_out_of_group(self):
+        transaction = self.create('80.00', 'expense', group=self.group)
+        transaction.group = self.other_group
+        transaction.save()
+        self.assertEqual(self.balances(), (Decimal('0.00'), Decimal('0.00'), Decimal('-80.00')))
+
+        transaction.group = None
+        transaction.save()
+        self.assertEqual(self.balances(), (Decimal('-80.00'), Decimal('0.00'), Decimal('0.00')))
+
+    def test_unrelated_change_leaves_balances_untouched(self):
+        transaction = self.create('25.00', group=self.group)
+        transaction.description = 'Renamed'
+        with CaptureQueriesContext(connection) as context:
+            transaction.save()
+        self.assertFalse([query for query in context.captured_queries if 'api_ledgerentry' in query['sql']])
+        self.assertEqual(self.balances()[1], Decimal('25.00'))
+
+    def test_profile_and_password_saves_keep_concurrent_balance_change(self):
+        # Utilisateur chargé par la requête avant qu'une transaction concurrente ne soit validée
+        stale = User.objects.get(pk=self.user.pk)
+        self.create('100.00')
+        client = APIClient()
+        client.force_authenticate(stale)
+
+        self.assertEqual(client.patch(reverse('profile'), {'first_name': 'Renamed'}, format='json').status_code, 200)
+        self.assertEqual(self.balances()[0], Decimal('100.00'))
+
+        data = {'old_password': 'password', 'new_password': 'N3w-passw0rd!', 'new_password_confirmation': 'N3w-passw0rd!'}
+        response = client.post(reverse('change_password'), data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.balances()[0], Decimal('100.00'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Renamed')
+
+    def test_delete_of_stale_instance_reverses_current_row(self):
+        transaction = self.create('100.00', group=self.group)
+        stale = Transaction.objects.get(pk=transaction.pk)
+        transaction.amount = Decimal('40.00')
+        transaction.group = self.other_group
+        transaction.save()
+
+        stale.delete()
+        self.assertEqual(self.balances(), (Decimal('0.00'), Decimal('0.00'), Decimal('0.00')))
+        self.assertEqual(LedgerEntry.objects.balance(group=self.other_group), Decimal('0.00'))
+        self.assertFalse(MonthlyRollup.objects.exclude(total_amount=0).exists())
+
+    def test_group_rename_keeps_concurrent_balance_change(self):
+        stale = Group.objects.get(pk=self.group.pk)
+        self.create('60.00', group=self.group)
+
+        serializer = GroupSerializer(stale, data={'name': 'Maison 2'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(self.balances()[1], Decimal('60.00'))
+
+    def test_stale_instance_does_not_overwrite_concurrent_update(self):
+        # Deux écrivains lisent le même groupe: les F() évitent la perte de mise à jour
+        stale = Group.objects.get(pk=self.group.pk)
+        self.create('10.00', group=self.group)
+        self.create('15.00', group=stale)
+        self.assertEqual(self.balances()[1], Decimal('25.00'))
+
+
+class LedgerTests(CacheIsolatedTestCase):
+    """Grand livre: contrepassations, solde instantané + écritures, reprise de l'historique (0003)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('ledger@test.com', 'password', first_name='Led', last_name='Ger')
+        cls.group = Group.objects.create_group('Ledger', creator=cls.user)
+        cls.other_group = Group.objects.create_group('Ledger 2', creator=cls.user)
+
+    def create(self, amount, transaction_type='income', group=None):
+        return Transaction.objects.create(
+            amount=Decimal(amount), date=timezone.now(), description='Ledger',
+            type=transaction_type, user=self.user, group=group
+        )
+
+    def entries(self, transaction_id):
+        return list(LedgerEntry.objects.filter(transaction_id=transaction_id).values_list('group_id', 'amount'))
+
+    def test_updates_reverse_previous_version(self):
+        transaction = self.create('100.00', group=self.group)
+        transaction.amount = Decimal('60.00')
+        transaction.save()
+        transaction.type = 'expense'
+        transaction.save()
+        transaction.group = self.other_group
+        transaction.save()
+        transaction_id = transaction.pk
+        transaction.delete()
+
+        self.assertEqual(self.entries(transaction_id), [
+            (self.group.pk, Decimal('100.00')),
+            (self.group.pk, Decimal('-100.00')), (self.group.pk, Decimal('60.00')),
+            (self.group.pk, Decimal('-60.00')), (self.group.pk, Decimal('-60.00')),
+            (self.group.pk, Decimal('60.00')), (self.other_group.pk, Decimal('-60.00')),
+            (self.other_group.pk, Decimal('60.00')),
+        ])
+        self.assertEqual(LedgerEntry.objects.balance(group=self.group), 0)
+        self.assertEqual(LedgerEntry.objects.balance(group=self.other_group), 0)
+
+    def test_balance_from_snapshot_plus_later_entries(self):
+        self.create('100.00', group=self.group)
+        self.create('40.00', 'expense', group=self.group)
+        self.create('5.00')  # Solde personnel: hors du compte du groupe
+
+        snapshot = BalanceSnapshot.objects.take(group=self.group, cutoff=timezone.now())
+        self.assertEqual(snapshot.balance, Decimal('60.00'))
+        self.assertIsNone(BalanceSnapshot.objects.take(group=self.group, cutoff=timezone.now()))
+
+        self.create('15.00', group=self.group)
+        with self.assertNumQueries(2):
+            self.assertEqual(LedgerEntry.objects.balance(group=self.group), Decimal('75.00'))
+        self.group.refresh_from_db(fields=['amount'])
+        self.assertEqual(self.group.amount, Decimal('75.00'))
+        self.assertEqual(LedgerEntry.objects.balance(user=self.user), Decimal('5.00'))
+
+        # Les écritures déjà figées ne sont plus relues: l'instantané fait foi
+        LedgerEntry.objects.filter(id__lte=snapshot.last_entry_id).delete()
+        self.assertEqual(LedgerEntry.objects.balance(group=self.group), Decimal('75.00'))
+
+    def test_group_annotations_start_from_snapshot(self):
+        self.create('100.00', group=self.group)
+        self.create('40.00', 'expense', group=self.group)
+        snapshot = BalanceSnapshot.objects.take(group=self.group, cutoff=timezone.now())
+        self.create('15.00', group=self.group)
+        self.create('3.00', group=self.other_group)
+
+        # Écritures figées retirées: seul l'instantané peut encore en rendre compte
+        LedgerEntry.objects.filter(id__lte=snapshot.last_entry_id).delete()
+        balances = dict(Group.objects.with_user_context(self.user).values_list('pk', 'annotated_balance'))
+        self.assertEqual(balances, {self.group.pk: Decimal('75.00'), self.other_group.pk: Decimal('3.00')})
+        self.assertEqual(
+            dict(Group.objects.for_user(self.user).values_list('pk', 'annotated_balance')), balances
+        )
+        self.assertEqual(
+            Member.objects.with_contributions().get(group=self.group, user=self.user).annotated_group_balance,
+            Decimal('75.00')
+        )
+
+    def test_take_all_chains_snapshots(self):
+        self.create('10.00', group=self.group)
+        self.create('20.00')
+        snapshots = BalanceSnapshot.objects.take_all(cutoff=timezone.now())
+        self.assertEqual(
+            sorted((s.account, s.balance) for s in snapshots),
+            [('group', Decimal('10.00')), ('member', Decimal('10.00')),
+             ('personal', Decimal('20.00')), ('user', Decimal('30.00'))]
+        )
+
+        self.create('5.00', group=self.group)
+        snapshots = BalanceSnapshot.objects.take_all(cutoff=timezone.now())
+        self.assertEqual(
+            sorted((s.account, s.group_id, s.balance) for s in snapshots),
+            [('group', self.group.pk, Decimal('15.00')), ('member', self.group.pk, Decimal('15.00')),
+             ('user', None, Decimal('35.00'))]
+        )
+
+    def test_user_balances_start_from_snapshot(self):
+        self.create('100.00', group=self.group)
+        self.create('20.00', 'expense')
+        self.create('7.00', group=self.other_group)
+        BalanceSnapshot.objects.take_all(cutoff=timezone.now())
+        self.create('3.00', group=self.group)
+
+        # Écritures figées retirées: seuls les instantanés peuvent encore en rendre compte
+        LedgerEntry.objects.filter(transaction__isnull=False, amount__in=[100, -20, 7]).delete()
+        with self.assertNumQueries(2):
+            self.assertEqual(Transaction.objects.calculate_balance(user=self.user), Decimal('90.00'))
+        self.assertEqual(Transaction.objects.calculate_balance(user=self.user, group=self.group), Decimal('103.00'))
+        self.assertEqual(Transaction.objects.calculate_balance(group=self.group), Decimal('103.00'))
+        self.assertEqual(LedgerEntry.objects.balance(user=self.user), Decimal('-20.00'))
+
+    def test_backfill_migration(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        self.create('100.00', group=self.group)
+        self.create('30.00', 'expense')
+        LedgerEntry.objects.all().delete()
+
+        import_module('api.migrations.0003_ledgerentry_balancesnapshot').backfill_ledger(apps, None)
+        self.assertEqual(LedgerEntry.objects.balance(group=self.group), Decimal('100.00'))
+        self.assertEqual(LedgerEntry.objects.balance(user=self.user), Decimal('-30.00'))
+
+
+class MonthlyRollupTests(CacheIsolatedTestCase):
+    """Agrégats mensuels tenus à jour par les écritures, reprise de l'historique (0004), paramètres"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('rollup@test.com', 'password', first_name='Roll', last_name='Up')
+        cls.group = Group.objects.create_group('Rollup', creator=cls.user)
+        cls.food = Category.objects.create(name='Food', type='expense', user=cls.user)
+        cls.rent = Category.objects.create(name='Rent', type='expense', user=cls.user)
+        cls.january = timezone.make_aware(timezone.datetime(2026, 1, 15, 12))
+        cls.february = timezone.make_aware(timezone.datetime(2026, 2, 15, 12))
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, amount, transaction_type='expense', category=None, date=None, group=None):
+        return Transaction.objects.create(
+            amount=Decimal(amount), date=date or self.january, description='Rollup',
+            type=transaction_type, user=self.user, category=category, group=group
+        )
+
+    def totals(self):
+        """(mois, type, catégorie, groupe) -> (montant, nombre), sans les lignes vidées"""
+        return {
+            (row.month.month, row.type, row.category_id, row.group_id): (row.total_amount, row.transaction_count)
+            for row in MonthlyRollup.objects.all() if row.transaction_count
+        }
+
+    def test_create_update_delete(self):
+        first = self.create('10.00', category=self.food)
+        self.create('5.00', category=self.food)
+        self.assertEqual(self.totals(), {(1, 'expense', self.food.pk, None): (Decimal('15.00'), 2)})
+
+        # Changement de montant, de catégorie, de mois, de type et de groupe
+        first.amount = Decimal('12.00')
+        first.category = self.rent
+        first.date = self.february
+        first.type = 'income'
+        first.group = self.group
+        first.save()
+        self.assertEqual(self.totals(), {
+            (1, 'expense', self.food.pk, None): (Decimal('5.00'), 1),
+            (2, 'income', self.rent.pk, self.group.pk): (Decimal('12.00'), 1),
+        })
+
+        first.delete()
+        self.assertEqual(self.totals(), {(1, 'expense', self.food.pk, None): (Decimal('5.00'), 1)})
+
+    def test_backfill_migration(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        self.create('10.00', category=self.food)
+        self.create('20.00', category=self.food)
+        self.create('7.00', 'income', date=self.february, group=self.group)
+        expected = self.totals()
+        MonthlyRollup.objects.all().delete()
+
+        import_module('api.migrations.0004_monthlyrollup').backfill_rollups(apps, None)
+        self.assertEqual(self.totals(), expected)
+
+    def test_monthly_summary_reads_rollups(self):
+        self.create('10.00', category=self.food)
+        self.create('30.00', 'income')
+        response = self.client.get('/api/v1/transactions/monthly_summary/?year=2026&month=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data['total_income'], response.data['total_expenses'], response.data['transaction_count']),
+            (Decimal('30.00'), Decimal('10.00'), 2)
+        )
+
+    def test_invalid_parameters_are_rejected(self):
+        for url in (
+            '/api/v1/transactions/monthly_summary/?month=13',
+            '/api/v1/transactions/monthly_summary/?year=abc',
+            '/api/v1/transactions/monthly_summary/?year=9999&month=12',
+            '/api/v1/transactions/monthly_history/?months=abc',
+            '/api/v1/transactions/monthly_history/?months=0',
+            '/api/v1/transactions/monthly_history/?months=1000000',
+            '/api/v1/transactions/monthly_history/?group_id=abc',
+        ):
+            self.assertEqual(self.client.get(url).status_code, 400, url)
+
+
+@skipUnless(connection.vendor in ['postgresql', 'sqlite'], 'EXPLAIN non supporté sur cette base')
+class IndexUsageTests(CacheIsolatedTestCase):
+    """Vérifie via EXPLAIN que les requêtes critiques utilisent les index composites"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('index@test.com', 'password', first_name='Index', last_name='Test')
+        cls.group = Group.objects.create_group('Index group', creator=cls.user)
+        cls.category = Category.objects.create(name='Food', type='expense', user=cls.user)
+        now = timezone.now()
+        for i in range(10):
+            Transaction.objects.create(
+                amount=Decimal(10 + i),
+                date=now - timezone.timedelta(days=i * 10),
+                description=f'Transaction {i}',
+                type='income' if i % 2 else 'expense',
+                user=cls.user,
+                group=cls.group if i % 3 == 0 else None,
+                category=None if i % 2 else cls.category
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def captured_plan(self, url, marker):
+        """Appelle un endpoint et retourne le plan de la requête contenant `marker`"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        queries = [query['sql'] for query in context.captured_queries if marker in query['sql']]
+        self.assertTrue(queries, f'Aucune requête contenant {marker!r}')
+        return explain(queries[0])
+
+    def test_stats_uses_user_date_index(self):
+        plan = self.captured_plan(
+            '/api/v1/transactions/stats/?start_date=2000-01-01T00:00:00Z',
+            'SUM("api_transaction"."amount")'
+        )
+        self.assertIn('txn_user_date_idx', plan)
+
+    def test_monthly_summary_transactions_use_user_date_index(self):
+        plan = self.captured_plan(
+            '/api/v1/transactions/monthly_summary/?include_transactions=true',
+            'FROM "api_transaction"'
+        )
+        self.assertIn('txn_user_date_idx', plan)
+
+    def test_group_summary_uses_group_index(self):
+        plan = self.captured_plan(
+            f'/api/v1/groups/{self.group.id}/financial_summary/',
+            'SUM("api_transaction"."amount")'
+        )
+        self.assertRegex(plan, 'txn_group_(date|type)_idx')
+
+    def test_personal_transactions_use_partial_index(self):
+        queryset = Transaction.objects.filter(user=self.user, group__isnull=True).order_by('-date', '-id')
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('txn_personal_date_idx', explain(sql, params))
+
+    def test_group_admins_use_group_role_index(self):
+        queryset = Member.objects.filter(group=self.group, role='admin')
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('member_group_role_idx', explain(sql, params))
+
+    def test_reset_code_lookup_uses_user_index(self):
+        queryset = PasswordResetCode.objects.valid().filter(user=self.user, code='ABC123')
+        sql, params = queryset.query.sql_with_params()
+        # Index de la contrainte unique sur user (nom propre à chaque base)
+        self.assertIn('user_id', explain(sql, params))
+
+    def test_user_categories_by_type_use_user_type_index(self):
+        queryset = Category.objects.filter(user=self.user, type='expense')
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('category_user_type_idx', explain(sql, params))
+
+
+# Volume des données de test, ajustable en CI (ex: API_BUDGET_USERS=2000): des milliers
+# de lignes par table et des dizaines de membres par groupe pour que les N+1 se voient
+SEED_USERS = int(os.environ.get('API_BUDGET_USERS', 500))
+SEED_GROUPS = int(os.environ.get('API_BUDGET_GROUPS', 40))
+SEED_GROUPS_PER_USER = int(os.environ.get('API_BUDGET_GROUPS_PER_USER', 5))
+SEED_TRANSACTIONS = int(os.environ.get('API_BUDGET_TRANSACTIONS', 5000))
+# Budget de latence par requête (ms), volontairement large pour les machines de CI
+LATENCY_BUDGET_MS = float(os.environ.get('API_BUDGET_LATENCY_MS', 1500))
+# Marge tolérée au-dessus de chaque budget de requêtes
+QUERY_BUDGET_SLACK = int(os.environ.get('API_BUDGET_QUERY_SLACK', 1))
+
+# Nombre de requêtes SQL attendu par endpoint (nom de route -> budget, hors marge).
+# Les budgets ne dépendent ni du volume ni de la taille de page: un dépassement
+# signale une requête N+1. Les listes comptent l'agrégat des validateurs ETag/Last-Modified.
+QUERY_BUDGETS = {
+    'user-list': 3,
+    'user-detail': 1,
+    'group-list': 3,
+    'group-detail': 2,
+    'group-my-groups': 1,
+    'group-members': 2,
+    'group-financial-summary': 4,
+    'group-transactions': 2,
+    'group-activity': 6,
+    'group-member-activity': 7,
+    'member-list': 3,
+    'member-detail': 1,
+    'member-my-memberships': 1,
+    'member-contributions': 1,
+    'member-activity': 3,
+    'transaction-list': 2,
+    'transaction-detail': 1,
+    'transaction-stats': 1,
+    'transaction-by-category': 1,
+    'transaction-recent': 1,
+    'transaction-monthly-summary': 2,
+    'transaction-monthly-history': 1,
+    'transaction-personal': 1,
+    'transaction-groups': 1,
+    'transaction-export': 0,
+    'category-list': 3,
+    'category-detail': 1,
+    'category-stats': 3,
+    'category-most-used': 3,
+    'category-by-type': 6,
+    'category-transactions': 4,
+    'profile': 0,
+    'user_dashboard': 4,
+}
+
+# Endpoints paginés: le nombre de requêtes doit être identique quelle que soit la taille de page
+PAGINATED_ROUTES = [
+    'user-list', 'group-list', 'member-list', 'transaction-list',
+    'transaction-personal', 'transaction-groups', 'category-list', 'group-transactions',
+]
+
+# Budgets des écritures (nom de route, méthode) -> budget
+WRITE_BUDGETS = {
+    ('transaction-list', 'post'): 10,
+    ('category-list', 'post'): 1,
+    ('group-list', 'post'): 9,
+    ('member-promote', 'post'): 5,
+}
+
+
+def seed_volume(users=SEED_USERS, groups=SEED_GROUPS, transactions=SEED_TRANSACTIONS, seed=42,
+                main_user=None, prefix=''):
+    """
+    Crée un jeu de données volumineux en bulk_create; les transactions passent par
+    Transaction.objects.bulk_import qui tient à jour le grand livre et les agrégats mensuels.
+    Retourne l'utilisateur principal (membre de tous les groupes). Appelé à nouveau avec
+    `main_user` et un autre `prefix`, ajoute un second lot de données au même utilisateur.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    if main_user is None:
+        main_user = User.objects.create_user('budget@test.com', 'password', first_name='Budget', last_name='Main')
+    # Un seul hachage de mot de passe partagé par tous les utilisateurs
+    others = User.objects.bulk_create([
+        User(
+            email=f'{prefix}user{i}@test.com', password=main_user.password,
+            first_name='User', last_name=str(i)
+        ) for i in range(users)
+    ])
+
+    group_list = Group.objects.bulk_create([
+        Group(name=f'{prefix}Group {i}', amount=0) for i in range(groups)
+    ])
+
+    memberships = [Member(user=main_user, group=group, role='admin', amount_perso=0) for group in group_list]
+    members_by_group = {group.pk: [main_user] for group in group_list}
+    for user in others:
+        for group in rng.sample(group_list, min(SEED_GROUPS_PER_USER, len(group_list))):
+            memberships.append(Member(user=user, group=group, role='member', amount_perso=0))
+            members_by_group[group.pk].append(user)
+    Member.objects.bulk_create(memberships)
+
+    categories = Category.objects.bulk_create(
+        [Category(name=f'{prefix}Income {i}', type='income', user=main_user) for i in range(5)]
+        + [Category(name=f'{prefix}Expense {i}', type='expense', user=main_user) for i in range(5)]
+        + [Category(name=f'{prefix}Group expense {i}', type='expense', user=main_user, group=group)
+           for i, group in enumerate(group_list)]
+    )
+    categories_by_type = {
+        kind: [category for category in categories if category.type == kind]
+        for kind in ['income', 'expense']
+    }
+
+    rows = []
+    for i in range(transactions):
+        kind = 'income' if i % 3 == 0 else 'expense'
+        group = rng.choice(group_list + [None])
+        user = rng.choice(members_by_group[group.pk]) if group else rng.choice([main_user] + others)
+        rows.append(Transaction(
+            amount=Decimal(rng.randint(100, 100000)) / 100,
+            date=now - timezone.timedelta(days=rng.randint(0, 720), minutes=rng.randint(0, 1440)),
+            description=f'{prefix}Transaction {i}',
+            type=kind,
+            user=user,
+            group=group,
+            category=rng.choice(categories_by_type[kind]) if i % 4 else None
+        ))
+    Transaction.objects.bulk_import(rows)
+
+    return main_user
+
+
+class QueryBudgetTests(CacheIsolatedTestCase):
+    """
+    Budgets de requêtes SQL et de latence pour chaque endpoint de l'API.
+
+    Échoue dès qu'un endpoint dépasse son nombre de requêtes (régression N+1),
+    ou que ce nombre varie avec la taille de page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_volume()
+        cls.group = Group.objects.filter(members__user=cls.user).order_by('pk').first()
+        cls.member = Member.objects.get(user=cls.user, group=cls.group)
+        cls.category = Category.objects.filter(user=cls.user, group__isnull=True).order_by('pk').first()
+        cls.transaction = Transaction.objects.filter(user=cls.user).order_by('pk').first()
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def route_url(self, name):
+        """Construit l'URL d'une route avec les paramètres du jeu de données"""
+        detail_objects = {
+            'user': self.user, 'group': self.group, 'member': self.member,
+            'transaction': self.transaction, 'category': self.category,
+        }
+        basename, _, action = name.partition('-')
+        if action == 'list' or name in ['profile', 'user_dashboard']:
+            return reverse(name)
+        if action == 'detail' or action in ['members', 'financial-summary', 'transactions',
+                                            'activity', 'member-activity']:
+            url = reverse(name, kwargs={'pk': detail_objects[basename].pk})
+        else:
+            url = reverse(name)
+
+        params = {
+            'group-member-activity': f'?user_id={self.user.pk}',
+            'transaction-recent': '?days=365',
+            'transaction-monthly-history': '?months=24',
+        }
+        return url + params.get(name, '')
+
+    def measure(self, url, method='get', data=None):
+        """Exécute une requête et retourne (réponse, nombre de requêtes SQL, durée en ms)"""
+        # force_authenticate réutilise self.user: on oublie la carte mémorisée sur l'instance
+        # pour mesurer chaque requête comme une requête réelle, qui recharge l'utilisateur.
+        self.user.__dict__.pop(MEMBERSHIP_ATTR, None)
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = getattr(self.client, method)(url, data, format='json')
+            elapsed = (time.perf_counter() - start) * 1000
+        return response, len(context.captured_queries), elapsed
+
+    def test_every_router_endpoint_has_a_budget(self):
+        from api.urls import router  # Import local pour éviter la circularité
+
+        missing = []
+        for prefix, viewset, basename in router.registry:
+            names = [f'{basename}-list', f'{basename}-detail'] + [
+                f'{basename}-{extra.url_name}'
+                for extra in viewset.get_extra_actions() if 'get' in extra.mapping
+            ]
+            missing += [name for name in names if name not in QUERY_BUDGETS]
+        self.assertEqual(missing, [], 'Endpoints sans budget de requêtes')
+
+    def test_query_and_latency_budgets(self):
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(endpoint=name):
+                url = self.route_url(name)
+                response, queries, elapsed = self.measure(url)
+                self.assertEqual(response.status_code, 200, url)
+                self.assertLessEqual(
+                    queries, budget + QUERY_BUDGET_SLACK, f'{url}: {queries} requêtes (budget {budget})'
+                )
+                self.assertLessEqual(elapsed, LATENCY_BUDGET_MS, f'{url}: {elapsed:.0f} ms')
+
+    def test_query_counts_stay_flat_as_volume_grows(self):
+        def query_counts():
+            counts = {}
+            for name in QUERY_BUDGETS:
+                for cache in caches.all():
+                    cache.clear()
+                counts[name] = self.measure(self.route_url(name))[1]
+            return counts
+
+        before = query_counts()
+        # Second lot: plus d'utilisateurs, de groupes, de membres par groupe et de transactions
+        seed_volume(
+            users=SEED_USERS // 2, groups=SEED_GROUPS // 2, transactions=SEED_TRANSACTIONS // 2,
+            seed=7, main_user=self.user, prefix='more-'
+        )
+        self.assertEqual(query_counts(), before)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for name in PAGINATED_ROUTES:
+            with self.subTest(endpoint=name):
+                url = self.route_url(name)
+                _, small, _ = self.measure(f'{url}?page_size=1')
+                _, large, _ = self.measure(f'{url}?page_size=100')
+                self.assertEqual(small, large, url)
+
+    def test_page_number_fallback_budget(self):
+        # Pagination historique (?page=N): un COUNT en plus au maximum
+        url = self.route_url('transaction-list')
+        response, queries, _ = self.measure(f'{url}?page=2&page_size=50')
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(queries, QUERY_BUDGETS['transaction-list'] + 1 + QUERY_BUDGET_SLACK)
+
+    def test_cursor_pagination_is_opt_in(self):
+        url = self.route_url('transaction-list')
+        response = self.client.get(url)
+        self.assertEqual(
+            set(response.data), {'count', 'total_pages', 'current_page', 'page_size', 'next', 'previous', 'results'}
+        )
+        self.assertEqual(response.data['page_size'], 3)
+
+        response, first_queries, _ = self.measure(f'{url}?cursor=&page_size=50')
+        self.assertNotIn('count', response.data)
+        self.assertIn('cursor=', response.data['next'])
+        # Une page profonde coûte autant que la première (pas de COUNT ni d'OFFSET)
+        for _ in range(3):
+            response, queries, _ = self.measure(response.data['next'])
+            self.assertEqual(queries, first_queries)
+
+        group_url = self.route_url('group-transactions')
+        self.assertIsInstance(self.client.get(group_url).data, list)
+        self.assertIn('next', self.client.get(f'{group_url}?cursor=').data)
+        activity = self.client.get(self.route_url('group-member-activity')).data
+        self.assertNotIn('pagination', activity)
+        self.assertIsInstance(activity['transactions'], list)
+
+    def test_write_budgets(self):
+        category = Category.objects.filter(user=self.user, type='expense', group__isnull=True).first()
+        member = Member.objects.filter(group=self.group, role='member').first()
+        payloads = {
+            ('transaction-list', 'post'): {
+                'amount': '12.50', 'date': timezone.now().isoformat(), 'description': 'Budget',
+                'type': 'expense', 'category': category.pk, 'group': self.group.pk,
+            },
+            ('category-list', 'post'): {'name': 'Budget category', 'type': 'income'},
+            ('group-list', 'post'): {'name': 'Budget group', 'description': ''},
+            ('member-promote', 'post'): {},
+        }
+        for (name, method), budget in WRITE_BUDGETS.items():
+            with self.subTest(endpoint=name, method=method):
+                if name == 'member-promote':
+                    url = reverse(name, kwargs={'pk': member.pk})
+                else:
+                    url = reverse(name)
+                response, queries, elapsed = self.measure(url, method, payloads[(name, method)])
+                self.assertIn(response.status_code, [200, 201], response.content)
+                self.assertLessEqual(
+                    queries, budget + QUERY_BUDGET_SLACK, f'{url}: {queries} requêtes (budget {budget})'
+                )
+                self.assertLessEqual(elapsed, LATENCY_BUDGET_MS, f'{url}: {elapsed:.0f} ms')
+
+
+class BulkImportTests(CacheIsolatedTestCase):
+    """Import en masse de transactions (JSON et CSV)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('import@test.com', 'password', first_name='Import', last_name='Test')
+        cls.other = User.objects.create_user('other@test.com', 'password', first_name='Other', last_name='Test')
+        cls.group = Group.objects.create_group('Import group', creator=cls.user)
+        cls.foreign_group = Group.objects.create_group('Foreign group', creator=cls.other)
+        cls.category = Category.objects.create(name='Food', type='expense', user=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('transaction-import')
+        self.date = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+
+    def row(self, **overrides):
+        row = {'amount': '10.00', 'date': self.date, 'description': 'Import', 'type': 'expense'}
+        row.update(overrides)
+        return row
+
+    def test_import_applies_aggregated_balances(self):
+        rows = [self.row(group=self.group.pk, category=self.category.pk) for _ in range(5)]
+        rows += [self.row(type='income', amount='100.00') for _ in range(3)]
+
+        response = self.client.post(self.url, {'transactions': rows}, format='json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['created'], 8)
+        self.assertEqual(response.data['errors'], [])
+        self.group.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.group.amount, Decimal('-50.00'))
+        self.assertEqual(self.user.solde, Decimal('300.00'))
+        self.assertEqual(LedgerEntry.objects.filter(user=self.user).count(), 8)
+        self.assertEqual(
+            MonthlyRollup.objects.filter(group=self.group).get().transaction_count, 5
+        )
+
+    def test_invalid_rows_are_reported(self):
+        rows = [
+            self.row(),
+            self.row(amount='-5'),
+            self.row(group=self.foreign_group.pk),
+            self.row(type='income', category=self.category.pk),
+            self.row(type='unknown'),
+        ]
+
+        response = self.client.post(self.url, {'transactions': rows}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4, 5])
+        self.assertIn('amount', response.data['errors'][0]['errors'])
+        self.assertIn('group', response.data['errors'][1]['errors'])
+        self.assertIn('category', response.data['errors'][2]['errors'])
+
+    def test_csv_upload(self):
+        content = (
+            'amount,date,description,type,category,group\n'
+            f'12.50,{self.date},Courses,expense,{self.category.pk},\n'
+            f'40,{self.date},Salaire,income,,{self.group.pk}\n'
+        )
+        upload = SimpleUploadedFile('import.csv', content.encode('utf-8'), content_type='text/csv')
+
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+
+    def test_oversized_csv_is_rejected(self):
+        header = 'amount,date,description,type,category,group\n'
+        line = f'1,{self.date},Ligne,expense,,\n'
+        upload = SimpleUploadedFile('import.csv', (header + line * 50).encode('utf-8'), content_type='text/csv')
+
+        with patch.object(TransactionViewSet, 'import_max_rows', 10):
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Too many rows', response.data['error'])
+
+    def test_query_count_does_not_grow_per_row(self):
+        rows = [self.row(group=self.group.pk, category=self.category.pk) for _ in range(500)]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {'transactions': rows}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        # Quelques INSERT par lot (limite de paramètres SQLite), un UPDATE par compte/agrégat
+        self.assertLessEqual(len(context.captured_queries), 20)
+
+
+class ExportTests(CacheIsolatedTestCase):
+    """Export en flux des transactions (CSV et NDJSON)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('export@test.com', 'password', first_name='Export', last_name='Test')
+        cls.group = Group.objects.create_group('Export group', creator=cls.user)
+        now = timezone.now()
+        Transaction.objects.bulk_import([
+            Transaction(
+                amount=Decimal(10 + i), date=now - timezone.timedelta(days=i), description=f'Export {i}',
+                type='expense', user=cls.user, group=cls.group if i % 2 else None
+            ) for i in range(30)
+        ])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def consume(self, url):
+        """Lit tout le flux en comptant les requêtes SQL exécutées"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(response.status_code, 200)
+        return response, content, len(context.captured_queries)
+
+    def test_csv_export(self):
+        response, content, queries = self.consume(reverse('transaction-export'))
+
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="transactions.csv"', response['Content-Disposition'])
+        lines = content.strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,date,type,amount'))
+        self.assertEqual(len(lines), 31)
+        self.assertLessEqual(queries, 2)
+
+    def test_ndjson_export_applies_list_filters(self):
+        url = reverse('transaction-export') + '?export_format=ndjson&group=' + str(self.group.pk)
+        _, content, _ = self.consume(url)
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 15)
+        self.assertTrue(all(row['group_name'] == 'Export group' for row in rows))
+
+    def test_group_transactions_export(self):
+        url = reverse('group-transactions', kwargs={'pk': self.group.pk}) + '?export_format=csv'
+        _, content, _ = self.consume(url)
+
+        self.assertEqual(len(content.strip().splitlines()), 16)
+
+    def test_csv_export_neutralizes_formulas(self):
+        Transaction.objects.create(
+            amount=Decimal('5.00'), date=timezone.now(), description='=HYPERLINK("http://x","y")',
+            type='expense', user=self.user, group=Group.objects.create_group('@SUM(A1)', creator=self.user)
+        )
+        _, content, _ = self.consume(reverse('transaction-export') + '?search=HYPERLINK')
+
+        header, row = csv.reader(StringIO(content))
+        values = dict(zip(header, row))
+        self.assertEqual(values['description'], '\'=HYPERLINK("http://x","y")')
+        self.assertEqual(values['group_name'], "'@SUM(A1)")
+        self.assertEqual(values['amount'], '5.00')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('transaction-export') + '?export_format=xml')
+        self.assertEqual(response.status_code, 400)
+
+
+class MembershipResolverTests(CacheIsolatedTestCase):
+    """Carte des adhésions {group_id: role} chargée une fois par requête"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('roles@test.com', 'password', first_name='Roles', last_name='Test')
+        cls.other = User.objects.create_user('member@test.com', 'password', first_name='Member', last_name='Test')
+        cls.groups = [Group.objects.create_group(f'Roles group {i}', creator=cls.user) for i in range(3)]
+        cls.member = Member.objects.create_member(cls.other, cls.groups[0])
+
+    def test_membership_checks_share_one_query(self):
+        user = User.objects.get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as context:
+            for group in self.groups:
+                self.assertTrue(group.is_user_member(user))
+                self.assertTrue(group.is_user_admin(user))
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_map_is_forgotten_when_membership_changes(self):
+        other = User.objects.get(pk=self.other.pk)
+        self.assertEqual(membership_roles(other), {self.groups[0].pk: 'member'})
+
+        Member.objects.create_member(other, self.groups[1])
+        self.assertTrue(self.groups[1].is_user_member(other))
+
+    def test_promote_checks_role_from_map(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('member-promote', kwargs={'pk': self.member.pk})
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url)
+
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in context.captured_queries]
+        # Une seule lecture de la carte, plus aucun EXISTS par vérification
+        self.assertEqual(sum(q.startswith('SELECT "api_member"."group_id" AS "group_id"') for q in sql), 1)
+        self.assertFalse([q for q in sql if q.startswith('SELECT 1 AS "a" FROM "api_member"')])
+
+
+class MembershipCacheTests(CacheIsolatedTestCase):
+    """Cache partagé des cartes d'adhésions et son invalidation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('cache@test.com', 'password', first_name='Cache', last_name='Admin')
+        cls.user = User.objects.create_user('cached@test.com', 'password', first_name='Cache', last_name='User')
+        cls.group = Group.objects.create_group('Cache group', creator=cls.admin)
+        cls.member = Member.objects.create_member(cls.user, cls.group)
+
+    def setUp(self):
+        super().setUp()
+        membership_stats.reset()
+
+    def fresh_roles(self, user):
+        """Carte lue comme au début d'une nouvelle requête (instance d'utilisateur neuve)"""
+        return membership_roles(User.objects.get(pk=user.pk))
+
+    def test_second_request_is_served_from_cache(self):
+        self.fresh_roles(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(membership_roles(user), {self.group.pk: 'member'})
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual((membership_stats.hits, membership_stats.misses), (1, 1))
+
+    def test_deploy_check_flags_long_lived_local_cache(self):
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'check'}
+        shared = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}
+        for config, expected in (
+            ({**local, 'TIMEOUT': 300}, ['api.W001']),
+            ({**local, 'TIMEOUT': 5}, []),
+            ({**shared, 'TIMEOUT': 300}, []),
+        ):
+            with self.subTest(config=config), override_settings(
+                CACHES={**settings.CACHES, 'membership': config}, DATABASE_REPLICA_ALIAS=None,
+                DASHBOARD_VERSION_TIMEOUT=5
+            ):
+                self.assertEqual([warning.id for warning in check_authorization_caches(None)], expected)
+
+    def test_promote_and_demote_invalidate(self):
+        self.fresh_roles(self.user)
+
+        Member.objects.promote_to_admin(self.user, self.group)
+        self.assertEqual(self.fresh_roles(self.user), {self.group.pk: 'admin'})
+
+        Member.objects.demote_to_member(self.user, self.group)
+        self.assertEqual(self.fresh_roles(self.user), {self.group.pk: 'member'})
+
+    def test_member_save_and_delete_invalidate(self):
+        other_group = Group.objects.create_group('Other cache group', creator=self.admin)
+        self.fresh_roles(self.user)
+
+        Member.objects.create_member(self.user, other_group)
+        self.assertEqual(set(self.fresh_roles(self.user)), {self.group.pk, other_group.pk})
+
+        # Suppression en cascade du groupe: post_delete est émis pour chaque adhésion
+        other_group.delete()
+        self.assertEqual(set(self.fresh_roles(self.user)), {self.group.pk})
+
+    def test_stats_endpoint_is_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get(reverse('cache_stats')).status_code, 403)
+
+        staff = User.objects.create_user('staff@test.com', 'password', first_name='S', last_name='T')
+        staff.is_staff = True
+        staff.save()
+        client.force_authenticate(staff)
+        response = client.get(reverse('cache_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_ratio', response.data['membership'])
+        self.assertIn('tables', response.data['token_blacklist'])
+
+
+class DashboardCacheTests(CacheIsolatedTestCase):
+    """Tableau de bord mis en cache par version, avec ETag/If-None-Match"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dash@test.com', 'password', first_name='Dash', last_name='Board')
+        cls.other = User.objects.create_user('dash2@test.com', 'password', first_name='Other', last_name='Board')
+        cls.group = Group.objects.create_group('Dash group', creator=cls.user)
+        Member.objects.create_member(cls.other, cls.group)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user_dashboard')
+
+    def test_unchanged_dashboard_returns_304_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_weak_and_multiple_etags_match(self):
+        etag = self.client.get(self.url)['ETag']
+        for header in (f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header=header):
+                self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=header).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_deploy_check_flags_long_lived_local_versions(self):
+        with override_settings(DASHBOARD_VERSION_TIMEOUT=None):
+            self.assertIn('api.W002', [warning.id for warning in check_authorization_caches(None)])
+        with override_settings(DASHBOARD_VERSION_TIMEOUT=5):
+            self.assertNotIn('api.W002', [warning.id for warning in check_authorization_caches(None)])
+
+    @override_settings(DASHBOARD_VERSION_TIMEOUT=1)
+    def test_versions_expire(self):
+        # Une version posée par un autre processus (cache non partagé) n'est pas gardée indéfiniment
+        etag = self.client.get(self.url)['ETag']
+        time.sleep(1.1)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_payload_is_served_from_cache(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_group_transaction_bumps_every_member_dashboard(self):
+        etag = self.client.get(self.url)['ETag']
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        other_etag = other_client.get(self.url)['ETag']
+
+        Transaction.objects.create(
+            amount=Decimal('25.00'), date=timezone.now(), description='Dash', type='income',
+            user=self.other, group=self.group
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['active_groups'][0]['amount'], '25.00')
+        self.assertNotEqual(other_client.get(self.url)['ETag'], other_etag)
+
+    def test_group_writes_reuse_cached_member_ids(self):
+        def create():
+            with CaptureQueriesContext(connection) as context:
+                Transaction.objects.create(
+                    amount=Decimal('5.00'), date=timezone.now(), description='Dash', type='income',
+                    user=self.user, group=self.group
+                )
+            return [query for query in context.captured_queries if 'FROM "api_member"' in query['sql']]
+
+        self.assertEqual(len(create()), 1)
+        self.assertEqual(create(), [])
+
+        # Nouveau membre: la liste en cache est oubliée et son tableau de bord suit les écritures
+        third = User.objects.create_user('dash3@test.com', 'password', first_name='Third', last_name='Board')
+        Member.objects.create_member(third, self.group)
+        third_client = APIClient()
+        third_client.force_authenticate(third)
+        etag = third_client.get(self.url)['ETag']
+        self.assertEqual(len(create()), 1)
+        self.assertEqual(third_client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_membership_change_bumps_dashboard(self):
+        etag = self.client.get(self.url)['ETag']
+        Group.objects.create_group('Second dash group', creator=self.user)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['statistics']['total_groups'], 2)
+
+    def test_promote_and_demote_invalidate_dashboard_and_group_list(self):
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        member = Member.objects.get(user=self.other, group=self.group)
+        group_list = reverse('group-list')
+
+        for action, role in (('promote', 'admin'), ('demote', 'member')):
+            with self.subTest(action=action):
+                dashboard_etag = other_client.get(self.url)['ETag']
+                list_response = other_client.get(group_list)
+
+                response = self.client.post(reverse(f'member-{action}', kwargs={'pk': member.pk}))
+                self.assertEqual(response.status_code, 200, response.content)
+
+                response = other_client.get(self.url, HTTP_IF_NONE_MATCH=dashboard_etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['active_groups'][0]['role'], role)
+
+                response = other_client.get(group_list, HTTP_IF_NONE_MATCH=list_response['ETag'])
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['results'][0]['is_admin'], role == 'admin')
+
+
+class ConditionalGetTests(CacheIsolatedTestCase):
+    """ETag / Last-Modified sur les actions list et retrieve des ViewSets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('etag@test.com', 'password', first_name='Etag', last_name='Test')
+        cls.group = Group.objects.create_group('Etag group', creator=cls.user)
+        cls.category = Category.objects.create(name='Etag', type='expense', user=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_returns_304_before_serialization(self):
+        url = reverse('category-list')
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        # Seul l'agrégat Max(updated_at) / Count est exécuté
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_list_etag_changes_on_create_and_delete(self):
+        url = reverse('category-list')
+        etag = self.client.get(url)['ETag']
+
+        category = Category.objects.create(name='Other', type='income', user=self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        category.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_has_no_last_modified(self):
+        url = reverse('category-list')
+        older = Category.objects.create(name='Older', type='income', user=self.user)
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+
+        # Supprimer une ligne plus ancienne ne change pas Max(updated_at): If-Modified-Since est ignoré
+        since = http_date(time.time() + 60)
+        older.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Older', [category['name'] for category in response.data['results']])
+
+    def test_detail_uses_updated_at(self):
+        url = reverse('category-detail', kwargs={'pk': self.category.pk})
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+        self.category.name = 'Renamed'
+        self.category.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_membership_change_invalidates_group_list(self):
+        url = reverse('group-list')
+        etag = self.client.get(url)['ETag']
+
+        other = User.objects.create_user('etag2@test.com', 'password', first_name='E', last_name='T')
+        Member.objects.create_member(other, self.group)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(PASSWORD_BCRYPT_ROUNDS=4)
+class PasswordHashingTests(CacheIsolatedTestCase):
+    def test_create_user_hash_authenticates(self):
+        user = User.objects.create_user('hash@test.com', 'password', first_name='H', last_name='P')
+        self.assertTrue(user.password.startswith('bcrypt_sha256$'))
+        self.assertEqual(authenticate(email='hash@test.com', password='password'), user)
+
+    def test_login_rehashes_when_rounds_change(self):
+        user = User.objects.create_user('rounds@test.com', 'password', first_name='R', last_name='P')
+        self.assertIn('$04$', user.password)
+
+        with override_settings(PASSWORD_BCRYPT_ROUNDS=5):
+            self.assertIsNotNone(authenticate(email='rounds@test.com', password='password'))
+        user.refresh_from_db()
+        self.assertIn('$05$', user.password)
+
+    def test_legacy_bcrypt_hash_is_upgraded(self):
+        import bcrypt
+
+        user = User.objects.create_user('legacy@test.com', 'password', first_name='L', last_name='P')
+        legacy = bcrypt.hashpw(b'password', bcrypt.gensalt(4)).decode()
+        # Format produit par l'ancien hashPassword, préfixé par la migration 0007
+        User.objects.filter(pk=user.pk).update(password='bcrypt$' + legacy)
+
+        self.assertEqual(authenticate(email='legacy@test.com', password='password'), user)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('bcrypt_sha256$'))
+
+
+class FailingEmailBackend(LocmemEmailBackend):
+    """Backend locmem dont les envois échouent (serveur SMTP indisponible)"""
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class TransactionProbeEmailBackend(LocmemEmailBackend):
+    """Backend locmem qui note le nombre de blocs atomic ouverts à chaque envoi"""
+    depths = []
+
+    def send_messages(self, messages):
+        TransactionProbeEmailBackend.depths.append(len(connection.atomic_blocks))
+        return super().send_messages(messages)
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """Backend locmem qui compte les ouvertures de connexion"""
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_DELAY=30)
+class EmailOutboxTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('reset@test.com', 'password', first_name='R', last_name='S')
+
+    def test_reset_request_only_enqueues(self):
+        response = self.client.post(reverse('password_reset_request'), {'email': 'reset@test.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+
+        queued = OutboxEmail.objects.get()
+        self.assertEqual(queued.to, ['reset@test.com'])
+        self.assertEqual(queued.status, 'pending')
+        self.assertIn(self.user.password_reset_codes.get().code, queued.body)
+
+        call_command('dispatch_emails', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reset@test.com'])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'sent')
+        self.assertIsNotNone(queued.sent_at)
+
+    def test_sent_reset_email_no_longer_holds_the_code(self):
+        self.client.post(reverse('password_reset_request'), {'email': 'reset@test.com'}, format='json')
+        code = self.user.password_reset_codes.get().code
+
+        call_command('dispatch_emails', stdout=StringIO())
+        self.assertIn(code, mail.outbox[0].body)
+        self.assertEqual(OutboxEmail.objects.get().body, '')
+        self.assertFalse(OutboxEmail.objects.filter(body__contains=code).exists())
+
+    @override_settings(EMAIL_OUTBOX_RETENTION=timezone.timedelta(days=7))
+    def test_purge_removes_old_processed_emails(self):
+        old = timezone.now() - timezone.timedelta(days=8)
+        sent = OutboxEmail.objects.enqueue('Sent', 'Body', ['to@test.com'])
+        failed = OutboxEmail.objects.enqueue('Failed', 'Body', ['to@test.com'])
+        recent = OutboxEmail.objects.enqueue('Recent', 'Body', ['to@test.com'])
+        pending = OutboxEmail.objects.enqueue('Pending', 'Body', ['to@test.com'])
+        OutboxEmail.objects.filter(pk=sent.pk).update(status='sent', sent_at=old)
+        OutboxEmail.objects.filter(pk=failed.pk).update(status='failed', created_at=old)
+        OutboxEmail.objects.filter(pk=recent.pk).update(status='sent', sent_at=timezone.now())
+        OutboxEmail.objects.filter(pk=pending.pk).update(created_at=old)
+
+        out = StringIO()
+        call_command('purge_reset_codes', stdout=out)
+        self.assertIn('2 outbox email(s) purged', out.getvalue())
+        self.assertEqual(set(OutboxEmail.objects.values_list('pk', flat=True)), {recent.pk, pending.pk})
+
+    def test_batch_reuses_one_connection(self):
+        for i in range(5):
+            OutboxEmail.objects.enqueue(f'Subject {i}', 'Body', [f'to{i}@test.com'])
+
+        CountingEmailBackend.opened = 0
+        sent, failed = OutboxEmail.objects.dispatch(batch_size=5, connection=CountingEmailBackend())
+        self.assertEqual((sent, failed), (5, 0))
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertFalse(OutboxEmail.objects.due().exists())
+
+    def test_sends_happen_outside_the_claim_transaction(self):
+        for i in range(3):
+            OutboxEmail.objects.enqueue(f'Subject {i}', 'Body', [f'to{i}@test.com'])
+
+        TransactionProbeEmailBackend.depths = []
+        test_depth = len(connection.atomic_blocks)
+        self.assertEqual(OutboxEmail.objects.dispatch(connection=TransactionProbeEmailBackend()), (3, 0))
+        self.assertEqual(TransactionProbeEmailBackend.depths, [test_depth] * 3)
+
+    @override_settings(EMAIL_OUTBOX_CLAIM_TIMEOUT=120)
+    def test_claimed_emails_are_not_due_for_other_dispatchers(self):
+        email = OutboxEmail.objects.enqueue('Subject', 'Body', ['to@test.com'])
+
+        claimed = OutboxEmail.objects.claim(batch_size=10)
+        self.assertEqual([e.pk for e in claimed], [email.pk])
+        self.assertFalse(OutboxEmail.objects.due().exists())
+        self.assertEqual(OutboxEmail.objects.dispatch(), (0, 0))
+
+        # Dispatcher arrêté pendant l'envoi: l'email redevient échu après la réservation
+        later = timezone.now() + timezone.timedelta(seconds=121)
+        self.assertTrue(OutboxEmail.objects.due(now=later).exists())
+
+    def test_failure_retries_with_backoff_then_gives_up(self):
+        email = OutboxEmail.objects.enqueue('Subject', 'Body', ['to@test.com'])
+
+        before = timezone.now()
+        self.assertEqual(OutboxEmail.objects.dispatch(connection=FailingEmailBackend()), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertIn('SMTP unavailable', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, before + timezone.timedelta(seconds=30))
+        # Pas encore échu: le passage suivant ne le renvoie pas
+        self.assertEqual(OutboxEmail.objects.dispatch(connection=FailingEmailBackend()), (0, 0))
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        OutboxEmail.objects.dispatch(connection=FailingEmailBackend())
+        email.refresh_from_db()
+        self.assertGreaterEqual(email.next_attempt_at, timezone.now() + timezone.timedelta(seconds=55))
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        OutboxEmail.objects.dispatch(connection=FailingEmailBackend())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 3))
+        self.assertEqual(email.body, '')
+
+
+class PasswordResetCodeTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('code@test.com', 'password', first_name='C', last_name='R')
+
+    def test_issue_replaces_previous_code_without_lookup_loop(self):
+        PasswordResetCode.objects.issue(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            reset_code = PasswordResetCode.objects.issue(self.user)
+        # update_or_create: verrou + mise à jour, sans requête par code candidat
+        self.assertLessEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(PasswordResetCode.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(len(reset_code.code), 6)
+
+    def test_same_code_for_two_users_does_not_collide(self):
+        other = User.objects.create_user('code2@test.com', 'password', first_name='C', last_name='R')
+        first = PasswordResetCode.objects.issue(self.user)
+        PasswordResetCode.objects.create(user=other, code=first.code, expires_at=first.expires_at)
+
+        self.assertEqual(PasswordResetCode.objects.find_valid(other, first.code).user, other)
+        self.assertEqual(PasswordResetCode.objects.find_valid(self.user, first.code), first)
+
+    def test_confirm_consumes_code(self):
+        self.client.post(reverse('password_reset_request'), {'email': 'code@test.com'}, format='json')
+        code = PasswordResetCode.objects.get(user=self.user).code
+
+        response = self.client.post(reverse('password_reset_validate_code'), {'email': 'code@test.com', 'code': code})
+        self.assertEqual(response.status_code, 200)
+
+        data = {'email': 'code@test.com', 'code': code, 'password': 'N3w-passw0rd!', 'password_confirmation': 'N3w-passw0rd!'}
+        response = self.client.post(reverse('password_reset_confirm'), data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(PasswordResetCode.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.post(reverse('password_reset_confirm'), data, format='json').status_code, 400)
+
+    def test_purge_removes_expired_and_used_codes(self):
+        other = User.objects.create_user('code3@test.com', 'password', first_name='C', last_name='R')
+        third = User.objects.create_user('code4@test.com', 'password', first_name='C', last_name='R')
+        PasswordResetCode.objects.issue(self.user)
+        PasswordResetCode.objects.issue(other, ttl=timezone.timedelta(minutes=-1))
+        PasswordResetCode.objects.create(user=third, is_used=True)
+
+        out = StringIO()
+        call_command('purge_reset_codes', stdout=out)
+        self.assertIn('2 reset code(s) purged', out.getvalue())
+        self.assertEqual(list(PasswordResetCode.objects.values_list('user', flat=True)), [self.user.pk])
+
+
+@override_settings(JWT_STATELESS_READS=True)
+class StatelessJWTTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('jwt@test.com', 'password', first_name='J', last_name='W')
+        self.group = Group.objects.create_group('JWT group', creator=self.user)
+        Category.objects.create(name='Food', type='expense', user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token("jwt@test.com")}')
+
+    def access_token(self, email):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': email, 'password': 'password'})
+        return response.data['access']
+
+    def user_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format='json')
+        queries = [q['sql'] for q in ctx.captured_queries if 'FROM "api_user"' in q['sql']]
+        return response, queries
+
+    def test_cached_dashboard_does_not_load_user(self):
+        self.client.get(reverse('user_dashboard'))
+        response, queries = self.user_queries('get', reverse('user_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_deferred_fields_load_in_one_query(self):
+        response, queries = self.user_queries('get', reverse('user_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_other_views_load_user(self):
+        response, queries = self.user_queries('get', reverse('category-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_deleted_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get(reverse('user_dashboard')).status_code, 401)
+
+    def test_demoted_superuser_loses_access(self):
+        admin = User.objects.create_superuser('root@test.com', 'password', first_name='R', last_name='T')
+        Transaction.objects.create(user=self.user, amount=Decimal('10.00'), type='expense', description='Private',
+            date=timezone.now().date())
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token("root@test.com")}')
+        User.objects.filter(pk=admin.pk).update(is_superuser=False, is_staff=False)
+
+        # Les droits viennent de la base, pas du token émis avant la rétrogradation
+        response = self.client.get(reverse('transaction-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+        response = self.client.get(reverse('transaction-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(str(response.data['total_expenses'])), Decimal('0'))
+
+        User.objects.filter(pk=admin.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('transaction-list')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('user_dashboard')).status_code, 401)
+
+    def test_privilege_flags_are_not_read_from_claims(self):
+        token = AccessToken(self.access_token('jwt@test.com'))
+        self.assertNotIn('is_superuser', token)
+        User.objects.filter(pk=self.user.pk).update(is_superuser=True)
+        user = TokenClaimsUser.from_claims(self.user.pk, token)
+        self.assertIn('is_superuser', user.get_deferred_fields())
+        self.assertTrue(user.is_superuser)
+
+    @override_settings(JWT_STATELESS_READS=False)
+    def test_can_be_disabled(self):
+        self.client.get(reverse('user_dashboard'))
+        _, queries = self.user_queries('get', reverse('user_dashboard'))
+        self.assertEqual(len(queries), 1)
+
+
+class TokenBlacklistTests(CacheIsolatedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('refresh@test.com', 'password', first_name='R', last_name='T')
+        self.client = APIClient()
+        response = self.client.post(reverse('token_obtain_pair'), {'email': 'refresh@test.com', 'password': 'password'})
+        self.refresh = response.data['refresh']
+
+    def test_rotated_token_is_rejected_from_cache(self):
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('token_refresh'), {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse([q for q in ctx.captured_queries if 'token_blacklist_blacklistedtoken' in q['sql']])
+
+    def revoke_elsewhere(self):
+        """Révoque le refresh token en base, sans passer par le cache de ce processus"""
+        token = RefreshToken(self.refresh, verify=False)
+        outstanding, _ = OutstandingToken.objects.get_or_create(
+            jti=token['jti'], defaults={'token': self.refresh, 'expires_at': timezone.now()}
+        )
+        BlacklistedToken.objects.create(token=outstanding)
+
+    def test_local_cache_does_not_keep_valid_tokens(self):
+        token = RefreshToken(self.refresh, verify=False)
+        self.assertFalse(is_blacklisted(token['jti'], token['exp']))
+        self.revoke_elsewhere()
+        self.assertTrue(is_blacklisted(token['jti'], token['exp']))
+
+    def test_shared_cache_keeps_valid_tokens_without_overwriting_revocations(self):
+        token = RefreshToken(self.refresh, verify=False)
+        with patch('api.token_blacklist.is_process_local', return_value=False):
+            self.assertFalse(is_blacklisted(token['jti'], token['exp']))
+            with self.assertNumQueries(0):
+                self.assertFalse(is_blacklisted(token['jti'], token['exp']))
+
+            remember_blacklisted(token['jti'], token['exp'])
+            self.assertTrue(is_blacklisted(token['jti'], token['exp']))
+
+    def test_logout_blacklists_token(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('logout'), {'refresh_token': self.refresh})
+        self.assertEqual(response.status_code, 200)
+        jti = RefreshToken(self.refresh, verify=False)['jti']
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=jti).exists())
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': self.refresh}).status_code, 401)
+
+    def test_prune_removes_expired_tokens_in_batches(self):
+        self.client.post(reverse('token_refresh'), {'refresh': self.refresh})
+        self.assertEqual(OutstandingToken.objects.count(), 2)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        later = timezone.now() + timezone.timedelta(days=30)
+        self.assertEqual(token_table_stats(now=later)['expired'], 2)
+        self.assertEqual(prune_expired_tokens(batch_size=1, now=later), 2)
+        self.assertEqual(token_table_stats(), {'outstanding': 0, 'blacklisted': 0, 'expired': 0})
+
+        out = StringIO()
+        call_command('prune_tokens', stdout=out)
+        self.assertIn('0 expired token(s) pruned', out.getvalue())
+
+
+class LoggingFormatterTests(TestCase):
+    def test_single_regex_highlight_matches_legacy_output(self):
+        from api.management.commands.benchmark_log_formatters import SAMPLE_SQL, legacy_replace_sql_keywords
+        from logs.logging_config import replace_sql_keywords
+
+        self.assertEqual(replace_sql_keywords(SAMPLE_SQL), legacy_replace_sql_keywords(SAMPLE_SQL))
+        self.assertEqual(replace_sql_keywords('"api_user"."is_active"'), '"api_user"."is_active"')
+
+    def test_json_formatter_includes_extra_fields(self):
+        from logs import JSONFormatter
+
+        record = logging.LogRecord('api', logging.INFO, __file__, 1, 'user %s', (42,), None)
+        record.path = '/api/v1/groups/'
+        payload = json.loads(JSONFormatter().format(record))
+
+        self.assertEqual(payload['message'], 'user 42')
+        self.assertEqual(payload['level'], 'INFO')
+        self.assertEqual(payload['path'], '/api/v1/groups/')
+
+    def test_queue_handler_writes_through_listener(self):
+        from logs import QueueListenerHandler
+
+        target = logging.handlers.MemoryHandler(capacity=10)
+        handler = QueueListenerHandler([target])
+        logger = logging.getLogger('api.tests.queue')
+        logger.addHandler(handler)
+        try:
+            logger.warning('queued')
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        self.assertEqual([record.getMessage() for record in target.buffer], ['queued'])
+
+
+class SQLProfilingTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sql@test.com', 'password', first_name='S', last_name='Q')
+        Group.objects.create_group('Profiled group', creator=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('group-my-groups'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SQL_PROFILING=True)
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('group-my-groups'))
+        self.assertRegex(response['Server-Timing'], rf'^db;dur=[\d.]+;desc="{len(ctx.captured_queries)} queries"$')
+
+    @override_settings(SQL_PROFILING=True, SQL_PROFILING_DUPLICATE_THRESHOLD=1)
+    def test_repeated_queries_are_logged_with_action_name(self):
+        with self.assertLogs('api.sql', level='WARNING') as logs:
+            self.client.get(reverse('group-my-groups'))
+        self.assertTrue(all('GroupViewSet.my_groups' in line for line in logs.output))
+
+    def test_fingerprint_collapses_parameter_lists(self):
+        from api.middleware import fingerprint
+
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT *  FROM t WHERE id IN (%s)')
+        )
+
+
+class MetricsTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('metrics@test.com', 'password', first_name='M', last_name='T')
+
+    def setUp(self):
+        super().setUp()
+        for metric in api_metrics.REGISTRY:
+            metric.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = api_metrics.Histogram('test_seconds', 'Test', ('route',), buckets=(0.1, 1))
+        histogram.observe(0.05, route='a')
+        histogram.observe(0.5, route='a')
+        histogram.observe(5, route='a')
+
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{route="a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{route="a"} 3', lines)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requests_and_balance_updates_are_exported(self):
+        self.client.get(reverse('category-list'))
+        Transaction.objects.create(amount=10, type='income', description='Salary', user=self.user, date=timezone.now())
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('api_request_duration_seconds_count{route="category-list",method="GET"} 1', body)
+        self.assertIn('api_requests_total{route="category-list",method="GET",status="200"} 1', body)
+        self.assertIn('api_request_db_queries_count{route="category-list"} 1', body)
+        self.assertIn('api_balance_update_duration_seconds_count 1', body)
+        self.assertIn('api_cache_requests_total{cache="membership",result="hits"}', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_protects_endpoint(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_endpoint_is_closed_without_token(self):
+        self.assertEqual(APIClient().get(reverse('metrics')).status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(APIClient().get(reverse('metrics')).status_code, 200)
+
+
+def read_alias_in_action(user):
+    """Alias choisi par le routeur pour une lecture dans une action @replica_read"""
+    class View:
+        @replica_read
+        def action(self, request):
+            return ReplicaRouter().db_for_read(Transaction)
+
+    return View().action(type('Request', (), {'user': user})())
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """Décisions du routeur hors transaction (un TestCase reste sur le primaire, cf. ReplicaTransactionTests)"""
+    user = type('User', (), {'pk': 42, 'is_authenticated': True})()
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_reads_go_to_primary_outside_replica_actions(self):
+        with override_settings(DATABASE_REPLICA_ALIAS='replica'):
+            self.assertIsNone(ReplicaRouter().db_for_read(Transaction))
+            self.assertEqual(read_alias_in_action(self.user), 'replica')
+            # Le contexte est restauré après l'action
+            self.assertIsNone(ReplicaRouter().db_for_read(Transaction))
+        self.assertIsNone(ReplicaRouter().db_for_write(Transaction))
+
+    def test_recent_writer_is_pinned_to_primary(self):
+        with override_settings(DATABASE_REPLICA_ALIAS='replica', DB_REPLICA_STICKY_SECONDS=10):
+            pin_to_primary(self.user.pk)
+            self.assertTrue(is_pinned_to_primary(self.user.pk))
+            self.assertIsNone(read_alias_in_action(self.user))
+
+    def test_without_replica_everything_reads_primary(self):
+        with override_settings(DATABASE_REPLICA_ALIAS=None):
+            self.assertIsNone(read_alias_in_action(self.user))
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaStickinessMiddleware(lambda request: HttpResponse())
+
+    def through_middleware(self, method, status):
+        """Fait passer une requête de l'utilisateur par ReplicaStickinessMiddleware"""
+        middleware = ReplicaStickinessMiddleware(lambda request: HttpResponse(status=status))
+        request = getattr(RequestFactory(), method)('/api/v1/transactions/')
+        request.user = self.user
+        return middleware(request)
+
+    def test_middleware_pins_after_successful_write(self):
+        with override_settings(DATABASE_REPLICA_ALIAS='replica', DB_REPLICA_STICKY_SECONDS=10):
+            self.through_middleware('get', 200)
+            self.through_middleware('post', 400)
+            self.assertEqual(read_alias_in_action(self.user), 'replica')
+
+            self.through_middleware('post', 201)
+            self.assertIsNone(read_alias_in_action(self.user))
+            # L'épinglage est dans le cache partagé dédié, pas dans le cache par défaut
+            self.assertTrue(caches[REPLICA_PIN_CACHE_ALIAS].get(pin_key(self.user.pk)))
+            self.assertIsNone(caches['default'].get(pin_key(self.user.pk)))
+
+    def test_deploy_check_flags_local_pin_cache(self):
+        shared = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}
+        with override_settings(DATABASE_REPLICA_ALIAS='replica'):
+            self.assertIn('api.W003', [warning.id for warning in check_authorization_caches(None)])
+            with override_settings(CACHES={**settings.CACHES, REPLICA_PIN_CACHE_ALIAS: shared}):
+                self.assertNotIn('api.W003', [warning.id for warning in check_authorization_caches(None)])
+        with override_settings(DATABASE_REPLICA_ALIAS=None):
+            self.assertNotIn('api.W003', [warning.id for warning in check_authorization_caches(None)])
+
+
+class ReplicaTransactionTests(CacheIsolatedTestCase):
+    def test_reads_inside_a_transaction_stay_on_primary(self):
+        # TestCase enveloppe chaque test dans atomic(): comme une requête en transaction
+        with override_settings(DATABASE_REPLICA_ALIAS='replica'):
+            self.assertIsNone(read_alias_in_action(ReplicaRouterTests.user))
+
+
+@skipUnless(settings.DATABASE_REPLICA_ALIAS, 'Aucun réplica configuré (DB_REPLICA_NAME)')
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routage réel avec deux alias (le réplica est un MIRROR du primaire en test)"""
+    # Sans réplica la classe est ignorée, mais le runner lit quand même ses alias
+    databases = {'default', settings.DATABASE_REPLICA_ALIAS or 'default'}
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = User.objects.create_user('replica@test.com', 'password', first_name='R', last_name='P')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queries_on(self, alias, url):
+        with CaptureQueriesContext(connections[alias]) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_analytics_actions_read_from_replica(self):
+        for route in ('transaction-stats', 'transaction-by-category', 'transaction-monthly-summary',
+                      'category-stats', 'category-most-used', 'category-by-type'):
+            self.assertGreater(self.queries_on(settings.DATABASE_REPLICA_ALIAS, reverse(route)), 0, route)
+
+        self.assertEqual(self.queries_on(settings.DATABASE_REPLICA_ALIAS, reverse('transaction-list')), 0)
+
+    def test_own_write_pins_reads_to_primary(self):
+        category = Category.objects.create(name='Salary', type='income', user=self.user)
+        data = {'amount': '100.00', 'type': 'income', 'description': 'Salary', 'category': category.pk,
+                'date': timezone.now().isoformat()}
+        self.assertEqual(self.client.post(reverse('transaction-list'), data, format='json').status_code, 201)
+
+        self.assertEqual(self.queries_on(settings.DATABASE_REPLICA_ALIAS, reverse('transaction-stats')), 0)
+        response = self.client.get(reverse('transaction-stats'))
+        self.assertEqual(response.data['transaction_count'], 1)
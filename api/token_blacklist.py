@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from api.checks import is_process_local
+from api.membership import CacheStats
+
+
+# Alias du cache (CACHES) qui conserve l'état « révoqué / non révoqué » des JTI
+TOKEN_BLACKLIST_CACHE_ALIAS = 'token_blacklist'
+
+# Nombre de lignes supprimées par requête lors de la purge
+TOKEN_PRUNE_BATCH_SIZE = 1000
+
+stats = CacheStats()
+
+
+def blacklist_cache():
+    return caches[TOKEN_BLACKLIST_CACHE_ALIAS]
+
+
+def blacklist_cache_key(jti):
+    return f'jti:{jti}'
+
+
+def seconds_until(exp):
+    """Durée de vie restante d'un token (au moins 1 seconde)"""
+    return max(int(exp - timezone.now().timestamp()), 1)
+
+
+def is_blacklisted(jti, exp):
+    """
+    Indique si un JTI est révoqué, depuis le cache si possible.
+
+    Un JTI révoqué le reste jusqu'à l'expiration du token: il est gardé en cache
+    jusque-là. Un JTI valide n'est gardé (TIMEOUT secondes) que si le cache est
+    partagé: dans un cache propre au processus, une révocation faite par un autre
+    worker ne serait pas vue et le token pourrait être rejoué.
+    """
+    cache = blacklist_cache()
+    revoked = cache.get(blacklist_cache_key(jti))
+    if revoked is not None:
+        stats.incr('hits')
+        return revoked
+
+    stats.incr('misses')
+    revoked = BlacklistedToken.objects.filter(token__jti=jti).exists()
+    if revoked:
+        cache.set(blacklist_cache_key(jti), True, timeout=seconds_until(exp))
+    elif not is_process_local(TOKEN_BLACKLIST_CACHE_ALIAS):
+        # add: n'écrase pas une révocation enregistrée entre-temps par remember_blacklisted
+        cache.add(blacklist_cache_key(jti), False)
+    return revoked
+
+
+def remember_blacklisted(jti, exp):
+    """Enregistre une révocation dans le cache, tout de suite et après le commit"""
+    stats.incr('invalidations')
+    key = blacklist_cache_key(jti)
+    timeout = seconds_until(exp)
+    blacklist_cache().set(key, True, timeout=timeout)
+    db_transaction.on_commit(lambda: blacklist_cache().set(key, True, timeout=timeout))
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    RefreshToken dont la vérification de révocation passe par le cache et dont
+    l'enregistrement (outstanding/blacklist) ne relit pas l'utilisateur.
+    """
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError("Token is blacklisted")
+
+    def outstanding_defaults(self):
+        return {
+            'user_id': self.payload.get(api_settings.USER_ID_CLAIM),
+            'created_at': self.current_time,
+            'token': str(self),
+            'expires_at': datetime_from_epoch(self.payload['exp']),
+        }
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token, _ = OutstandingToken.objects.get_or_create(jti=jti, defaults=self.outstanding_defaults())
+        result = BlacklistedToken.objects.get_or_create(token=token)
+        remember_blacklisted(jti, self.payload['exp'])
+        return result
+
+    def outstand(self):
+        # Appelé après rotation: le JTI vient d'être tiré, il n'existe pas encore
+        return OutstandingToken.objects.create(
+            jti=self.payload[api_settings.JTI_CLAIM], **self.outstanding_defaults()
+        )
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rafraîchissement (rotation + révocation) avec CachedRefreshToken"""
+    token_class = CachedRefreshToken
+
+
+def prune_expired_tokens(batch_size=TOKEN_PRUNE_BATCH_SIZE, now=None):
+    """
+    Supprime par lots les tokens expirés (et leurs révocations, en cascade).
+
+    Un token expiré est refusé par sa signature: sa ligne ne sert plus à rien.
+    Chaque lot est une requête courte, sans verrou prolongé sur les tables.
+    Retourne le nombre de tokens supprimés.
+    """
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        with db_transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def token_table_stats(now=None):
+    """Taille des tables du blacklist et part des lignes expirées (à purger)"""
+    now = now or timezone.now()
+    return {
+        'outstanding': OutstandingToken.objects.count(),
+        'blacklisted': BlacklistedToken.objects.count(),
+        'expired': OutstandingToken.objects.filter(expires_at__lte=now).count(),
+    }
+
+
+def token_blacklist_stats():
+    """Compteurs du cache des révocations et taille des tables"""
+    config = settings.CACHES.get(TOKEN_BLACKLIST_CACHE_ALIAS, {})
+    return {
+        'backend': config.get('BACKEND'),
+        'timeout': config.get('TIMEOUT', 300),
+        **stats.as_dict(),
+        'tables': token_table_stats(),
+    }
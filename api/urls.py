@@ -17,7 +17,8 @@ from api.views import (
     user_dashboard,
     PasswordResetView,
     PasswordResetConfirmView,
-    PasswordResetValidateCodeView
+    PasswordResetValidateCodeView,
+    cache_stats
 )
 
 # Configuration du router DRF
@@ -49,6 +50,9 @@ urlpatterns = [
     path('auth/password-reset/confirm/', PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
     path('auth/password-reset/validate-code/', PasswordResetValidateCodeView.as_view(), name='password_reset_validate_code'),
     
+    # Supervision
+    path('monitoring/cache/', cache_stats, name='cache_stats'),
+    
     # Authentification legacy (optionnel)
     path('api-auth/', include('rest_framework.urls')),
 ]
\ No newline at end of file
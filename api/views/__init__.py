@@ -13,4 +13,5 @@ from .auth import (
     PasswordResetView,
     PasswordResetConfirmView,
     PasswordResetValidateCodeView
-)
\ No newline at end of file
+)
+from .monitoring import cache_stats, metrics
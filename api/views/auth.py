@@ -1,20 +1,21 @@
 from rest_framework import status, permissions, serializers
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
-from django.core.mail import send_mail
 from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import string
-import random
 from datetime import datetime, timedelta
 from django.utils import timezone
-from api.models import User, PasswordResetCode
+from django.utils.cache import get_conditional_response
+from api.authentication import StatelessJWTAuthentication
+from api.dashboard import cache_dashboard, cached_dashboard, dashboard_etag, dashboard_version
+from api.models import User, Group, PasswordResetCode, OutboxEmail
+from api.token_blacklist import CachedRefreshToken
 from api.serializers.user import (
     UserSerializer, 
     UserCreateSerializer, 
@@ -25,16 +26,11 @@ from api.serializers.user import (
 )
 
 
-def generate_reset_code():
-    """Générer un code alphanumérique de 6 caractères"""
-    characters = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(characters) for _ in range(6))
-
-
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Serializer personnalisé pour utiliser email au lieu de username"""
+    token_class = CachedRefreshToken
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -180,7 +176,7 @@ class RegisterView(APIView):
             user = serializer.save()
             
             # Générer les tokens JWT
-            refresh = RefreshToken.for_user(user)
+            refresh = CustomTokenObtainPairSerializer.get_token(user)
             access_token = refresh.access_token
             
             return Response({
@@ -229,7 +225,7 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh_token')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = CachedRefreshToken(refresh_token)
                 token.blacklist()
                 return Response({
                     'message': 'Déconnexion réussie'
@@ -328,7 +324,7 @@ class ChangePasswordView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
 
             user.set_password(new_password)
-            user.save()
+            user.save(update_fields=['password', 'updated_at'])
 
             return Response({
                 'message': 'Mot de passe changé avec succès'
@@ -365,13 +361,38 @@ class ChangePasswordView(APIView):
     }
 )
 @api_view(['GET'])
+@authentication_classes([StatelessJWTAuthentication, TokenAuthentication, SessionAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def user_dashboard(request):
     """
-    Dashboard utilisateur avec statistiques de base
+    Dashboard utilisateur avec statistiques de base.
+
+    Le contenu est mis en cache par utilisateur sous une version changée à chaque
+    écriture qui le concerne (transaction, adhésion, groupe, profil). L'ETag porte
+    cette version: un client à jour reçoit 304 sans requête SQL dans la vue.
+    La vue ne lit que les données de l'utilisateur lui-même: avec
+    JWT_STATELESS_READS=True, elle n'a pas besoin de charger sa ligne.
     """
     user = request.user
+    version = dashboard_version(user.pk)
+    etag = dashboard_etag(user.pk, version)
     
+    response = get_conditional_response(request._request, etag=etag)
+    if response is None:
+        dashboard_data = cached_dashboard(user.pk, version)
+        if dashboard_data is None:
+            dashboard_data = build_dashboard(user)
+            cache_dashboard(user.pk, version, dashboard_data)
+        response = Response(dashboard_data)
+    
+    response['ETag'] = etag
+    # Le client doit revalider à chaque fois (réponse propre à l'utilisateur)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def build_dashboard(user):
+    """Calcule le contenu du dashboard d'un utilisateur"""
     # Statistiques de base
     total_groups = user.memberships.count()
     total_transactions = user.transactions.count()
@@ -382,10 +403,8 @@ def user_dashboard(request):
     if hasattr(user, 'transactions'):
         recent_transactions = user.transactions.order_by('-date')[:5]
     
-    # Groupes actifs (si des groupes existent)
-    active_groups = []
-    if hasattr(user, 'memberships'):
-        active_groups = user.memberships.select_related('group')[:5]
+    # Groupes actifs, avec le rôle de l'utilisateur lu par la même jointure
+    active_groups = Group.objects.for_user(user).order_by('-annotated_date_join')[:5]
     
     dashboard_data = {
         'user': UserSerializer(user).data,
@@ -405,15 +424,15 @@ def user_dashboard(request):
         ],
         'active_groups': [
             {
-                'id': m.group.id,
-                'name': m.group.name,
-                'role': m.role,
-                'amount': str(m.group.amount),
-            } for m in active_groups
+                'id': group.id,
+                'name': group.name,
+                'role': group.annotated_role,
+                'amount': str(group.amount),
+            } for group in active_groups
         ]
     }
     
-    return Response(dashboard_data)
+    return dashboard_data
 
 
 class PasswordResetView(APIView):
@@ -444,19 +463,9 @@ class PasswordResetView(APIView):
             try:
                 user = User.objects.get(email=email)
                 
-                # Supprimer les anciens codes de réinitialisation pour cet utilisateur
-                PasswordResetCode.objects.filter(user=user).delete()
-                
-                # Générer un nouveau code alphanumérique de 6 caractères
-                reset_code = generate_reset_code()
-                
-                # Créer l'enregistrement du code avec expiration (10 minutes)
-                expiry_time = timezone.now() + timedelta(minutes=20)
-                PasswordResetCode.objects.create(
-                    user=user,
-                    code=reset_code,
-                    expires_at=expiry_time
-                )
+                # Remplace l'éventuel code précédent de l'utilisateur (une écriture)
+                reset_code = PasswordResetCode.objects.issue(user)
+                validity = int(settings.PASSWORD_RESET_CODE_TTL.total_seconds() // 60)
                 
                 # Envoyer l'email avec le code
                 subject = "Code de réinitialisation de mot de passe - E-Finance"
@@ -465,9 +474,9 @@ class PasswordResetView(APIView):
 
                 Vous avez demandé la réinitialisation de votre mot de passe sur E-Finance.
 
-                Votre code de vérification est : {reset_code}
+                Votre code de vérification est : {reset_code.code}
 
-                Ce code est valide pendant 20 minutes.
+                Ce code est valide pendant {validity} minutes.
 
                 Si vous n'avez pas demandé cette réinitialisation, ignorez simplement cet email.
 
@@ -475,13 +484,8 @@ class PasswordResetView(APIView):
                 L'équipe E-Finance
                                 """
                 
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
+                # Mis en file: l'envoi SMTP est fait par la commande dispatch_emails
+                OutboxEmail.objects.enqueue(subject, message, [email])
                 
                 return Response({
                     'message': 'Un code de réinitialisation a été envoyé à votre adresse email.'
@@ -528,24 +532,15 @@ class PasswordResetConfirmView(APIView):
                 user = User.objects.get(email=email)
                 
                 # Vérifier le code de réinitialisation
-                reset_code = PasswordResetCode.objects.filter(
-                    user=user,
-                    code=code,
-                    expires_at__gt=timezone.now(),
-                    is_used=False
-                ).first()
+                reset_code = PasswordResetCode.objects.find_valid(user, code)
                 
                 if reset_code:
                     # Réinitialiser le mot de passe
                     user.set_password(password)
-                    user.save()
-                    
-                    # Marquer le code comme utilisé
-                    reset_code.is_used = True
-                    reset_code.save()
+                    user.save(update_fields=['password', 'updated_at'])
                     
-                    # Supprimer tous les autres codes pour cet utilisateur
-                    PasswordResetCode.objects.filter(user=user).delete()
+                    # Le code ne peut servir qu'une fois
+                    PasswordResetCode.objects.consume(user)
                     
                     return Response({
                         'message': 'Votre mot de passe a été réinitialisé avec succès.'
@@ -613,12 +608,7 @@ class PasswordResetValidateCodeView(APIView):
             user = User.objects.get(email=email)
             
             # Vérifier le code de réinitialisation
-            reset_code = PasswordResetCode.objects.filter(
-                user=user,
-                code=code,
-                expires_at__gt=timezone.now(),
-                is_used=False
-            ).first()
+            reset_code = PasswordResetCode.objects.find_valid(user, code)
             
             if reset_code:
                 return Response({
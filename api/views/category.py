@@ -4,18 +4,26 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, Prefetch
 
-from api.models import Category
+from api.models import Category, Transaction
 from api.permissions.permissions import IsOwnerOrAdmin, IsGroupMemberOrAdmin
 from api.serializers.category import (
     CategorySerializer, CategoryCreateSerializer, 
     CategoryListSerializer, CategoryStatsSerializer
 )
 from api.pagination import SmallResultsSetPagination
+from api.views.mixins import ConditionalGetMixin
+from api.routers import replica_read
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+def recent_transactions_prefetch():
+    """Précharge les 3 dernières transactions de chaque catégorie en une requête"""
+    recent = Transaction.objects.select_related('user', 'group', 'category').order_by('-date', '-id')[:3]
+    return Prefetch('transactions', queryset=recent, to_attr='recent_transaction_list')
+
+
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet pour la gestion des catégories"""
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -79,6 +87,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
+    @replica_read
     def stats(self, request):
         """Statistiques des catégories avec utilisation"""
         # Utiliser directement Category.objects pour conserver le manager personnalisé
@@ -97,12 +106,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
         categories_with_stats = base_queryset.filter(user=request.user).annotate(
             transaction_count=Count('transactions'),
             total_amount=Sum('transactions__amount')
-        ).order_by('-total_amount')
+        ).prefetch_related(recent_transactions_prefetch()).order_by('-total_amount')
         
-        serializer = CategoryStatsSerializer(categories_with_stats, many=True, context={'request': request})
+        context = {'request': request, 'type_totals': Category.objects.type_totals(request.user)}
+        serializer = CategoryStatsSerializer(categories_with_stats, many=True, context=context)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @replica_read
     def most_used(self, request):
         """Catégories les plus utilisées"""
         limit = int(request.query_params.get('limit', 10))
@@ -129,12 +140,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
         most_used = queryset.annotate(
             transaction_count=Count('transactions'),
             total_amount=Sum('transactions__amount')
-        ).order_by('-transaction_count')[:limit]
+        ).prefetch_related(recent_transactions_prefetch()).order_by('-transaction_count')[:limit]
         
-        serializer = CategoryStatsSerializer(most_used, many=True, context={'request': request})
+        context = {'request': request, 'type_totals': Category.objects.type_totals(request.user)}
+        serializer = CategoryStatsSerializer(most_used, many=True, context=context)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @replica_read
     def by_type(self, request):
         """Catégories groupées par type avec statistiques"""
         # Utiliser directement Category.objects pour conserver le manager personnalisé
@@ -149,7 +162,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 user_categories | group_categories
             ).distinct()
         
-        queryset = base_queryset.filter(user=request.user)
+        queryset = base_queryset.filter(user=request.user).select_related('group')
         
         # Séparer les catégories par type et ajouter les annotations
         income_categories = queryset.filter(type='income').annotate(
@@ -184,7 +197,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
     def transactions(self, request, pk=None):
         """Obtenir toutes les transactions d'une catégorie"""
         category = self.get_object()
-        transactions = category.transactions.all()
+        transactions = category.transactions.select_related('user', 'group', 'category')
         
         # Filtres optionnels
         start_date = request.query_params.get('start_date')
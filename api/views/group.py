@@ -8,14 +8,18 @@ from django.db import models
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from api.export import EXPORT_FORMATS, streaming_export
 from api.models import Group, Member
+from api.pagination import DateIdCursorPagination
 from api.permissions.permissions import IsGroupMemberOrAdmin, IsGroupAdminOrAdmin
+from api.views.mixins import ConditionalGetMixin
+from api.routers import replica_read
 from api.serializers.group import (
-    GroupSerializer, AddMemberSerializer, RemoveMemberSerializer, PromoteMemberSerializer
+    GroupSerializer, UserGroupSerializer, AddMemberSerializer, RemoveMemberSerializer, PromoteMemberSerializer
 )
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet pour la gestion des groupes financiers"""
     serializer_class = GroupSerializer
     permission_classes = [IsAuthenticated]
@@ -27,31 +31,22 @@ class GroupViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Retourne les groupes selon les permissions de l'utilisateur"""
         if self.request.user.is_superuser:
-            return Group.objects.with_member_counts()
+            return Group.objects.with_user_context(self.request.user)
         else:
-            # Utilisateur normal : seulement ses groupes
-            return Group.objects.with_member_counts().filter(members__user=self.request.user)
+            # Utilisateur normal : seulement ses groupes, avec son rôle (une seule jointure)
+            return Group.objects.for_user(self.request.user)
 
     @swagger_auto_schema(
         operation_description="Liste tous les groupes où l'utilisateur est membre",
-        responses={200: GroupSerializer(many=True)}
+        responses={200: UserGroupSerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
     def my_groups(self, request):
         """Liste tous les groupes où l'utilisateur est membre (peu importe le statut)"""
-        user_groups = Group.objects.with_member_counts().filter(members__user=request.user)
-        
-        # Ajouter les informations sur le rôle de l'utilisateur dans chaque groupe
-        groups_data = []
-        for group in user_groups:
-            member = Member.objects.get(user=request.user, group=group)
-            group_serializer = GroupSerializer(group, context={'request': request})
-            group_data = group_serializer.data
-            group_data['my_role'] = member.role
-            group_data['joined_date'] = member.date_join
-            groups_data.append(group_data)
-        
-        return Response(groups_data)
+        # Rôle, montant personnel et date d'adhésion sont lus par la même jointure
+        user_groups = Group.objects.for_user(request.user)
+        serializer = UserGroupSerializer(user_groups, many=True, context={'request': request})
+        return Response(serializer.data)
 
     def get_permissions(self):
         """Permissions spécifiques selon l'action"""
@@ -127,21 +122,22 @@ class GroupViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=['get'])
+    @replica_read
     def financial_summary(self, request, pk=None):
         """Obtenir le résumé financier d'un groupe"""
         group = self.get_object()
         
-        # Utiliser le manager pour obtenir les statistiques
-        group_with_stats = Group.objects.with_financial_summary().get(pk=group.pk)
+        # Totaux, compteurs et solde calculé en une seule requête
+        bundle = group.transactions.aggregate_bundle()
         
         summary = {
             'group_name': group.name,
             'total_amount': group.amount,
-            'calculated_balance': group.calculate_total_balance(),
-            'total_transactions': group_with_stats.total_transactions or 0,
-            'total_income': group_with_stats.total_income or 0,
-            'total_expenses': group_with_stats.total_expenses or 0,
-            'transaction_count': group_with_stats.transaction_count or 0,
+            'calculated_balance': bundle['balance'],
+            'total_transactions': bundle['total_amount'],
+            'total_income': bundle['total_income'],
+            'total_expenses': bundle['total_expenses'],
+            'transaction_count': bundle['transaction_count'],
             'member_count': group.member_count,
             'admin_count': group.admin_count,
         }
@@ -223,7 +219,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         try:
             from api.models import User
             user = User.objects.get(id=user_id)
-            member = Member.objects.get(user=user, group=group)
+            member = Member.objects.select_related('user', 'group').get(user=user, group=group)
             
             # Empêcher de supprimer le dernier admin
             if member.role == 'admin' and group.admin_count <= 1:
@@ -291,7 +287,7 @@ class GroupViewSet(viewsets.ModelViewSet):
             
             old_role = member.role
             member.role = new_role
-            member.save()
+            member.save(update_fields=['role', 'updated_at'])
             
             from api.serializers.member import MemberSerializer
             serializer = MemberSerializer(member)
@@ -308,13 +304,32 @@ class GroupViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def transactions(self, request, pk=None):
-        """Liste des transactions du groupe"""
+        """Liste des transactions du groupe (export en flux avec `export_format=csv|ndjson`)"""
         group = self.get_object()
         
         from api.models import Transaction
-        transactions = Transaction.objects.filter(group=group).select_related('user', 'category')
+        transactions = Transaction.objects.filter(group=group).select_related('user', 'category', 'group')
+        
+        export_format = request.query_params.get('export_format')
+        if export_format:
+            if export_format.lower() not in EXPORT_FORMATS:
+                return Response(
+                    {'error': f'Unsupported export format (choose among {", ".join(EXPORT_FORMATS)})'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return streaming_export(
+                transactions.order_by('-date', '-id'), export_format.lower(), f'group-{group.pk}-transactions'
+            )
         
         from api.serializers.transaction import TransactionSerializer
+        
+        # Pagination par curseur (date, id) sur demande (?cursor=), sinon la liste complète
+        paginator = DateIdCursorPagination()
+        if paginator.cursor_requested(request):
+            page = paginator.paginate_queryset(transactions, request, view=self)
+            serializer = TransactionSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
+        
         serializer = TransactionSerializer(transactions, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -332,13 +347,13 @@ class GroupViewSet(viewsets.ModelViewSet):
         recent_transactions = Transaction.objects.filter(
             group=group, 
             created_at__gte=thirty_days_ago
-        ).select_related('user', 'category').order_by('-created_at')[:20]
+        ).select_related('user', 'category', 'group').order_by('-created_at')[:20]
         
         # Nouveaux membres récents
         recent_members = Member.objects.filter(
             group=group,
             date_join__gte=thirty_days_ago
-        ).select_related('user').order_by('-date_join')[:10]
+        ).select_related('user', 'group').order_by('-date_join')[:10]
         
         from api.serializers.transaction import TransactionListSerializer
         from api.serializers.member import MemberSerializer
@@ -374,23 +389,38 @@ class GroupViewSet(viewsets.ModelViewSet):
             member_transactions = Transaction.objects.filter(
                 user=user, 
                 group=group
-            ).select_related('category').order_by('-created_at')
+            ).select_related('user', 'category', 'group')
             
             from api.serializers.transaction import TransactionListSerializer
             from api.serializers.member import MemberSerializer
             
+            bundle = member_transactions.aggregate_bundle()
+            
+            # Page de transactions par curseur (date, id) sur demande (?cursor=), sinon la liste complète
+            paginator = DateIdCursorPagination()
+            pagination = None
+            if paginator.cursor_requested(request):
+                page = paginator.paginate_queryset(member_transactions, request, view=self)
+                pagination = paginator.get_paginated_data(TransactionListSerializer(page, many=True).data)
+                transactions_data = pagination.pop('results')
+            else:
+                transactions_data = TransactionListSerializer(
+                    member_transactions.order_by('-created_at'), many=True
+                ).data
+            
             activity_data = {
                 'member': MemberSerializer(member).data,
-                'transactions': TransactionListSerializer(member_transactions, many=True).data,
+                'transactions': transactions_data,
                 'stats': {
-                    'total_transactions': member_transactions.count(),
-                    'total_contributed': member_transactions.filter(type='income').aggregate(
-                        total=models.Sum('amount'))['total'] or 0,
-                    'total_expenses': member_transactions.filter(type='expense').aggregate(
-                        total=models.Sum('amount'))['total'] or 0,
+                    'total_transactions': bundle['transaction_count'],
+                    'total_contributed': bundle['total_income'],
+                    'total_expenses': bundle['total_expenses'],
                 }
             }
             
+            if pagination is not None:
+                activity_data['pagination'] = pagination
+            
             return Response(activity_data)
             
         except User.DoesNotExist:
@@ -9,13 +9,14 @@ from django.utils import timezone
 
 from api.models import Member, Group
 from api.permissions.permissions import IsGroupMemberOrAdmin, IsGroupAdminOrAdmin
+from api.views.mixins import ConditionalGetMixin
 from api.serializers.member import (
     MemberSerializer, MemberCreateSerializer, 
     MemberContributionSerializer, MemberUpdateSerializer
 )
 
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet pour la gestion des membres de groupes"""
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -142,17 +143,16 @@ class MemberViewSet(viewsets.ModelViewSet):
         # Transactions du membre dans ce groupe
         transactions = member.user.transactions.filter(group=member.group)
         
-        # Statistiques
-        total_transactions = transactions.count()
-        total_contributed = transactions.aggregate(total=Sum('amount'))['total'] or 0
-        recent_transactions = transactions.order_by('-date')[:5]
+        # Statistiques en une seule requête
+        bundle = transactions.aggregate_bundle()
+        recent_transactions = transactions.select_related('user', 'category', 'group').order_by('-date')[:5]
         
         from api.serializers.transaction import TransactionListSerializer
         
         activity_data = {
             'member': MemberSerializer(member).data,
-            'total_transactions': total_transactions,
-            'total_contributed': total_contributed,
+            'total_transactions': bundle['transaction_count'],
+            'total_contributed': bundle['total_amount'],
             'recent_transactions': TransactionListSerializer(recent_transactions, many=True).data,
             'join_date': member.date_join,
             'days_in_group': (timezone.now().date() - member.date_join.date()).days
@@ -0,0 +1,71 @@
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from hashlib import md5
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    GET conditionnel (ETag / Last-Modified) pour les actions list et retrieve d'un ViewSet.
+
+    L'ETag d'une liste est dérivé de Max(`conditional_field`) et du nombre de lignes
+    du queryset filtré (une requête d'agrégat); une liste n'a pas de Last-Modified,
+    car Max(`conditional_field`) ne change pas quand une ligne plus ancienne est
+    supprimée. Un objet a un ETag et un Last-Modified tirés de son
+    `conditional_field`. Si le client est à jour, la réponse 304 est retournée
+    avant toute sérialisation. L'ETag inclut l'utilisateur: les contenus annotés
+    (rôle, adhésion) diffèrent d'un utilisateur à l'autre.
+    Les modifications d'objets liés (nom de catégorie affiché dans une transaction,
+    par exemple) ne changent pas les validateurs de l'objet principal.
+    """
+    conditional_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = queryset.order_by().aggregate(
+            last_modified=Max(self.conditional_field),
+            count=Count('pk')
+        )
+        etag, _ = self.get_validators(
+            request, 'list', validators['count'], validators['last_modified']
+        )
+
+        # ETag seul: If-Modified-Since ne permet pas de voir une suppression
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        return self.set_validators(response, etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_validators(
+            request, instance.pk, None, getattr(instance, self.conditional_field)
+        )
+
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(instance)
+        return self.set_validators(Response(serializer.data), etag, last_modified)
+
+    def get_validators(self, request, key, count, modified_at):
+        """Retourne (ETag faible, timestamp Last-Modified) pour l'utilisateur courant"""
+        model = self.get_queryset().model._meta.label_lower
+        seed = f'{model}:{key}:{request.user.pk}:{count}:{modified_at.isoformat() if modified_at else ""}'
+        etag = f'W/"{md5(seed.encode("utf-8"), usedforsecurity=False).hexdigest()}"'
+        last_modified = int(modified_at.timestamp()) if modified_at else None
+        return etag, last_modified
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Contenu propre à l'utilisateur: le client revalide à chaque fois
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from api import metrics as api_metrics
+from api.membership import membership_cache_stats
+from api.token_blacklist import token_blacklist_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    """
+    Compteurs des caches (succès, échecs, invalidations) du processus courant
+    et taille des tables du blacklist des tokens
+    """
+    return Response({
+        'membership': membership_cache_stats(),
+        'token_blacklist': token_blacklist_stats(),
+    })
+
+
+@require_GET
+def metrics(request):
+    """
+    Métriques du processus au format texte Prometheus (scrapé par Prometheus).
+
+    Vue Django simple (ni authentification DRF ni négociation de contenu).
+    L'en-tête `Authorization: Bearer <METRICS_TOKEN>` est exigé; sans METRICS_TOKEN,
+    la vue répond 404 sauf avec DEBUG=True.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token and not settings.DEBUG:
+        raise Http404
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(api_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
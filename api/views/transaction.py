@@ -2,20 +2,29 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.db.models import Sum, Count, Q, Min, Max
+from django.db.models import Sum, Count, Q
 from django.utils import timezone
+from datetime import date, datetime, time
+import csv
+import io
+import itertools
 
-from api.models import Transaction, Category
+from api.export import EXPORT_FORMATS, streaming_export
+from api.models import Transaction, Category, Group, MonthlyRollup
+from api.pagination import DateIdCursorPagination
 from api.permissions.permissions import IsOwnerOrAdmin, IsGroupMemberOrAdmin
+from api.views.mixins import ConditionalGetMixin
+from api.routers import replica_read
 from api.serializers.transaction import (
     TransactionSerializer, TransactionCreateSerializer, 
-    TransactionListSerializer, TransactionStatsSerializer
+    TransactionListSerializer, TransactionStatsSerializer, TransactionImportBatch
 )
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet pour la gestion des transactions"""
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -23,6 +32,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
     search_fields = ['description', 'category__name', 'group__name']
     ordering_fields = ['date', 'amount', 'created_at']
     ordering = ['-date']
+    pagination_class = DateIdCursorPagination
+    import_max_rows = 5000  # Nombre maximal de lignes par import en masse
     
     def get_serializer_class(self):
         """Sélectionner le bon serializer selon l'action"""
@@ -49,10 +60,70 @@ class TransactionViewSet(viewsets.ModelViewSet):
         """Créer une transaction"""
         serializer.save(user=self.request.user)
     
+    @action(
+        detail=False, methods=['post'], url_path='import', url_name='import',
+        parser_classes=[JSONParser, MultiPartParser, FormParser]
+    )
+    def bulk_import(self, request):
+        """
+        Import en masse de transactions: liste JSON (`transactions`) ou fichier CSV (`file`)
+        avec les colonnes amount, date, description, type, category, group.
+        Les lignes valides sont insérées, les autres listées dans `errors`.
+        """
+        upload = request.FILES.get('file')
+        if upload:
+            # Lecture en flux: au-delà de import_max_rows + 1 lignes, le reste du fichier n'est pas lu
+            reader = csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+            try:
+                rows = list(itertools.islice(reader, self.import_max_rows + 1))
+            except (UnicodeDecodeError, csv.Error):
+                return Response({'error': 'Invalid CSV file'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data.get('transactions') if isinstance(request.data, dict) else request.data
+
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'error': 'Provide a non-empty "transactions" list or a CSV "file"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > self.import_max_rows:
+            return Response(
+                {'error': f'Too many rows (maximum {self.import_max_rows})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        batch = TransactionImportBatch(rows, request.user)
+        batch.is_valid()
+        created = Transaction.objects.bulk_import(batch.transactions) if batch.transactions else []
+
+        return Response({
+            'total_rows': len(rows),
+            'created': len(created),
+            'failed': len(batch.errors),
+            'errors': batch.errors,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+    
     @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export des transactions en flux (`export_format=csv` par défaut, ou `ndjson`).
+        Les filtres, la recherche et le tri de la liste s'appliquent.
+        """
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'Unsupported export format (choose among {", ".join(EXPORT_FORMATS)})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export(queryset, export_format, 'transactions')
+    
+    @action(detail=False, methods=['get'])
+    @replica_read
     def stats(self, request):
         """Statistiques des transactions de l'utilisateur"""
-        queryset = self.get_queryset().filter(user=request.user)
+        queryset = Transaction.objects.user_transactions(request.user)
         
         # Paramètres de date optionnels
         start_date = request.query_params.get('start_date')
@@ -63,28 +134,26 @@ class TransactionViewSet(viewsets.ModelViewSet):
         if end_date:
             queryset = queryset.filter(date__lte=end_date)
         
-        # Calculs statistiques
-        income_total = queryset.filter(type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
-        expense_total = queryset.filter(type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
+        # Calculs statistiques en une seule requête
+        bundle = queryset.aggregate_bundle()
         
         stats = {
-            'total_income': income_total,
-            'total_expenses': expense_total,
-            'balance': income_total - expense_total,
-            'transaction_count': queryset.count(),
-            'income_count': queryset.filter(type='income').count(),
-            'expense_count': queryset.filter(type='expense').count(),
-            'average_transaction': (income_total + expense_total) / max(queryset.count(), 1),
-            'period_start': start_date or queryset.aggregate(min_date=Min('date'))['min_date'],
-            'period_end': end_date or queryset.aggregate(max_date=Max('date'))['max_date'],
+            'total_income': bundle['total_income'],
+            'total_expenses': bundle['total_expenses'],
+            'balance': bundle['balance'],
+            'transaction_count': bundle['transaction_count'],
+            'income_count': bundle['income_count'],
+            'expense_count': bundle['expense_count'],
+            'average_transaction': bundle['average_transaction'],
+            'period_start': start_date or bundle['period_start'],
+            'period_end': end_date or bundle['period_end'],
         }
         
         serializer = TransactionStatsSerializer(stats)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @replica_read
     def by_category(self, request):
         """Transactions groupées par catégorie"""
         queryset = self.get_queryset().filter(user=request.user)
@@ -122,21 +191,36 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @replica_read
     def monthly_summary(self, request):
-        """Résumé mensuel des transactions"""
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
+        """Résumé mensuel des transactions (lu depuis les agrégats mensuels)"""
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+            month = int(request.query_params.get('month', timezone.now().month))
+            month_start = date(year, month, 1)
+            next_month = date(year + month // 12, month % 12 + 1, 1)
+        except ValueError:
+            return Response(
+                {'error': 'year and month must be integers (month between 1 and 12)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        monthly_transactions = self.get_queryset().filter(
-            user=request.user,
-            date__year=year,
-            date__month=month
+        rollups = MonthlyRollup.objects.user_rollups(request.user).filter(month=month_start)
+        
+        totals = rollups.aggregate(
+            total_income=Sum('total_amount', filter=Q(type='income')),
+            total_expenses=Sum('total_amount', filter=Q(type='expense')),
+            transaction_count=Sum('transaction_count')
         )
+        income_total = totals['total_income'] or 0
+        expense_total = totals['total_expenses'] or 0
         
-        income_total = monthly_transactions.filter(type='income').aggregate(
-            total=Sum('amount'))['total'] or 0
-        expense_total = monthly_transactions.filter(type='expense').aggregate(
-            total=Sum('amount'))['total'] or 0
+        by_category = rollups.values(
+            'category__name', 'type'
+        ).annotate(
+            total_amount=Sum('total_amount'),
+            transaction_count=Sum('transaction_count')
+        ).filter(transaction_count__gt=0).order_by('-total_amount')
         
         summary = {
             'year': year,
@@ -144,12 +228,72 @@ class TransactionViewSet(viewsets.ModelViewSet):
             'total_income': income_total,
             'total_expenses': expense_total,
             'balance': income_total - expense_total,
-            'transaction_count': monthly_transactions.count(),
-            'transactions': TransactionListSerializer(monthly_transactions, many=True).data
+            'transaction_count': totals['transaction_count'] or 0,
+            'by_category': list(by_category),
         }
         
+        # Détail des transactions du mois uniquement sur demande (plage de dates indexable)
+        if request.query_params.get('include_transactions', '').lower() in ['1', 'true']:
+            current_tz = timezone.get_current_timezone()
+            monthly_transactions = Transaction.objects.user_transactions(request.user).filter(
+                date__gte=datetime.combine(month_start, time.min, tzinfo=current_tz),
+                date__lt=datetime.combine(next_month, time.min, tzinfo=current_tz)
+            ).select_related('user', 'category', 'group')
+            summary['transactions'] = TransactionListSerializer(monthly_transactions, many=True).data
+        
         return Response(summary)
 
+    @action(detail=False, methods=['get'])
+    def monthly_history(self, request):
+        """Évolution mensuelle des revenus et dépenses (lue depuis les agrégats mensuels)"""
+        group_id = request.query_params.get('group_id')
+        
+        # Premier jour du mois situé `months - 1` mois avant le mois courant
+        today = timezone.localdate()
+        try:
+            months = int(request.query_params.get('months', 12))
+            if months < 1:
+                raise ValueError
+            first_month = today.year * 12 + today.month - 1 - (months - 1)
+            start_month = date(first_month // 12, first_month % 12 + 1, 1)
+        except ValueError:
+            return Response({'error': 'months must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if group_id:
+            try:
+                group = Group.objects.get(id=int(group_id))
+            except ValueError:
+                return Response({'error': 'group_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            except Group.DoesNotExist:
+                return Response({'error': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
+            if not request.user.is_superuser and not group.is_user_member(request.user):
+                return Response(
+                    {'error': 'You do not have access to this group'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            rollups = MonthlyRollup.objects.group_rollups(group)
+        else:
+            rollups = MonthlyRollup.objects.user_rollups(request.user)
+        
+        rollups = rollups.filter(month__gte=start_month)
+        
+        history = rollups.values('month').annotate(
+            total_income=Sum('total_amount', filter=Q(type='income')),
+            total_expenses=Sum('total_amount', filter=Q(type='expense')),
+            transaction_count=Sum('transaction_count')
+        ).order_by('month')
+        
+        return Response([
+            {
+                'year': item['month'].year,
+                'month': item['month'].month,
+                'total_income': item['total_income'] or 0,
+                'total_expenses': item['total_expenses'] or 0,
+                'balance': (item['total_income'] or 0) - (item['total_expenses'] or 0),
+                'transaction_count': item['transaction_count'] or 0,
+            } for item in history
+        ])
+
     @action(detail=False, methods=['get'])
     def personal(self, request):
         """Retourne seulement les transactions personnelles (pas de groupe)"""
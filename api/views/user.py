@@ -7,11 +7,12 @@ from rest_framework.authentication import SessionAuthentication
 from api.filters.users import UserFilter
 from api.models import User
 from api.serializers import UserSerializer
+from api.views.mixins import ConditionalGetMixin
 from rest_framework.permissions import IsAuthenticated
 
 
 # Create your views here.
-class UserModelViewSet(viewsets.ModelViewSet):
+class UserModelViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     queryset = User.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -51,6 +51,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Placés en tête pour mesurer aussi les middlewares suivants
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.SQLProfilingMiddleware',  # Inactif sauf si SQL_PROFILING
+    'api.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,6 +94,16 @@ WSGI_APPLICATION = 'core.wsgi.application'
     }
 }
  """
+# Connexions à la base:
+# - DB_CONN_MAX_AGE (secondes): durée de vie d'une connexion persistante, réutilisée
+#   d'une requête à l'autre par le même thread (0 par défaut: une connexion par requête,
+#   vide: sans limite; ex. 60 en production). DB_CONN_HEALTH_CHECKS vérifie la connexion
+#   avant réutilisation.
+# - DB_POOL: pool de connexions dans le processus (PostgreSQL avec psycopg 3 et
+#   psycopg[pool] uniquement, incompatible avec les connexions persistantes).
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default='0', cast=lambda value: int(value) if value else None)
+
 DATABASES = {
     'default': {
         'ENGINE': config('DB_ENGINE'),
@@ -98,9 +112,63 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', default=''),
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
     }
 }
 
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Attente maximale (secondes) d'une connexion libre avant erreur
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        },
+    }
+
+# Réplica en lecture pour les actions analytiques (@replica_read). Il n'est déclaré
+# que si DB_REPLICA_NAME ou DB_REPLICA_HOST est défini; les autres paramètres
+# reprennent ceux du primaire. En test, l'alias pointe sur la base du primaire (MIRROR).
+DATABASE_REPLICA_ALIAS = None
+if config('DB_REPLICA_NAME', default='') or config('DB_REPLICA_HOST', default=''):
+    DATABASE_REPLICA_ALIAS = 'replica'
+    DATABASES[DATABASE_REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Durée (secondes) pendant laquelle les lectures d'un utilisateur restent sur le
+# primaire après l'une de ses écritures (lecture de ses propres écritures)
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=10, cast=int)
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+# bcrypt pour tous les chemins (inscription, create_user, changement de mot de passe).
+# Les hachages plus anciens (bcrypt brut, PBKDF2) restent vérifiables et sont
+# recalculés avec le hasher par défaut à la connexion suivante, comme ceux dont
+# le coût diffère de PASSWORD_BCRYPT_ROUNDS.
+PASSWORD_HASHERS = [
+    'api.encryption.password_encryption.BCryptSHA256Hasher',
+    'api.encryption.password_encryption.BCryptHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Facteur de coût bcrypt (log2 du nombre d'itérations): +1 double le temps de calcul
+PASSWORD_BCRYPT_ROUNDS = config('PASSWORD_BCRYPT_ROUNDS', default=12, cast=int)
+
+# Nombre maximal de hachages bcrypt exécutés en même temps par processus (les suivants
+# attendent dans leur thread de requête): limite l'usage CPU, pas le temps de connexion
+PASSWORD_HASHING_CONCURRENCY = config('PASSWORD_HASHING_CONCURRENCY', default=4, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -148,36 +216,73 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'api.User'
 
+# Grand livre: délai avant qu'une écriture puisse être figée dans un instantané de solde
+LEDGER_SNAPSHOT_LAG = timedelta(minutes=config('LEDGER_SNAPSHOT_LAG_MINUTES', default=5, cast=int))
+
+# Durée de validité d'un code de réinitialisation de mot de passe
+PASSWORD_RESET_CODE_TTL = timedelta(minutes=config('PASSWORD_RESET_CODE_TTL_MINUTES', default=20, cast=int))
+
+# Journalisation
+# Développement (DEBUG): sortie colorée et synchrone, requêtes SQL affichées.
+# Production: une ligne JSON par record, écrite par un thread dédié (QueueListener).
+LOG_LEVEL = config('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+LOG_SQL_LEVEL = config('LOG_SQL_LEVEL', default='DEBUG' if DEBUG else 'WARNING')
+LOG_FORMAT = config('LOG_FORMAT', default='color' if DEBUG else 'json')  # color | json
+LOG_ASYNC = config('LOG_ASYNC', default=not DEBUG, cast=bool)
+
+LOG_HANDLERS = ['queue'] if LOG_ASYNC else ['console']
+
+# Profil SQL par requête (en-tête Server-Timing, logs "api.sql" des N+1 et requêtes lentes)
+SQL_PROFILING = config('SQL_PROFILING', default=False, cast=bool)
+SQL_PROFILING_SLOW_QUERY_MS = config('SQL_PROFILING_SLOW_QUERY_MS', default=100, cast=float)
+# Nombre de répétitions d'une même requête à partir duquel un N+1 est signalé
+SQL_PROFILING_DUPLICATE_THRESHOLD = config('SQL_PROFILING_DUPLICATE_THRESHOLD', default=5, cast=int)
+
+# Métriques Prometheus (/metrics). Le scrape doit envoyer "Authorization: Bearer <METRICS_TOKEN>";
+# sans METRICS_TOKEN, /metrics répond 404 (sauf avec DEBUG=True)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
-        "default_formatter": {
+        "color": {
             '()': 'logs.ColoredFormatter',
             "format": "[%(asctime)s] %(levelname)s: \t%(message)s",
             "datefmt": "%H:%M:%S",
         },
+        "json": {
+            '()': 'logs.JSONFormatter',
+        },
     },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
-            "formatter": "default_formatter",
+            "formatter": LOG_FORMAT,
         },
     },
     "loggers": {
         "root": {
-            "handlers": ["console"],
-            "level": "DEBUG",
+            "handlers": LOG_HANDLERS,
+            "level": LOG_LEVEL,
             "propagate": True,
         },
         "django.db.backends": {
-            "handlers": ["console"],
-            "level": "DEBUG",
+            "handlers": LOG_HANDLERS,
+            "level": LOG_SQL_LEVEL,
             "propagate": False,
         },
     },
 }
 
+if LOG_ASYNC:
+    # Doit rester après "console" dans l'ordre alphabétique (cfg:// vers un handler déjà configuré)
+    LOGGING['handlers']['queue'] = {
+        '()': 'logs.QueueListenerHandler',
+        "handlers": ["cfg://handlers.console"],
+    }
+
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -221,8 +326,15 @@ SIMPLE_JWT = {
     
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+
+    # Vérification de révocation via le cache (alias token_blacklist)
+    'TOKEN_REFRESH_SERIALIZER': 'api.token_blacklist.CachedTokenRefreshSerializer',
 }
 
+# Lectures authentifiées à partir des claims du token, sans lire l'utilisateur, pour les
+# vues qui utilisent api.authentication.StatelessJWTAuthentication (désactivé par défaut)
+JWT_STATELESS_READS = config('JWT_STATELESS_READS', default=False, cast=bool)
+
 # Swagger Settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -237,6 +349,64 @@ SWAGGER_SETTINGS = {
     'LOGOUT_URL': '/api/v1/auth/logout/',
 }
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# L'alias "membership" conserve la carte {group_id: role} de chaque utilisateur, invalidée
+# à chaque modification d'adhésion. L'invalidation n'atteint que les processus qui partagent
+# le cache: en mémoire locale (défaut) la carte n'est gardée que quelques secondes, le délai
+# pendant lequel un membre retiré ou rétrogradé garde ses droits sur les autres workers.
+# Pour un cache partagé (TIMEOUT 300 s par défaut):
+# MEMBERSHIP_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache et
+# MEMBERSHIP_CACHE_LOCATION=redis://127.0.0.1:6379/1. MEMBERSHIP_CACHE_TIMEOUT=0 le désactive.
+LOCAL_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+MEMBERSHIP_CACHE_BACKEND = config('MEMBERSHIP_CACHE_BACKEND', default=LOCAL_CACHE_BACKEND)
+DASHBOARD_CACHE_BACKEND = config('DASHBOARD_CACHE_BACKEND', default=LOCAL_CACHE_BACKEND)
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=600, cast=int)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'membership': {
+        'BACKEND': MEMBERSHIP_CACHE_BACKEND,
+        'LOCATION': config('MEMBERSHIP_CACHE_LOCATION', default='membership'),
+        'TIMEOUT': config(
+            'MEMBERSHIP_CACHE_TIMEOUT', default=5 if MEMBERSHIP_CACHE_BACKEND == LOCAL_CACHE_BACKEND else 300, cast=int
+        ),
+        'KEY_PREFIX': 'api',
+    },
+    # Contenu des tableaux de bord (user_dashboard), indexé par version
+    'dashboard': {
+        'BACKEND': DASHBOARD_CACHE_BACKEND,
+        'LOCATION': config('DASHBOARD_CACHE_LOCATION', default='dashboard'),
+        'TIMEOUT': DASHBOARD_CACHE_TIMEOUT,
+        'KEY_PREFIX': 'api',
+    },
+    # État révoqué/non révoqué des refresh tokens (JTI). TIMEOUT ne s'applique qu'aux
+    # JTI non révoqués, qui ne sont mis en cache que si le backend est partagé: un JTI
+    # révoqué reste en cache jusqu'à l'expiration du token
+    'token_blacklist': {
+        'BACKEND': config('TOKEN_BLACKLIST_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('TOKEN_BLACKLIST_CACHE_LOCATION', default='token_blacklist'),
+        'TIMEOUT': config('TOKEN_BLACKLIST_CACHE_TIMEOUT', default=60, cast=int),
+        'KEY_PREFIX': 'api',
+    },
+    # Utilisateurs dont les lectures restent sur le primaire après une écriture (réplica).
+    # À partager entre les workers (Redis): en mémoire locale, une lecture servie par un
+    # autre worker que celui de l'écriture part sur le réplica, éventuellement en retard
+    'replica_pins': {
+        'BACKEND': config('REPLICA_PIN_CACHE_BACKEND', default=LOCAL_CACHE_BACKEND),
+        'LOCATION': config('REPLICA_PIN_CACHE_LOCATION', default='replica_pins'),
+        'KEY_PREFIX': 'api',
+    },
+}
+
+# Durée de vie (secondes) des versions de tableau de bord, par défaut celle des contenus:
+# une version expirée change l'ETag et force un recalcul même sans écriture. Un changement
+# de version fait par un worker n'est vu des autres que si le cache "dashboard" est
+# partagé (check --deploy signale un cache en mémoire locale gardé plus de 10 s)
+DASHBOARD_VERSION_TIMEOUT = config('DASHBOARD_VERSION_TIMEOUT', default=DASHBOARD_CACHE_TIMEOUT, cast=int)
+
 # Configuration Email
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -247,6 +417,20 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='E-Finance <noreply@efinance.com>')
 
+# File d'envoi des emails (commande dispatch_emails)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+# Délai (secondes) avant la première reprise, doublé à chaque échec
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=30, cast=int)
+EMAIL_OUTBOX_MAX_RETRY_DELAY = config('EMAIL_OUTBOX_MAX_RETRY_DELAY', default=3600, cast=int)
+# Réservation (secondes) d'un lot par un dispatcher: doit dépasser la durée d'envoi d'un lot.
+# Un lot réservé par un dispatcher arrêté en cours d'envoi redevient échu après ce délai
+EMAIL_OUTBOX_CLAIM_TIMEOUT = config('EMAIL_OUTBOX_CLAIM_TIMEOUT', default=300, cast=int)
+# Pause (secondes) du worker lorsque la file est vide
+EMAIL_OUTBOX_POLL_INTERVAL = config('EMAIL_OUTBOX_POLL_INTERVAL', default=2, cast=float)
+# Conservation des emails envoyés ou abandonnés (corps effacé) avant suppression par purge_reset_codes
+EMAIL_OUTBOX_RETENTION = timedelta(days=config('EMAIL_OUTBOX_RETENTION_DAYS', default=7, cast=int))
+
 # Configuration CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -6,6 +6,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view as swagger_get_schema_view
 from rest_framework import permissions
 
+from api.views import metrics
+
 schema_view = swagger_get_schema_view(
     openapi.Info(
         title='API E-Finance',
@@ -30,6 +32,9 @@ urlpatterns = [
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
+
+    # Métriques Prometheus
+    path('metrics', metrics, name='metrics'),
 ]
 
 # Servir les fichiers média en développement
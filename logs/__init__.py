@@ -1 +1 @@
-from .logging_config import ColoredFormatter
\ No newline at end of file
+from .logging_config import ColoredFormatter, JSONFormatter, QueueListenerHandler
\ No newline at end of file
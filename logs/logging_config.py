@@ -1,5 +1,9 @@
+import json
 import logging
+import logging.handlers
+import queue
 from copy import copy
+from datetime import datetime, timezone
 import re
 
 MAPPING = {
@@ -9,18 +13,30 @@ MAPPING = {
     'ERROR'   : 31, # red
     'CRITICAL': 41, # white on red bg
 }
- 
+
 PREFIX = '\033['
 SUFFIX = '\033[0m'
 
+SQL_KEYWORDS = ['SELECT', 'FROM', 'WHERE', 'JOIN', 'ON', 'AS', 'AND', 'OR', 'NOT', 'IS', 'NULL', 'LIKE', 'IN', 'EXISTS', 'ALL', 'ANY', 'BETWEEN', 'GROUP BY', 'ORDER BY', 'LIMIT', 'OFFSET']
+
+# Une seule expression compilée: un passage sur la requête au lieu d'un re.sub par mot-clé
+SQL_KEYWORDS_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(keyword) for keyword in SQL_KEYWORDS) + r')\b',
+    flags=re.IGNORECASE
+)
+SQL_KEYWORD_COLOR = '\033[38;2;253;182;0m'
+
+
+def highlight_sql_keyword(match):
+    return SQL_KEYWORD_COLOR + match.group(0).upper() + SUFFIX
+
+
 def replace_sql_keywords(sql):
-    keywords = ['SELECT', 'FROM', 'WHERE', 'JOIN', 'ON', 'AS', 'AND', 'OR', 'NOT', 'IS', 'NULL', 'LIKE', 'IN', 'EXISTS', 'ALL', 'ANY', 'BETWEEN', 'GROUP BY', 'ORDER BY', 'LIMIT', 'OFFSET']
-    for keyword in keywords:
-        sql = re.sub(r'\b' + keyword + r'\b', r'\033[38;2;253;182;0m' + keyword + r'\033[0m', sql, flags=re.IGNORECASE)
-    return sql
+    return SQL_KEYWORDS_RE.sub(highlight_sql_keyword, sql)
 
 class ColoredFormatter(logging.Formatter):
-    
+    """Formatter de développement: niveau en couleur et mots-clés SQL surlignés"""
+
     # The rest of the formatter still has to be initiated
     def __init__(
         self,
@@ -28,7 +44,7 @@ class ColoredFormatter(logging.Formatter):
         datefmt
     ):
         super().__init__(fmt, datefmt)
-    
+
     def format(self, record):
         colored_record = copy(record)
         levelname = colored_record.levelname
@@ -36,10 +52,77 @@ class ColoredFormatter(logging.Formatter):
         colored_levelname = ('{0}{1}m{2}{3}') \
             .format(PREFIX, seq, levelname, SUFFIX)
         colored_record.levelname = colored_levelname
-        
-        if hasattr(record, 'sql'):
+
+        # Les logs du schema editor ont aussi un attribut sql mais d'autres args
+        if hasattr(record, 'sql') and len(record.args) == 4 and isinstance(record.args[1], str):
             colored_record.args = tuple([record.args[0], replace_sql_keywords(record.args[1]), record.args[2], record.args[3]])
             # Uncomment if you want custom log level name for sql print-outs
             # colored_record.levelname = '\033[38;2;253;182;0mDB_DEBUG\033[0m'
-        
-        return logging.Formatter.format(self, colored_record)
\ No newline at end of file
+
+        return logging.Formatter.format(self, colored_record)
+
+
+# Attributs présents sur tout LogRecord: le reste vient de `extra` et est ajouté au JSON
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formatter de production: un objet JSON par ligne (timestamp UTC, niveau,
+    logger, message, emplacement, exception, champs passés via `extra`).
+    """
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES and key not in payload:
+                payload[key] = value
+
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """
+    Handler asynchrone: le thread qui journalise ne fait que déposer le record
+    dans une file; un QueueListener (thread dédié) le formate et l'écrit avec les
+    handlers cibles. Les requêtes ne bloquent plus sur les écritures (stdout, fichier).
+
+    `handlers` référence des handlers déjà configurés (ex. 'cfg://handlers.console',
+    qui doivent précéder celui-ci dans l'ordre alphabétique de dictConfig).
+    """
+
+    def __init__(self, handlers, respect_handler_level=True, queue_size=-1):
+        super().__init__(queue.Queue(queue_size))
+        # Les éléments d'une ConvertingList sont résolus à l'accès
+        targets = [handlers[index] for index in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f'QueueListenerHandler target is not a configured handler: {target!r}')
+
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *targets, respect_handler_level=respect_handler_level
+        )
+        self.listener.start()
+
+    def close(self):
+        # Appelé par logging.shutdown() à l'arrêt: vide la file avant de fermer les cibles
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+    def prepare(self, record):
+        # Les formatters cibles ont besoin des args d'origine (le formatage est fait par le listener)
+        return record